@@ -0,0 +1,1308 @@
+"""
+Бенчмарки производительности этапов анализа проекта
+
+Запуск:
+    python benchmarks.py <имя бенчмарка> [аргументы]
+
+Бенчмарки:
+    discovery [путь к директории] - обход дерева проекта (без пути создается синтетическое дерево)
+    executor [количество файлов]  - пропускная способность экстракторов в потоках и процессах
+    python_ast [путь | количество файлов] - зависимости и промпты Python: три обхода с astunparse против одного
+    adversarial                   - поиск промптов на враждебных входах: регулярные выражения против сканера литералов
+    keywords [путь]               - is_likely_prompt на строковых литералах: проверки `in` против KeywordMatcher
+    pdf [количество страниц]      - экстракторы PDF: разбор в каждом экстракторе против общей службы текста
+    docx [количество параграфов]  - экстракторы DOCX: python-docx в каждом экстракторе против общей модели на iterparse
+    excel [количество строк]      - экстракторы Excel: полное чтение книги в каждом экстракторе против окон листов
+    csv [количество строк]        - экстракторы CSV: полное чтение и iterrows против окна строк и форматирования по колонкам
+    segments [размер, МБ]         - загрузка текста и чанкинг: пересборка строки с переводами строк против сегментов
+    markdown [количество секций]  - экстракторы Markdown: HTML и повторное разбиение против индекса секций
+    markup [размер, МБ]           - разбор BPMN: дерево ET.fromstring против потокового iterparse (время и пик памяти)
+    structured [размер, МБ]       - промпты каталога JSON: литералы всего текста против потокового обхода ключей
+    notebook [размер, МБ]         - ноутбук с большими выводами: чтение как текста против потокового разбора ячеек
+    python_lexer [размер, МБ]     - сгенерированный Python-модуль: ast.parse против потокового лексера tokenize
+    java [количество классов]     - зависимости и промпты Java: дерево javalang против лексического прохода
+    cpp [количество модулей]      - зависимости и промпты C/C++: регулярные выражения против лексического прохода и граф включений
+    encoding [количество файлов]  - кодировки UTF-8/cp1251: chardet и повторное чтение в каждом читателе против одного определения
+    llm_map [количество чанков] [параллельность] - анализ чанков имитацией LLM: последовательно против batch
+    llm_reduce [количество анализов] [fan-in]   - суммаризация анализов: один запрос против дерева с кэшем уровней
+"""
+
+import io
+import os
+import re
+import json
+import base64
+import ast
+import sys
+import time
+import shutil
+import logging
+import tempfile
+import tracemalloc
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import Callable, Dict, List, Optional
+
+import PyPDF2
+import markdown
+import pandas as pd
+from openpyxl import Workbook
+from docx import Document
+
+from parsers import (
+    get_supported_extensions, get_project_structure, scan_project, is_likely_prompt,
+    extract_python_dependencies, extract_prompts_from_python, extract_prompts_from_literals,
+    load_requirements, extract_business_requirements, extract_project_description, extract_prompts,
+    extract_prompts_from_spreadsheet, extract_dependencies
+)
+from pdf_text import configure_pdf_text_service
+from python_symbols import PYTHON_AST_MAX_SIZE_MB, configure_python_ast_limit
+from java_model import configure_java_analysis_service
+from c_model import build_include_graph, lex_c_symbols
+from text_encoding import detect_encoding, sniff_file_encoding
+from workbook_model import read_csv_window
+from text_segments import chunk_segments, iter_sections
+from structured_prompts import iter_json_prompts
+from file_utilities import ContentExtractor
+from docx_model import load_docx_document, _read_with_python_docx
+from scanners import scan_string_literals, get_literal_syntax
+from executors import ExtractionExecutor
+from file_context import FileContext
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+def measure(func: Callable, repeats: int = 3) -> float:
+    """Лучшее время выполнения функции из нескольких запусков (в секундах)"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def print_comparison(title: str, baseline: float, optimized: float):
+    """Вывод сравнения двух замеров"""
+    speedup = baseline / optimized if optimized > 0 else float('inf')
+    print(f"{title}:")
+    print(f"  исходная реализация:      {baseline * 1000:.1f} мс")
+    print(f"  оптимизированная версия:  {optimized * 1000:.1f} мс")
+    print(f"  ускорение:                {speedup:.2f}x")
+
+
+def create_synthetic_tree(root: str, dirs: int = 200, files_per_dir: int = 50) -> str:
+    """Создание синтетического дерева проекта для замеров"""
+    extensions = ['.py', '.md', '.txt', '.json', '.png', '.lock', '.java', '.ts']
+    for d in range(dirs):
+        dir_path = os.path.join(root, f"pkg_{d // 20}", f"module_{d}")
+        os.makedirs(dir_path, exist_ok=True)
+        for f in range(files_per_dir):
+            ext = extensions[f % len(extensions)]
+            with open(os.path.join(dir_path, f"file_{f}{ext}"), 'w', encoding='utf-8') as fh:
+                fh.write("" if f % 17 == 0 else "x = 1\n")
+    os.makedirs(os.path.join(root, 'node_modules', 'lib'), exist_ok=True)
+    return root
+
+
+def legacy_get_files(directory_path: str) -> Dict[str, object]:
+    """Исходный двойной обход get_files_node (эталон для сравнения)"""
+
+    def legacy_should_process_file(file_path: str) -> bool:
+        ext = os.path.splitext(file_path)[1].lower()
+        all_supported = []
+        for category in get_supported_extensions().values():
+            all_supported.extend(category)
+        return ext in all_supported
+
+    files = []
+    empty_files = []
+    file_stats = {}
+    project_structure = get_project_structure(directory_path)
+
+    for root, dirs, filenames in os.walk(directory_path):
+        for excluded in ('.git', '__pycache__', 'node_modules'):
+            if excluded in dirs:
+                dirs.remove(excluded)
+        for filename in filenames:
+            file_path = os.path.join(root, filename)
+            ext = os.path.splitext(filename)[1].lower()
+            if not legacy_should_process_file(file_path):
+                continue
+            try:
+                file_size = os.path.getsize(file_path)
+            except OSError:
+                continue
+            if file_size == 0:
+                empty_files.append(file_path)
+                continue
+            elif file_size > 10 * 1024 * 1024:
+                continue
+            files.append(file_path)
+            file_stats[ext] = file_stats.get(ext, 0) + 1
+
+    return {
+        "project_structure": project_structure,
+        "files_list": files,
+        "empty_files": empty_files,
+        "file_stats": file_stats,
+    }
+
+
+def bench_discovery(directory_path: Optional[str] = None):
+    """Сравнение двойного os.walk и однопроходного scan_project"""
+    if directory_path is None:
+        temp_dir = tempfile.mkdtemp(prefix="parser_bench_")
+        try:
+            bench_discovery(create_synthetic_tree(temp_dir))
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        return
+
+    legacy = legacy_get_files(directory_path)
+    optimized = scan_project(directory_path)
+
+    if legacy['files_list'] != optimized['files_list'] or legacy['empty_files'] != optimized['empty_files']:
+        print("⚠️ Результаты обхода различаются")
+
+    print(f"Файлов: {len(optimized['files_list'])}, пустых: {len(optimized['empty_files'])}, "
+          f"директорий: {len(optimized['project_structure'])}")
+    print_comparison(
+        "Обнаружение файлов",
+        measure(lambda: legacy_get_files(directory_path)),
+        measure(lambda: scan_project(directory_path))
+    )
+
+
+def create_python_corpus(root: str, files: int = 300) -> List[str]:
+    """Синтетический корпус Python-модулей с импортами и промптами"""
+    paths = []
+    for i in range(files):
+        lines = [f"import module_{j}" for j in range(20)]
+        for j in range(60):
+            lines.append(f"def handler_{j}(request):")
+            lines.append(f"    prompt = \"You are an assistant number {j}. Analyze the request and respond.\"")
+            lines.append(f"    return call_model(prompt, request, temperature=0.{j % 10})")
+        path = os.path.join(root, f"module_{i}.py")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines))
+        paths.append(path)
+    return paths
+
+
+def run_extractors(paths: List[str], backend: str, workers: int) -> int:
+    """Извлечение зависимостей и промптов из файлов выбранным исполнителем"""
+    from project_parser import safe_extract_dependencies, safe_extract_prompts
+
+    with ExtractionExecutor(backend, workers) as executor:
+        futures = []
+        for path in paths:
+            context = FileContext(path)
+            futures.append(executor.submit(safe_extract_dependencies, context))
+            futures.append(executor.submit(safe_extract_prompts, context))
+        executor.flush()
+        return sum(1 for future in futures if future.result())
+
+
+def bench_executor(files: str = "300"):
+    """Пропускная способность экстракторов: пул потоков против пула процессов"""
+    temp_dir = tempfile.mkdtemp(prefix="parser_bench_")
+    try:
+        paths = create_python_corpus(temp_dir, int(files))
+        cpu_count = os.cpu_count() or 1
+        print(f"Файлов: {len(paths)}, ядер: {cpu_count}")
+        for workers in range(1, max(cpu_count, 2) + 1):
+            for backend in ('thread', 'process'):
+                elapsed = measure(lambda: run_extractors(paths, backend, workers), repeats=1)
+                print(f"  {backend:8} рабочих={workers}: {elapsed * 1000:.0f} мс, "
+                      f"{len(paths) / elapsed:.0f} файлов/с")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def is_parsable_python(path: str) -> bool:
+    """Файл читается как UTF-8 и разбирается ast.parse"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            ast.parse(f.read())
+        return True
+    except (SyntaxError, ValueError):
+        return False
+
+
+def legacy_python_extraction(path: str):
+    """Исходное извлечение: два обхода для зависимостей и отдельный разбор с astunparse для промптов"""
+    import astunparse
+
+    with open(path, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    libraries, functions = [], []
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            for name in getattr(node, 'names', []):
+                libraries.append(name.name)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.FunctionDef):
+            functions.append(node.name)
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+            functions.append(node.func.id)
+
+    with open(path, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    prompts = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            prompt_text = astunparse.unparse(node).strip().strip('\'"')
+            if is_likely_prompt(prompt_text):
+                prompts.add(' '.join(prompt_text.split()))
+    return set(libraries), set(functions), prompts
+
+
+def optimized_python_extraction(path: str):
+    """Извлечение через общий FileContext и один обход AST"""
+    context = FileContext(path)
+    dependencies = extract_python_dependencies(context)
+    prompts = extract_prompts_from_python(context)
+    return set(dependencies["libraries"]), set(dependencies["functions"]), prompts
+
+
+def bench_python_ast(source: str = "100"):
+    """Сравнение извлечения зависимостей и промптов из Python-файлов (директория или синтетический корпус)"""
+    temp_dir = tempfile.mkdtemp(prefix="parser_bench_")
+    try:
+        if os.path.isdir(source):
+            paths = [path for path in scan_project(source)['files_list'] if path.endswith('.py')]
+        else:
+            paths = create_python_corpus(temp_dir, int(source))
+        paths = [path for path in paths if is_parsable_python(path)]
+        size_mb = sum(os.path.getsize(path) for path in paths) / (1024 * 1024)
+        print(f"Файлов: {len(paths)}, {size_mb:.1f} МБ")
+
+        legacy = [legacy_python_extraction(path) for path in paths]
+        optimized = [optimized_python_extraction(path) for path in paths]
+        if [result[:2] for result in legacy] != [result[:2] for result in optimized]:
+            print("⚠️ Зависимости различаются")
+
+        print_comparison(
+            "Зависимости и промпты Python",
+            measure(lambda: [legacy_python_extraction(path) for path in paths], repeats=1),
+            measure(lambda: [optimized_python_extraction(path) for path in paths], repeats=1)
+        )
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+# Регулярные выражения, которые раньше применялись к файлам целиком (re.DOTALL)
+LEGACY_PROMPT_PATTERNS = [
+    r'system.*prompt.*["\']([^"\']{50,})["\']',
+    r'user.*prompt.*["\']([^"\']{30,})["\']',
+    r'["\'{3}](.*?(?:analyze|анализ|задача|instruction).*?)["\'{3}]',
+    r'["\'{3}](.*?(?:analyze|анализ|задача|ты|you are|assistant|system|user|instruction).*?)["\'{3}]',
+    r'f["\']([^"\']*(?:analyze|анализ|задача|ты|you are|assistant).*?)["\']',
+]
+
+# Враждебные входы: повторяемый фрагмент
+ADVERSARIAL_INPUTS = {
+    "system/prompt без длинных строк": 'system prompt "x" ',
+    "минифицированный JSON": '{"key":"value","n":1},',
+    "апострофы без пар": "it's user's prompt ",
+}
+
+
+def legacy_prompt_regex(content: str) -> int:
+    """Исходный поиск промптов регулярными выражениями"""
+    import re
+    return sum(len(re.findall(pattern, content, re.IGNORECASE | re.DOTALL)) for pattern in LEGACY_PROMPT_PATTERNS)
+
+
+def bench_adversarial():
+    """Время поиска промптов на враждебных входах растущего размера"""
+    for name, fragment in ADVERSARIAL_INPUTS.items():
+        print(f"{name}:")
+        for size_kb in (1, 2, 4):
+            content = fragment * (size_kb * 1024 // len(fragment))
+            legacy = measure(lambda: legacy_prompt_regex(content), repeats=1)
+            scanner = measure(lambda: extract_prompts_from_literals(content, 'javascript'), repeats=1)
+            print(f"  {size_kb:5} КБ: регулярные выражения {legacy * 1000:9.1f} мс, сканер {scanner * 1000:7.2f} мс")
+        # Сканер линеен, поэтому проверяется и на входах, недоступных регулярным выражениям
+        for size_kb in (1024, 8192):
+            content = fragment * (size_kb * 1024 // len(fragment))
+            scanner = measure(lambda: extract_prompts_from_literals(content, 'javascript'), repeats=1)
+            print(f"  {size_kb:5} КБ: сканер {scanner * 1000:7.1f} мс")
+
+
+def legacy_is_likely_prompt(text: str) -> bool:
+    """Исходная проверка промпта: отдельный поиск подстроки для каждого ключевого слова"""
+    if len(text) < 10:
+        return False
+    text_lower = text.lower()
+    prompt_keywords = [
+        'analyze', 'анализ', 'анализируй', 'проанализируй', 'задача', 'task', 'цель', 'goal',
+        'ты', 'you are', 'вы являетесь', 'assistant', 'ассистент', 'помощник', 'system', 'системный',
+        'user', 'пользователь', 'instruction', 'инструкция', 'prompt', 'промпт', 'template', 'шаблон',
+        'генерируй', 'generate', 'создай', 'create', 'опиши', 'describe', 'объясни', 'explain',
+        'сформируй', 'form'
+    ]
+    exclude_keywords = [
+        'import ', 'from ', 'class ', 'def ', 'return', 'print(', 'console.log', 'logger.',
+        'http://', 'https://', 'www.', '#!/', '#include', '/*', '*/',
+    ]
+    for exclude in exclude_keywords:
+        if exclude in text_lower:
+            return False
+    for keyword in prompt_keywords:
+        if keyword in text_lower:
+            return True
+    return ('{' in text and '}' in text) or any(word in text_lower for word in ['следующ', 'based on', 'на основе'])
+
+
+def bench_keywords(directory_path: Optional[str] = None):
+    """Пропускная способность is_likely_prompt на литералах реального кода (по умолчанию - стандартная библиотека)"""
+    directory_path = directory_path or os.path.dirname(os.__file__)
+    candidates = []
+    for path in scan_project(directory_path)['files_list'][:2000]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except (OSError, UnicodeDecodeError):
+            continue
+        candidates.extend(literal.text for literal in scan_string_literals(content, get_literal_syntax(path)))
+
+    mismatches = sum(1 for text in candidates if legacy_is_likely_prompt(text) != is_likely_prompt(text))
+    if mismatches:
+        print(f"⚠️ Результаты различаются для {mismatches} кандидатов")
+
+    lengths = sorted(len(text) for text in candidates)
+    print(f"Кандидатов: {len(candidates)}, медианная длина: {lengths[len(lengths) // 2] if lengths else 0}")
+    legacy = measure(lambda: [legacy_is_likely_prompt(text) for text in candidates])
+    optimized = measure(lambda: [is_likely_prompt(text) for text in candidates])
+    print_comparison("is_likely_prompt", legacy, optimized)
+    print(f"  кандидатов/с: {len(candidates) / legacy:,.0f} -> {len(candidates) / optimized:,.0f}")
+
+
+def create_text_pdf(path: str, pages: int = 300, lines_per_page: int = 40):
+    """Создание PDF с текстовыми страницами (минимальная структура без сторонних библиотек)"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_refs = []
+    for page in range(pages):
+        lines = [f"Section {page}.{line}: the system shall process request {line} and report status"
+                 for line in range(lines_per_page)]
+        stream = "BT /F1 9 Tf 40 800 Td 11 TL " + " ".join(f"({text}) '" for text in lines) + " ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream".encode('latin-1'))
+        content_id = len(objects)
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents {content_id} 0 R "
+                       f"/Resources << /Font << /F1 3 0 R >> >> >>".encode('latin-1'))
+        page_refs.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(page_refs)}] /Count {pages} >>".encode('latin-1')
+
+    with open(path, 'wb') as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(f"{number} 0 obj\n".encode('latin-1') + body + b"\nendobj\n")
+        xref_offset = f.tell()
+        f.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode('latin-1'))
+        for offset in offsets:
+            f.write(f"{offset:010d} 00000 n \n".encode('latin-1'))
+        f.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n"
+                .encode('latin-1'))
+
+
+def legacy_pdf_text(path: str, batch_size: int = 1000) -> str:
+    """Исходное извлечение текста PDF: новый разбор на каждый вызов и склейка через +="""
+    text = ""
+    for page in PyPDF2.PdfReader(path).pages:
+        page_text = page.extract_text() or ""
+        for i in range(0, len(page_text), batch_size):
+            text += page_text[i:i + batch_size] + "\n"
+    return text
+
+
+def bench_pdf(pages: str = "300"):
+    """Бенчмарк экстракторов PDF: четыре разбора документа против одного общего"""
+    root = tempfile.mkdtemp(prefix="bench_pdf_")
+    try:
+        path = os.path.join(root, "tender.pdf")
+        create_text_pdf(path, int(pages))
+        print(f"Документ: {pages} страниц, {os.path.getsize(path) // 1024} КБ")
+
+        def legacy():
+            # Требования, бизнес-требования, описание и промпты разбирали документ каждый сам
+            for _ in range(4):
+                legacy_pdf_text(path)
+
+        def optimized(workers: int):
+            configure_pdf_text_service(max_workers=workers)
+            context = FileContext(path)
+            load_requirements(context)
+            extract_business_requirements(context)
+            extract_project_description(context)
+            extract_prompts(context)
+
+        print_comparison("4 экстрактора PDF, последовательный разбор", measure(legacy, repeats=1),
+                         measure(lambda: optimized(1), repeats=1))
+        workers = os.cpu_count() or 1
+        if workers > 1:
+            print_comparison(f"Разбор страниц: 1 процесс против {workers}",
+                             measure(lambda: optimized(1), repeats=1), measure(lambda: optimized(workers), repeats=1))
+        else:
+            print("Доступен один CPU: параллельный разбор страниц не замеряется")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def create_docx(path: str, paragraphs: int = 20000):
+    """Создание DOCX с заголовками, параграфами и таблицами"""
+    doc = Document()
+    for index in range(paragraphs):
+        if index % 50 == 0:
+            doc.add_heading(f"Бизнес-требования, раздел {index // 50}", level=1)
+        doc.add_paragraph(f"Пункт {index}: система должна обработать запрос {index} и вернуть статус клиенту")
+        if index % 500 == 0:
+            table = doc.add_table(rows=5, cols=3)
+            for row in table.rows:
+                for column, cell in enumerate(row.cells):
+                    cell.text = f"Требование {index}.{column}"
+    doc.save(path)
+
+
+def legacy_docx_extractors(path: str):
+    """Исходные экстракторы DOCX: каждый открывает документ через python-docx заново"""
+    for _ in range(4):
+        doc = Document(path)
+        "\n".join(para.text for para in doc.paragraphs)
+        [para.style.name for para in doc.paragraphs]
+
+
+def bench_docx(paragraphs: str = "20000"):
+    """Бенчмарк экстракторов DOCX: четыре загрузки python-docx против одной модели документа"""
+    root = tempfile.mkdtemp(prefix="bench_docx_")
+    try:
+        path = os.path.join(root, "spec.docx")
+        create_docx(path, int(paragraphs))
+        with open(path, 'rb') as f:
+            data = f.read()
+        print(f"Документ: {paragraphs} параграфов, {len(data) // 1024} КБ")
+
+        def optimized():
+            context = FileContext(path)
+            load_requirements(context)
+            extract_business_requirements(context)
+            extract_project_description(context)
+            extract_prompts(context)
+
+        print_comparison("4 экстрактора DOCX", measure(lambda: legacy_docx_extractors(path), repeats=1),
+                         measure(optimized, repeats=1))
+
+        full = lambda: _read_with_python_docx(data)
+        streaming = lambda: load_docx_document(data)
+        print_comparison("Модель документа: python-docx против iterparse", measure(full, repeats=1), measure(streaming))
+        if full() != streaming():
+            print("⚠️ Результаты python-docx и iterparse различаются")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def create_requirement_matrix(path: str, rows: int = 200000):
+    """Создание матрицы требований Excel (два листа, потоковая запись)"""
+    workbook = Workbook(write_only=True)
+    for sheet_index in range(2):
+        sheet = workbook.create_sheet(f"Требования {sheet_index + 1}")
+        sheet.append(["ID", "Требование", "Роль", "Процесс", "Приоритет", "Комментарий"])
+        for row in range(rows // 2):
+            sheet.append([row, f"Система должна обработать запрос {row} и вернуть статус", "Аналитик",
+                          f"Процесс {row % 40}", row % 5, f"Комментарий к требованию {row}"])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+
+    # Excel всегда записывает размеры листа (<dimension>), потоковая запись openpyxl - нет;
+    # без них openpyxl при открытии просматривает лист целиком
+    dimension = f'<dimension ref="A1:F{rows // 2 + 1}"/>'.encode()
+    with zipfile.ZipFile(buffer) as source, zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as target:
+        for item in source.infolist():
+            content = source.read(item.filename)
+            if item.filename.startswith('xl/worksheets/sheet'):
+                content = content.replace(b'<sheetViews>', dimension + b'<sheetViews>', 1)
+            target.writestr(item, content)
+
+
+def legacy_excel_extractors(path: str):
+    """Исходные экстракторы Excel: каждый заново читает книгу целиком"""
+    xl_file = pd.ExcelFile(path)
+    for sheet_name in xl_file.sheet_names:
+        xl_file.parse(sheet_name)
+    pd.read_excel(path)
+    xl_file = pd.ExcelFile(path)
+    for sheet_name in xl_file.sheet_names:
+        xl_file.parse(sheet_name)
+    xl_file = pd.ExcelFile(path)
+    for sheet_name in xl_file.sheet_names:
+        pd.read_excel(path, sheet_name=sheet_name)
+
+
+def bench_excel(rows: str = "200000"):
+    """Бенчмарк экстракторов Excel: повторное полное чтение против одного чтения окон листов"""
+    root = tempfile.mkdtemp(prefix="bench_excel_")
+    try:
+        path = os.path.join(root, "matrix.xlsx")
+        create_requirement_matrix(path, int(rows))
+        print(f"Книга: {rows} строк, {os.path.getsize(path) / 2 ** 20:.1f} МБ")
+
+        def optimized():
+            context = FileContext(path)
+            load_requirements(context)
+            extract_business_requirements(context)
+            extract_prompts(context)
+            ContentExtractor.extract_business_entities(context)
+
+        print_comparison("4 экстрактора Excel", measure(lambda: legacy_excel_extractors(path), repeats=1),
+                         measure(optimized))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def create_requirements_csv(path: str, rows: int = 1000000):
+    """Создание CSV-выгрузки требований"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("id,requirement,business_process,owner,comment\n")
+        for row in range(rows):
+            f.write(f'{row},"Система должна обработать запрос {row}",Процесс {row % 40},Аналитик,"Комментарий {row}"\n')
+
+
+def legacy_csv_extractors(path: str):
+    """Исходные экстракторы CSV: каждый читает файл целиком и перебирает строки через iterrows"""
+    df = pd.read_csv(path, encoding='utf-8')
+    text = ""
+    for idx, row in df.iterrows():
+        text += f"Запись {idx + 1}:\n  requirement: {row['requirement']}\n\n"
+        if len(text) >= 1000:
+            break
+    df = pd.read_csv(path, encoding='utf-8')
+    for idx, row in df.iterrows():
+        text += f"Запись {idx + 1}:\n  business_process: {row['business_process']}\n\n"
+        if idx >= 100:
+            break
+    df = pd.read_csv(path)
+    [str(value) for value in df['requirement'].dropna()]
+    df = pd.read_csv(path, encoding='utf-8')
+    df['requirement'].dropna().astype(str).tolist()
+
+
+def bench_csv(rows: str = "1000000"):
+    """Бенчмарк экстракторов CSV: полное чтение против окна первых строк"""
+    root = tempfile.mkdtemp(prefix="bench_csv_")
+    try:
+        path = os.path.join(root, "export.csv")
+        create_requirements_csv(path, int(rows))
+        print(f"CSV: {rows} строк, {os.path.getsize(path) / 2 ** 20:.1f} МБ")
+
+        def optimized():
+            context = FileContext(path)
+            load_requirements(context)
+            extract_business_requirements(context)
+            extract_prompts_from_spreadsheet(context)
+            ContentExtractor.extract_business_entities(context)
+
+        print_comparison("4 экстрактора CSV", measure(lambda: legacy_csv_extractors(path), repeats=1),
+                         measure(optimized))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def legacy_batched_text(content: str, batch_size: int = 1000) -> str:
+    """Исходная батчевая обработка загрузчиков: перевод строки после каждых batch_size символов"""
+    text = ""
+    for i in range(0, len(content), batch_size):
+        text += content[i:i + batch_size] + "\n"
+    return text
+
+
+def legacy_chunk_text(text: str, chunk_size: int = 80000, overlap: float = 0.2) -> List[str]:
+    """Исходный чанкинг общей строки контента"""
+    chunks = []
+    overlap_size = int(chunk_size * overlap)
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_size, len(text))
+        chunks.append(text[start:end])
+        start += chunk_size - overlap_size
+    return chunks
+
+
+def bench_segments(megabytes: str = "20"):
+    """Бенчмарк загрузки большого текста и чанкинга для LLM"""
+    line = "Система должна обработать запрос пользователя и вернуть статус выполнения.\n"
+    content = line * (int(float(megabytes) * 2 ** 20) // len(line.encode('utf-8')))
+    sections = [(f"Раздел {index}", content) for index in range(4)]
+    print(f"Текст: 4 раздела по {len(content):,} символов")
+
+    def legacy():
+        all_content = "".join(legacy_batched_text(text) for _, text in sections)
+        return legacy_chunk_text(all_content)
+
+    def optimized():
+        return list(chunk_segments(iter_sections(sections)))
+
+    print_comparison("Загрузка и чанкинг", measure(legacy), measure(optimized))
+    legacy_broken = sum(1 for chunk in legacy()[:-1] if chunk[-1].isalnum())
+    optimized_broken = sum(1 for chunk in optimized()[:-1] if chunk[-1].isalnum())
+    print(f"  чанков, обрезанных посреди слова: {legacy_broken} -> {optimized_broken}")
+
+
+def create_markdown(path: str, sections: int = 2000):
+    """Создание README с вложенными секциями, списками и блоками кода"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("Краткое описание проекта.\n\n")
+        for section in range(sections):
+            title = ("Описание", "Требования", "Installation", "Usage", "Архитектура")[section % 5]
+            f.write(f"## {title} {section}\n\nСистема должна обработать **запрос** {section} и вернуть статус.\n\n")
+            f.write(f"- пункт {section}\n- [ссылка](https://example.com/{section})\n\n")
+            f.write(f"### Пример {section}\n\n```python\n# не заголовок\nprint({section})\n```\n\n")
+
+
+def legacy_markdown_extractors(path: str) -> str:
+    """Исходные экстракторы Markdown: HTML всего файла и два разбиения по строкам '#'"""
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    headers = re.findall(r'^#{1,6}\s+(.*)', content, re.MULTILINE)
+    parsed = f"MD Headers: {', '.join(headers)}\n\n{markdown.markdown(content)}"
+    for _ in range(2):
+        sections, heading, body = [], None, []
+        for line in content.split('\n'):
+            if line.startswith('#'):
+                sections.append((heading, body))
+                heading, body = line, []
+            else:
+                body.append(line)
+        sections.append((heading, body))
+        ["".join(line + "\n" for line in body) for heading, body in sections]
+    return parsed
+
+
+def bench_markdown(sections: str = "2000"):
+    """Бенчмарк экстракторов Markdown: конвертация в HTML против структурного индекса"""
+    root = tempfile.mkdtemp(prefix="bench_markdown_")
+    try:
+        path = os.path.join(root, "README.md")
+        create_markdown(path, int(sections))
+        print(f"Markdown: {sections} секций, {os.path.getsize(path) / 2 ** 20:.1f} МБ")
+
+        def optimized():
+            context = FileContext(path)
+            load_requirements(context)
+            extract_business_requirements(context)
+            extract_project_description(context)
+
+        print_comparison("3 экстрактора Markdown", measure(lambda: legacy_markdown_extractors(path)),
+                         measure(optimized))
+        legacy_size = len(legacy_markdown_extractors(path))
+        optimized_size = len(load_requirements(FileContext(path)))
+        print(f"  вход LLM из load_requirements: {legacy_size:,} -> {optimized_size:,} символов")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def create_bpmn(path: str, megabytes: float = 100):
+    """Создание выгрузки BPMN: процессы с задачами, шлюзами, дорожками и документацией"""
+    target = int(megabytes * 2 ** 20)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<definitions xmlns="http://www.omg.org/spec/BPMN/20100524/MODEL" id="export">\n')
+        process = 0
+        while f.tell() < target:
+            f.write(f'  <process id="p{process}" name="Процесс {process}">\n'
+                    f'    <laneSet><lane id="l{process}" name="Отдел {process % 50}"/></laneSet>\n')
+            for task in range(50):
+                f.write(f'    <userTask id="t{process}_{task}" name="Задача {task}">'
+                        f'<documentation>Проверить заявку {process}-{task}</documentation></userTask>\n'
+                        f'    <exclusiveGateway id="g{process}_{task}" name="Решение {task % 7}"/>\n'
+                        f'    <sequenceFlow id="f{process}_{task}" sourceRef="t{process}_{task}" '
+                        f'targetRef="g{process}_{task}"/>\n')
+            f.write('  </process>\n')
+            process += 1
+        f.write('</definitions>\n')
+
+
+def legacy_smart_parse_bpmn(path: str) -> str:
+    """Исходный разбор BPMN: чтение файла целиком и дерево через ET.fromstring"""
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    root = ET.fromstring(content)
+    text = ET.tostring(root, encoding='unicode', method='text')
+    processes = [elem.attrib.get('name', '') for elem in root.findall('.//{*}process')]
+    tasks = [elem.attrib.get('name', '') for elem in root.findall('.//{*}task')]
+    text += f"\nBPMN Processes: {', '.join(processes)}\nTasks: {', '.join(tasks)}"
+    return text
+
+
+def peak_memory(func: Callable) -> float:
+    """Пик памяти Python-объектов при выполнении функции (в МБ)"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        tracemalloc.stop()
+
+
+def bench_markup(megabytes: str = "100"):
+    """Бенчмарк разбора BPMN: полное дерево против потокового разбора"""
+    root = tempfile.mkdtemp(prefix="bench_markup_")
+    try:
+        path = os.path.join(root, "export.bpmn")
+        create_bpmn(path, float(megabytes))
+        print(f"BPMN: {os.path.getsize(path) / 2 ** 20:.1f} МБ")
+
+        def optimized():
+            context = FileContext(path)
+            load_requirements(context)
+            extract_business_requirements(context)
+
+        print_comparison("Разбор BPMN", measure(lambda: legacy_smart_parse_bpmn(path), repeats=1),
+                         measure(optimized, repeats=1))
+        print(f"  пик памяти: {peak_memory(lambda: legacy_smart_parse_bpmn(path)):.0f} МБ -> "
+              f"{peak_memory(optimized):.0f} МБ")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def create_prompt_catalog(path: str, megabytes: float = 200):
+    """Создание каталога агентов JSON: системные промпты, сообщения и метаданные"""
+    target = int(megabytes * 2 ** 20)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{"version": 3, "agents": [\n')
+        agent = 0
+        while f.tell() < target:
+            if agent:
+                f.write(',\n')
+            f.write(json.dumps({
+                "id": agent, "name": f"agent-{agent}", "tags": ["support", "ru", agent % 10], "temperature": 0.2,
+                "system": f"You are assistant {agent}. Analyze the user request and create a step by step plan.",
+                "messages": [{"role": "user", "content": f"Describe task {agent} and return the result as JSON"}],
+                "meta": {"owner": "Команда сопровождения", "description": "Сервисный агент обработки заявок " * 4},
+            }, ensure_ascii=False))
+            agent += 1
+        f.write('\n]}\n')
+
+
+def legacy_structured_prompts(path: str) -> set:
+    """Исходный поиск промптов JSON: чтение файла целиком и разбор всех строковых литералов"""
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    return extract_prompts_from_literals(content, 'generic')
+
+
+def bench_structured(megabytes: str = "200"):
+    """Бенчмарк извлечения промптов из большого каталога JSON"""
+    root = tempfile.mkdtemp(prefix="bench_structured_")
+    try:
+        path = os.path.join(root, "agents.json")
+        create_prompt_catalog(path, float(megabytes))
+        print(f"JSON: {os.path.getsize(path) / 2 ** 20:.1f} МБ")
+
+        def optimized():
+            return extract_prompts(FileContext(path))
+
+        print_comparison("Промпты каталога JSON", measure(lambda: legacy_structured_prompts(path), repeats=1),
+                         measure(optimized, repeats=1))
+        print(f"  пик памяти: {peak_memory(lambda: legacy_structured_prompts(path)):.0f} МБ -> "
+              f"{peak_memory(optimized):.0f} МБ (с накопленными промптами)")
+
+        def stream_only():
+            with open(path, 'rb') as stream:
+                return sum(1 for _ in iter_json_prompts(stream))
+
+        print(f"  пик памяти потокового обхода без накопления: {peak_memory(stream_only):.1f} МБ, "
+              f"промптов с путями ключей: {stream_only():,}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def create_notebook(path: str, megabytes: float = 50, cells: int = 200):
+    """Создание ноутбука: ячейки кода с промптами и выводами-изображениями, ячейки Markdown"""
+    image = base64.b64encode(os.urandom(int(megabytes * 2 ** 20 * 0.75) // cells)).decode('ascii')
+    notebook_cells = []
+    for cell in range(cells):
+        notebook_cells.append({"cell_type": "markdown", "metadata": {}, "source": [
+            f"## Шаг {cell}\n", f"Требования: система должна обработать запрос {cell} пользователя.\n"]})
+        notebook_cells.append({
+            "cell_type": "code", "execution_count": cell, "metadata": {},
+            "outputs": [{"output_type": "display_data", "metadata": {},
+                         "data": {"image/png": image, "text/plain": ["<Figure size 640x480>"]}}],
+            "source": ["%matplotlib inline\n", "import pandas as pd\n", "from langchain.prompts import PromptTemplate\n",
+                       f"PROMPT_{cell} = \"You are an assistant. Analyze the user request {cell} and create a plan\"\n",
+                       f"def step_{cell}(df):\n", f"    return PromptTemplate.from_template(PROMPT_{cell})\n"]})
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"cells": notebook_cells, "metadata": {"kernelspec": {"language": "python", "name": "python3"}},
+                   "nbformat": 4, "nbformat_minor": 5}, f, indent=1)
+
+
+def legacy_notebook_as_text(path: str):
+    """Ноутбук как обычный текстовый файл: чтение целиком и поиск по литералам вместе с выводами"""
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    extract_prompts_from_literals(content, 'generic')
+    return content
+
+
+def bench_notebook(megabytes: str = "50"):
+    """Бенчмарк ноутбука с большими выводами ячеек"""
+    root = tempfile.mkdtemp(prefix="bench_notebook_")
+    try:
+        path = os.path.join(root, "agent.ipynb")
+        create_notebook(path, float(megabytes))
+        source_size = sum(len(cell.source) for cell in FileContext(path).notebook.cells)
+        print(f"Ноутбук: {os.path.getsize(path) / 2 ** 20:.1f} МБ, исходный текст ячеек {source_size / 1024:.0f} КБ")
+
+        def optimized():
+            context = FileContext(path)
+            extract_dependencies(context)
+            extract_prompts(context)
+            load_requirements(context)
+            extract_business_requirements(context)
+
+        print_comparison("Экстракторы ноутбука", measure(lambda: legacy_notebook_as_text(path), repeats=1),
+                         measure(optimized, repeats=1))
+        print(f"  пик памяти: {peak_memory(lambda: legacy_notebook_as_text(path)):.0f} МБ -> "
+              f"{peak_memory(optimized):.1f} МБ")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def create_generated_module(path: str, megabytes: float = 20):
+    """Создание сгенерированного модуля: сериализованный дескриптор, классы сообщений и вшитые промпты"""
+    descriptor = ''.join(f'\\x{byte:02x}' for byte in os.urandom(4096))
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("from google.protobuf import descriptor as _descriptor\n"
+                "from google.protobuf import symbol_database as _symbol_database\n"
+                "import json\n\n")
+        block = 0
+        while f.tell() < megabytes * 2 ** 20:
+            f.write(f"DESCRIPTOR_{block} = _descriptor.AddSerializedFile(b'{descriptor}')\n\n"
+                    f"class Message{block}(object):\n"
+                    f"    FIELDS = [{', '.join(repr(f'field_{block}_{index}') for index in range(50))}]\n\n"
+                    f"    def serialize_{block}(self, value):\n"
+                    f"        return json.dumps(build_payload(value, 'message_{block}'))\n\n"
+                    f"PROMPT_{block} = (\"You are an assistant. Analyze the generated message {block} \"\n"
+                    f"                \"and describe the task in detail\")\n\n")
+            block += 1
+
+
+def bench_python_lexer(megabytes: str = "20"):
+    """Бенчмарк сгенерированного Python-модуля: AST против лексера, включая модуль с синтаксической ошибкой"""
+    root = tempfile.mkdtemp(prefix="bench_python_lexer_")
+    try:
+        path = os.path.join(root, "messages_pb2.py")
+        create_generated_module(path, float(megabytes))
+        print(f"Модуль: {os.path.getsize(path) / 2 ** 20:.1f} МБ")
+
+        def run(limit_mb: float):
+            configure_python_ast_limit(limit_mb)
+            context = FileContext(path)
+            return extract_python_dependencies(context), extract_prompts_from_python(context)
+
+        # Порог больше модуля - всегда ast.parse, нулевой порог - всегда лексер
+        ast_limit = float(megabytes) * 2
+        try:
+            ast_result = run(ast_limit)
+            lexer_result = run(0)
+            if ast_result != lexer_result:
+                print("⚠️ Результаты AST и лексера различаются")
+            print_comparison("Зависимости и промпты сгенерированного модуля",
+                             measure(lambda: run(ast_limit), repeats=1), measure(lambda: run(0), repeats=1))
+            print(f"  пик памяти: {peak_memory(lambda: run(ast_limit)):.0f} МБ -> {peak_memory(lambda: run(0)):.1f} МБ")
+
+            # Синтаксическая ошибка в середине модуля: раньше извлекалось пусто
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write("def broken(:\n    pass\n")
+            dependencies, prompts = run(PYTHON_AST_MAX_SIZE_MB)
+            print(f"  модуль с синтаксической ошибкой: библиотек {len(dependencies['libraries'])}, "
+                  f"функций {len(dependencies['functions'])}, промптов {len(prompts)}")
+        finally:
+            configure_python_ast_limit(PYTHON_AST_MAX_SIZE_MB)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def create_java_class(index: int, methods: int = 40) -> str:
+    """Исходный текст класса сервиса в стиле корпоративного кода"""
+    lines = [
+        f"package com.example.service{index % 10};",
+        "",
+        "import java.util.*;",
+        "import java.util.stream.Collectors;",
+        "import org.springframework.stereotype.Service;",
+        f"import com.example.model.Order{index};",
+        "import static org.junit.Assert.assertEquals;",
+        "",
+        "/**",
+        f" * Сервис заказов {index}: process() вызывается планировщиком",
+        " */",
+        "@Service",
+        f"public class OrderService{index} extends BaseService implements Processor<Order{index}> {{",
+        f"    private static final String SYSTEM_PROMPT = \"You are an assistant. Analyze the order {index} "
+        "and describe the task\";",
+        "    private final Map<String, List<Integer>> cache = new HashMap<>();",
+        "",
+        f"    public OrderService{index}(Repository repository) {{",
+        "        super(repository);",
+        "        init(repository);",
+        "    }",
+    ]
+    for method in range(methods):
+        lines.extend([
+            "",
+            "    @Override",
+            f"    public List<String> process{method}(Order{index} order, int limit) throws ServiceException {{",
+            "        if (order == null) {",
+            f"            throw new IllegalArgumentException(\"order {method} is required\");",
+            "        }",
+            "        List<String> names = order.getItems().stream()",
+            "            .filter(item -> item.getPrice() > limit)",
+            "            .map(item -> item.getName().trim())",
+            "            .collect(Collectors.toList());",
+            f"        log.info(\"Processed \" + names.size() + \" items in step {method}\");",
+            f"        validate{method}(names, cache.get(order.getId()));",
+            "        return names;",
+            "    }",
+        ])
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def legacy_java_extraction(content: str):
+    """Исходное извлечение: полное дерево javalang для зависимостей и отдельный поиск литералов"""
+    import javalang
+    tree = javalang.parse.parse(content)
+    libraries = [import_decl.path for import_decl in tree.imports]
+    functions = []
+    for _, node in tree:
+        if isinstance(node, javalang.tree.MethodDeclaration):
+            functions.append(node.name)
+        elif isinstance(node, javalang.tree.MethodInvocation) and node.member:
+            functions.append(node.member)
+    prompts = extract_prompts_from_literals(content, 'java')
+    return set(libraries), set(functions), prompts
+
+
+def bench_java(classes: str = "50"):
+    """Бенчмарк Java: дерево javalang против лексического прохода, общего для зависимостей и промптов"""
+    root = tempfile.mkdtemp(prefix="bench_java_")
+    try:
+        paths = []
+        for index in range(int(classes)):
+            path = os.path.join(root, f"OrderService{index}.java")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(create_java_class(index))
+            paths.append(path)
+        contents = []
+        for path in paths:
+            with open(path, 'r', encoding='utf-8') as f:
+                contents.append(f.read())
+        print(f"Классов: {len(paths)}, {sum(map(len, contents)) / 2 ** 20:.1f} МБ")
+
+        def optimized():
+            results = []
+            for path in paths:
+                context = FileContext(path)
+                dependencies = extract_dependencies(context)
+                results.append((set(dependencies["libraries"]), set(dependencies["functions"]),
+                                set(extract_prompts(context))))
+            return results
+
+        configure_java_analysis_service()
+        legacy_results = [legacy_java_extraction(content) for content in contents]
+        optimized_results = optimized()
+        mismatched = sum(1 for legacy, new in zip(legacy_results, optimized_results) if legacy != new)
+        print(f"Файлов с расхождениями против javalang: {mismatched}")
+
+        configure_java_analysis_service()
+        print_comparison("Зависимости и промпты Java",
+                         measure(lambda: [legacy_java_extraction(content) for content in contents], repeats=1),
+                         measure(lambda: (configure_java_analysis_service(), optimized()), repeats=1))
+        # Повторный анализ тех же файлов (дубликаты, общие модули) берется по хэшу содержимого
+        print(f"  повторный проход с общей службой: {measure(optimized, repeats=1) * 1000:.1f} мс")
+    finally:
+        configure_java_analysis_service()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def create_cpp_module(index: int, modules: int, functions: int = 60) -> Dict[str, str]:
+    """Заголовок с макросами и реализация модуля: включения соседних модулей, комментарии и строки со скобками"""
+    header = [
+        f"#ifndef MODULE{index}_H",
+        f"#define MODULE{index}_H",
+        "#include <vector>",
+        "#include <string>",
+        f'#include "module{(index + 1) % modules}.h"',
+        "",
+        f"#define CHECK_{index}(x) do {{ if (!(x)) {{ report(#x); }} }} while (0)",
+        "#define EXPORT_API __attribute__((visibility(\"default\")))",
+        "",
+        f"namespace project{index % 5} {{",
+        f"class Module{index} {{",
+        "public:",
+    ]
+    source = [
+        f'#include "module{index}.h"',
+        f'#include "module{(index * 7) % modules}.h"',
+        "#include <stdio.h>",
+        "",
+        "/* Таблица обработчиков: { handler(arg) { ... } } */",
+        f"namespace project{index % 5} {{",
+    ]
+    for function in range(functions):
+        header.append(f"    EXPORT_API int handle{function}(const std::vector<int>& items, int limit) const;")
+        source.extend([
+            f"// handle{function}(items) {{ legacy }}",
+            f"int Module{index}::handle{function}(const std::vector<int>& items, int limit) const {{",
+            f"    CHECK_{index}(limit > 0);",
+            "    for (int item : items) {",
+            "        if (item > limit) {",
+            f'            printf("You are an assistant. Analyze item %d of step {function} and describe the task"',
+            '                   " (value: %d)\\n", item, limit);',
+            "        }",
+            "    }",
+            f"    return static_cast<int>(items.size()) + {function};",
+            "}",
+            "",
+        ])
+    header.extend(["};", "}", "#endif"])
+    source.append("}")
+    return {f"module{index}.h": "\n".join(header) + "\n", f"module{index}.cpp": "\n".join(source) + "\n"}
+
+
+def legacy_cpp_extraction(content: str):
+    """Исходное извлечение: регулярные выражения по тексту с комментариями и поиск литералов"""
+    libraries = set(re.findall(r"#include\s+[<\"](.*?)[\">]", content))
+    functions = set(re.findall(r"(\w+)\s*\([^)]*\)\s*\{", content))
+    prompts = extract_prompts_from_literals(content, get_literal_syntax('module.cpp'))
+    return libraries, functions, prompts
+
+
+def bench_cpp(modules: str = "100"):
+    """Бенчмарк C/C++: регулярные выражения против лексического прохода и построение графа включений"""
+    root = tempfile.mkdtemp(prefix="bench_cpp_")
+    try:
+        paths = []
+        for index in range(int(modules)):
+            for name, content in create_cpp_module(index, int(modules)).items():
+                path = os.path.join(root, name)
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(content)
+                paths.append(path)
+        contents = []
+        for path in paths:
+            with open(path, 'r', encoding='utf-8') as f:
+                contents.append(f.read())
+        print(f"Файлов: {len(paths)}, {sum(map(len, contents)) / 2 ** 20:.1f} МБ")
+
+        def optimized():
+            return [(dependencies["libraries"], dependencies["functions"], extract_prompts(context))
+                    for context in map(FileContext, paths)
+                    for dependencies in (extract_dependencies(context),)]
+
+        legacy_results = [legacy_cpp_extraction(content) for content in contents]
+        optimized_results = optimized()
+        print(f"Функций: regex {sum(len(result[1]) for result in legacy_results)}, "
+              f"лексер {sum(len(result[1]) for result in optimized_results)} "
+              f"(regex считает if/for и вызовы из комментариев)")
+        print(f"Промптов: literals {sum(len(result[2]) for result in legacy_results)}, "
+              f"лексер {sum(len(result[2]) for result in optimized_results)} (соседние литералы склеиваются)")
+
+        print_comparison("Зависимости и промпты C/C++",
+                         measure(lambda: [legacy_cpp_extraction(content) for content in contents], repeats=1),
+                         measure(optimized, repeats=1))
+
+        # Сгенерированный заголовок со встроенным ресурсом: регулярное выражение функций квадратично по длине слова
+        resource = base64.b64encode(bytes(range(256)) * 24).decode().replace('+', 'A').replace('/', 'B')
+        resource_path = os.path.join(root, "resource.h")
+        with open(resource_path, 'w', encoding='utf-8') as f:
+            f.write(f'static const char kResource[] = "{resource}";\n')
+        print_comparison(f"Заголовок со встроенным ресурсом ({len(resource) // 1024} КБ в одной строке)",
+                         measure(lambda: legacy_cpp_extraction(f'static const char kResource[] = "{resource}";\n'),
+                                 repeats=1),
+                         measure(lambda: extract_dependencies(FileContext(resource_path)), repeats=1))
+
+        includes = {path: [include.target for include in lex_c_symbols(content).includes]
+                    for path, content in zip(paths, contents)}
+        graph = build_include_graph(includes, paths)
+        closure = [len(node["transitive"]) for node in graph.values() if "transitive" in node]
+        print(f"Граф включений: {measure(lambda: build_include_graph(includes, paths)) * 1000:.1f} мс, "
+              f"единиц трансляции {len(closure)}, заголовков в замыкании в среднем {sum(closure) / len(closure):.1f}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def legacy_encoding_reads(path: str, readers: int = 3) -> str:
+    """
+    Исходная схема: chardet по первым 10 КБ для метаданных, затем каждый читатель пробует UTF-8
+    и при ошибке перечитывает файл целиком в cp1251
+    """
+    import chardet
+    with open(path, 'rb') as f:
+        chardet.detect(f.read(10000))
+    text = ''
+    for _ in range(readers):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+        except UnicodeDecodeError:
+            with open(path, 'r', encoding='cp1251') as f:
+                text = f.read()
+    return text
+
+
+def bench_encoding(files: str = "200"):
+    """Бенчмарк кодировок: определение в каждом читателе против одного определения при обходе"""
+    root = tempfile.mkdtemp(prefix="bench_encoding_")
+    try:
+        paragraph = "Требования к системе: пользователь с ролью аналитика формирует отчет по процессу. "
+        paths = []
+        for index in range(int(files)):
+            path = os.path.join(root, f"requirements{index}.txt")
+            with open(path, 'wb') as f:
+                f.write((paragraph * 600).encode('utf-8' if index % 2 else 'cp1251'))
+            paths.append(path)
+        print(f"Файлов: {len(paths)} (половина в cp1251)")
+
+        def optimized(readers: int = 3):
+            texts = []
+            encodings = {path: sniff_file_encoding(path) for path in paths}
+            for path in paths:
+                context = FileContext(path, encoding=encodings[path])
+                for _ in range(readers):
+                    text = context.text
+                texts.append(text)
+            return texts
+
+        legacy_texts = [legacy_encoding_reads(path) for path in paths]
+        print(f"Тексты совпадают: {legacy_texts == optimized()}")
+
+        # Короткие файлы cp1251 (CSV и TXT) должны декодироваться без искажений
+        csv_text = "id;требование\n1;Система должна\n"
+        txt_text = "Промпт: ваша задача analyze this"
+        csv_data, txt_data = csv_text.encode('cp1251'), txt_text.encode('cp1251')
+        csv_frame = read_csv_window(csv_data, row_limit=10).frame
+        round_trip = (csv_data.decode(detect_encoding(csv_data)) == csv_text
+                      and txt_data.decode(detect_encoding(txt_data)) == txt_text
+                      and list(csv_frame.columns) == ["id;требование"]
+                      and csv_frame.iloc[0, 0] == "1;Система должна")
+        print(f"Короткие CSV и TXT в cp1251 декодируются без искажений: {round_trip}")
+        print_comparison("Определение кодировки и чтение тремя читателями",
+                         measure(lambda: [legacy_encoding_reads(path) for path in paths]),
+                         measure(optimized))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def bench_llm_map(chunks: str = "10", concurrency: str = "4", latency: str = "0.3"):
+    """Бенчмарк map-фазы LLM: имитация запроса с задержкой, последовательная обработка против batch"""
+    from langchain_core.runnables import RunnableLambda
+    # project_parser загружает .env при импорте, поэтому импортируется только здесь
+    from project_parser import analyze_chunks
+
+    def fake_llm(request: Dict[str, str]) -> str:
+        time.sleep(float(latency))
+        if request["content"].endswith("7"):
+            raise RuntimeError("таймаут")
+        return f"анализ: {request['content']}"
+
+    chain = RunnableLambda(fake_llm)
+    inputs = [f"чанк {index}" for index in range(int(chunks))]
+    sequential = analyze_chunks(chain, inputs, 1)
+    concurrent = analyze_chunks(chain, inputs, int(concurrency))
+    print(f"Чанков: {len(inputs)}, задержка запроса {float(latency) * 1000:.0f} мс, "
+          f"результаты и порядок совпадают: {sequential == concurrent}")
+    print_comparison(f"Анализ чанков (одновременно до {concurrency})",
+                     measure(lambda: analyze_chunks(chain, inputs, 1), repeats=1),
+                     measure(lambda: analyze_chunks(chain, inputs, int(concurrency)), repeats=1))
+
+
+def bench_llm_reduce(analyses: str = "40", fan_in: str = "4", context_tokens: str = "8192"):
+    """Бенчмарк суммаризации: один запрос со всеми анализами против дерева запросов в пределах контекста"""
+    from langchain_core.runnables import RunnableLambda
+    from extraction_cache import open_extraction_cache
+    from project_parser import ANALYSIS_SEPARATOR, CHARS_PER_TOKEN, reduce_analyses
+
+    max_chars = int(context_tokens) * CHARS_PER_TOKEN // 2
+    requests = []
+
+    def fake_llm(request: Dict[str, str]) -> str:
+        # Задержка растет с длиной запроса; запрос больше контекста модели отклоняется
+        text = request["analyses"]
+        requests.append(len(text))
+        if len(text) > int(context_tokens) * CHARS_PER_TOKEN:
+            raise ValueError(f"запрос {len(text)} символов превышает контекст модели")
+        time.sleep(0.05 + len(text) / 200000)
+        return f"Сводка {len(requests)}: " + text[:1500]
+
+    chain = RunnableLambda(fake_llm)
+    inputs = [f"Анализ чанка {index}: архитектура, зависимости и промпты. " * 40 for index in range(int(analyses))]
+    print(f"Анализов: {len(inputs)}, {sum(map(len, inputs)) / 1024:.0f} КБ, бюджет запроса {max_chars} символов")
+
+    try:
+        chain.invoke({"analyses": ANALYSIS_SEPARATOR.join(inputs)})
+        print("Один запрос: выполнен")
+    except ValueError as e:
+        print(f"Один запрос: ошибка - {e}")
+
+    root = tempfile.mkdtemp(prefix="bench_llm_reduce_")
+    try:
+        for concurrency in (1, 4):
+            requests.clear()
+            # Отдельный кэш на каждый замер: уровни дерева запрашиваются заново
+            cache = open_extraction_cache(os.path.join(root, f"cache{concurrency}.sqlite"), 64)
+            elapsed = measure(lambda: reduce_analyses(chain, inputs, int(fan_in), max_chars, concurrency, cache),
+                              repeats=1)
+            print(f"Дерево, одновременно до {concurrency}: {elapsed * 1000:.1f} мс, запросов {len(requests)}, "
+                  f"наибольший {max(requests)} символов")
+        requests.clear()
+        elapsed = measure(lambda: reduce_analyses(chain, inputs, int(fan_in), max_chars, 4, cache), repeats=1)
+        print(f"Повторный запуск с кэшем уровней: {elapsed * 1000:.1f} мс, запросов {len(requests)}")
+        cache.close()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+BENCHMARKS = {
+    "discovery": bench_discovery,
+    "executor": bench_executor,
+    "python_ast": bench_python_ast,
+    "adversarial": bench_adversarial,
+    "keywords": bench_keywords,
+    "pdf": bench_pdf,
+    "docx": bench_docx,
+    "excel": bench_excel,
+    "csv": bench_csv,
+    "segments": bench_segments,
+    "markdown": bench_markdown,
+    "markup": bench_markup,
+    "structured": bench_structured,
+    "notebook": bench_notebook,
+    "python_lexer": bench_python_lexer,
+    "java": bench_java,
+    "cpp": bench_cpp,
+    "encoding": bench_encoding,
+    "llm_map": bench_llm_map,
+    "llm_reduce": bench_llm_reduce,
+}
+
+
+def main(args: List[str]):
+    name = args[0] if args else "discovery"
+    if name not in BENCHMARKS:
+        print(f"Неизвестный бенчмарк: {name}. Доступны: {', '.join(BENCHMARKS)}")
+        return
+
+    BENCHMARKS[name](*args[1:])
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,305 @@
+"""
+Лексический анализ C/C++ и граф включений
+
+Исходный текст разбирается за один проход одним регулярным выражением:
+комментарии пропускаются, строковые литералы (включая raw-строки C++11 и
+префиксы u8/L/u/U) и директивы препроцессора выделяются целиком, поэтому
+скобки и ключевые слова внутри них не учитываются. Из токенов собираются
+цели #include, определения функций (имя, скобки параметров и тело в области
+файла, пространства имен или класса - вызовы и if/for/while внутри тел не
+считаются) и строковые литералы (соседние литералы склеиваются, как в C).
+
+Граф включений строится по целям #include всех файлов проекта: цель ищется
+сначала относительно каталога включающего файла, затем по окончанию пути
+среди файлов проекта. Для единиц трансляции (.c, .cpp) считается
+транзитивное замыкание включенных заголовков проекта.
+"""
+
+import os
+import re
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+# Расширения исходных файлов C/C++ и единиц трансляции
+C_EXTENSIONS = frozenset({'.c', '.cpp', '.h', '.hpp'})
+TRANSLATION_UNIT_EXTENSIONS = frozenset({'.c', '.cpp'})
+
+# Токен C/C++: комментарий, директива препроцессора (с продолжениями строк), имя (не префикс литерала),
+# raw-строка, строка, символ, число или знак (-> и :: - один знак)
+_C_TOKEN = re.compile(
+    r'(?P<comment>//[^\n]*|/\*[\s\S]*?\*/)'
+    r'|(?P<directive>^[ \t]*#(?:[^\n\\]|\\[\s\S])*)'
+    r'|(?P<name>[A-Za-z_]\w*(?![\w"\']))'
+    r'|(?P<raw>(?:u8|[uUL])?R"(?P<delimiter>[^()\\\s"]{0,16})\((?P<raw_body>[\s\S]*?)\)(?P=delimiter)")'
+    r'|(?P<string>(?:u8|[uUL])?"(?:[^"\\\n]|\\[\s\S])*")'
+    r'|(?P<char>(?:u8|[uUL])?\'(?:[^\'\\\n]|\\.)*\')'
+    r'|(?P<number>\.?\d(?:[\w.]|\'(?=\w))*)'
+    r'|(?P<punct>->|::|[^\s\w])',
+    re.MULTILINE)
+
+# Значимые внутри тел функций позиции: скобки, начала литералов и комментариев, директивы
+_C_BODY_STOP = re.compile(r'[{}"\']|/[/*]|^[ \t]*#', re.MULTILINE)
+
+# Промежуток между соседними строковыми литералами: пробелы и комментарии
+_C_STRING_GAP = re.compile(r'(?:\s+|//[^\n]*|/\*[\s\S]*?\*/)*')
+
+# Префиксы строковых и символьных литералов (R - raw-строка)
+_C_LITERAL_PREFIXES = frozenset({'u8', 'u', 'U', 'L', 'R', 'u8R', 'uR', 'UR', 'LR'})
+
+_INCLUDE = re.compile(r'#\s*include(?:_next)?\s*([<"])([^>"\n]+)[>"]')
+
+# Слова, после которых '(' не начинает определение функции
+_C_KEYWORDS = frozenset({
+    'if', 'for', 'while', 'switch', 'return', 'sizeof', 'alignof', 'decltype', 'catch', 'do', 'else',
+    'case', 'goto', 'new', 'delete', 'throw', 'static_assert', 'typeof', '__attribute__', '__declspec',
+    'alignas', 'noexcept', 'operator', 'defined', 'asm', '__asm__',
+})
+
+# Спецификаторы после списка параметров, допустимые перед телом функции
+_C_FUNCTION_QUALIFIERS = frozenset({
+    'const', 'volatile', 'noexcept', 'override', 'final', 'throw', 'mutable', 'try', '&', '&&',
+})
+
+# Знаки между списком параметров и телом (noexcept(...), завершающий тип возврата)
+_C_SIGNATURE_PUNCTUATION = frozenset({'(', ')', '->', '::', '<', '>', '*', ','})
+
+# Ключевые слова, открывающие области, внутри которых возможны определения функций
+_C_SCOPE_KEYWORDS = frozenset({'namespace', 'class', 'struct', 'union', 'enum'})
+
+
+class CInclude(NamedTuple):
+    """Цель директивы #include и вид кавычек (<...> - системный заголовок)"""
+    target: str
+    system: bool
+
+
+@dataclass(frozen=True)
+class CSymbols:
+    """Результат лексического прохода: включения, определения функций и строки в порядке появления"""
+    includes: Tuple[CInclude, ...]
+    functions: Tuple[str, ...]
+    strings: Tuple[str, ...]
+
+
+def _is_macro_name(token: str) -> bool:
+    """Имя в верхнем регистре (макрос-спецификатор вроде OVERRIDE или Q_DECL_NOEXCEPT)"""
+    return token.isupper()
+
+
+def _literal_start(content: str, quote: int) -> int:
+    """Начало литерала с кавычкой в позиции quote (с префиксом) или -1, если перед кавычкой не префикс"""
+    start = quote
+    while start and (content[start - 1].isalnum() or content[start - 1] == '_'):
+        start -= 1
+    if start == quote or content[start:quote] in _C_LITERAL_PREFIXES:
+        return start
+    return -1
+
+
+def lex_c_symbols(content: str) -> CSymbols:
+    """
+    Лексический проход по исходному тексту C/C++ за линейное время. Вне тел функций
+    разбираются все токены, внутри тел - только скобки, литералы, комментарии и директивы.
+    """
+    includes: Dict[CInclude, None] = {}
+    functions: Dict[str, None] = {}
+    strings: Dict[str, None] = {}
+
+    # Части текущей группы соседних строковых литералов и конец последней части
+    string_parts: List[str] = []
+    string_end = 0
+    # Открытые фигурные скобки: True - область (файл, пространство имен, класс), False - тело или инициализатор
+    braces: List[bool] = []
+    scope_header = False
+    # Кандидат в определение: имя перед '(' и глубина круглых скобок его параметров
+    candidate: Optional[str] = None
+    parameter_depth = 0
+    # После закрывающей скобки параметров: ожидаются спецификаторы, ':' (список инициализации) или '->'
+    after_parameters = False
+    initializer_list = False
+    previous = ''
+    position = 0
+
+    def add_include(directive: str):
+        include = _INCLUDE.match(directive.lstrip())
+        if include is not None:
+            includes[CInclude(include.group(2).strip(), include.group(1) == '<')] = None
+
+    while True:
+        if braces and not braces[-1]:
+            # Тело функции или инициализатор: переход к следующей значимой позиции без токенизации
+            stop = _C_BODY_STOP.search(content, position)
+            if stop is None:
+                break
+            char = content[stop.start()]
+            position = stop.end()
+            if char == '{':
+                braces.append(False)
+            elif char == '}':
+                braces.pop()
+                if not braces or braces[-1]:
+                    if string_parts:
+                        strings[''.join(string_parts)] = None
+                        string_parts.clear()
+                    previous = '}'
+            elif char == '"' or char == "'":
+                start = _literal_start(content, stop.start())
+                if start < 0:
+                    # Разделитель разрядов в числе (1'000) или посторонний символ
+                    continue
+                match = _C_TOKEN.match(content, start)
+                kind = match.lastgroup
+                if kind == 'string' or kind == 'raw':
+                    if string_parts and _C_STRING_GAP.match(content, string_end).end() < start:
+                        strings[''.join(string_parts)] = None
+                        string_parts.clear()
+                    token = match.group()
+                    string_parts.append(match.group('raw_body') if kind == 'raw'
+                                        else token[token.index('"') + 1:-1])
+                    string_end = position = match.end()
+                elif kind == 'char':
+                    position = match.end()
+            else:
+                # Комментарий или директива препроцессора
+                match = _C_TOKEN.match(content, stop.start())
+                if match.lastgroup == 'directive':
+                    add_include(match.group())
+                if match.lastgroup in ('comment', 'directive'):
+                    position = match.end()
+            continue
+
+        match = _C_TOKEN.search(content, position)
+        if match is None:
+            break
+        position = match.end()
+        kind = match.lastgroup
+        if kind == 'comment':
+            continue
+        if kind == 'string' or kind == 'raw':
+            if previous == 'extern':
+                # extern "C" { ... } - область, а не тело; имя языка строкой не считается
+                scope_header = True
+            elif kind == 'raw':
+                string_parts.append(match.group('raw_body'))
+            else:
+                token = match.group()
+                string_parts.append(token[token.index('"') + 1:-1])
+            previous = '"'
+            continue
+        if string_parts:
+            strings[''.join(string_parts)] = None
+            string_parts.clear()
+        if kind == 'directive':
+            add_include(match.group())
+            continue
+
+        token = match.group()
+        in_scope = not braces or braces[-1]
+
+        if candidate is not None and parameter_depth:
+            # Внутри скобок параметров кандидата
+            if token == '(':
+                parameter_depth += 1
+            elif token == ')':
+                parameter_depth -= 1
+                after_parameters = not parameter_depth
+            previous = token
+            continue
+
+        if after_parameters:
+            if token == '{':
+                functions[candidate] = None
+                braces.append(False)
+                candidate, after_parameters, initializer_list, scope_header = None, False, False, False
+                previous = token
+                continue
+            if token == ':':
+                initializer_list = True
+                previous = token
+                continue
+            # Спецификаторы, аргументы noexcept(...), завершающий тип возврата или список инициализации
+            if (initializer_list or token in _C_FUNCTION_QUALIFIERS or token in _C_SIGNATURE_PUNCTUATION
+                    or (kind == 'name' and (previous == '->' or _is_macro_name(token)))):
+                previous = token
+                continue
+            # ';', '=' (объявление, = default, = 0) или посторонний токен: определения нет
+            candidate, after_parameters, initializer_list = None, False, False
+
+        if kind == 'name':
+            if token in _C_SCOPE_KEYWORDS:
+                scope_header = True
+        elif token == '(':
+            if in_scope and previous and (previous[0].isalpha() or previous[0] == '_') \
+                    and previous not in _C_KEYWORDS and not _is_macro_name(previous):
+                candidate, parameter_depth = previous, 1
+            scope_header = False
+        elif token == '{':
+            braces.append(scope_header)
+            scope_header = False
+        elif token == '}':
+            if braces:
+                braces.pop()
+        elif token in (';', '='):
+            scope_header = False
+        previous = token
+
+    if string_parts:
+        strings[''.join(string_parts)] = None
+
+    return CSymbols(tuple(includes), tuple(functions), tuple(strings))
+
+
+def _resolve_include(target: str, including_file: str, project_files: Set[str],
+                     by_name: Dict[str, List[str]]) -> Optional[str]:
+    """Файл проекта для цели #include: относительно каталога включающего файла, затем по окончанию пути"""
+    target = os.path.normpath(target)
+    relative = os.path.normpath(os.path.join(os.path.dirname(including_file), target))
+    if relative in project_files:
+        return relative
+    suffix = os.sep + target
+    matches = [path for path in by_name.get(os.path.basename(target), ()) if path.endswith(suffix)]
+    if not matches:
+        return None
+    # Из нескольких совпадений выбирается ближайший к включающему файлу
+    return max(matches, key=lambda path: (len(os.path.commonpath([path, including_file])), -len(path)))
+
+
+def build_include_graph(includes: Dict[str, Iterable[str]],
+                        project_files: Iterable[str]) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Граф включений по целям #include каждого файла: заголовки проекта (includes), внешние цели (external)
+    и для единиц трансляции - все достижимые заголовки проекта (transitive)
+    """
+    files = {os.path.normpath(path) for path in project_files}
+    by_name: Dict[str, List[str]] = {}
+    for path in sorted(files):
+        by_name.setdefault(os.path.basename(path), []).append(path)
+
+    graph: Dict[str, Dict[str, List[str]]] = {}
+    for file, targets in includes.items():
+        file = os.path.normpath(file)
+        resolved: Dict[str, None] = {}
+        external: Dict[str, None] = {}
+        for target in targets:
+            path = _resolve_include(target, file, files, by_name)
+            if path is None:
+                external[target] = None
+            elif path != file:
+                resolved[path] = None
+        graph[file] = {"includes": list(resolved), "external": list(external)}
+
+    for file, node in graph.items():
+        if os.path.splitext(file)[1].lower() not in TRANSLATION_UNIT_EXTENSIONS:
+            continue
+        # Обход в ширину: включения с защитой от повторов допускают циклы
+        reachable: Dict[str, None] = {}
+        queue = deque(node["includes"])
+        while queue:
+            header = queue.popleft()
+            if header in reachable or header == file:
+                continue
+            reachable[header] = None
+            queue.extend(graph.get(header, {}).get("includes", ()))
+        node["transitive"] = list(reachable)
+    return graph
@@ -57,6 +57,13 @@ class LLMConfig:
     verify_ssl_certs: bool = False
     profanity_check: bool = False
     streaming: bool = True
+    # Сколько чанков анализируется LLM одновременно
+    max_concurrency: int = 4
+    # Размер контекста модели (токены) и число анализов, объединяемых одним запросом суммаризации
+    context_tokens: int = 8192
+    summary_fan_in: int = 4
+    # Повторное использование ответов LLM для тех же входов из кэша извлечения (по умолчанию выключено)
+    response_cache: bool = False
 
     @classmethod
     def create_default(cls) -> 'LLMConfig':
@@ -69,7 +76,11 @@ class LLMConfig:
             timeout=int(os.getenv("LLM_TIMEOUT", "120")),
             max_retries=int(os.getenv("MAX_RETRY_COUNT", "3")),
             retry_delay=float(os.getenv("LLM_RETRY_DELAY", "1.0")),
-            provider=LLMProvider.LM_STUDIO
+            provider=LLMProvider.LM_STUDIO,
+            max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "4")),
+            context_tokens=int(os.getenv("LLM_CONTEXT_TOKENS", "8192")),
+            summary_fan_in=int(os.getenv("LLM_SUMMARY_FAN_IN", "4")),
+            response_cache=os.getenv("LLM_RESPONSE_CACHE", "false").lower() == "true"
         )
 
     @classmethod
@@ -127,6 +138,10 @@ class LLMConfig:
         timeout = int(os.getenv("LLM_TIMEOUT", "120"))
         max_retries = int(os.getenv("MAX_RETRY_COUNT", "3"))
         retry_delay = float(os.getenv("LLM_RETRY_DELAY", "1.0"))
+        max_concurrency = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+        context_tokens = int(os.getenv("LLM_CONTEXT_TOKENS", "8192"))
+        summary_fan_in = int(os.getenv("LLM_SUMMARY_FAN_IN", "4"))
+        response_cache = os.getenv("LLM_RESPONSE_CACHE", "false").lower() == "true"
 
         return cls(
             base_url=overrides.get('base_url', base_url),
@@ -143,5 +158,62 @@ class LLMConfig:
             top_p=overrides.get('top_p', top_p),
             verify_ssl_certs=overrides.get('verify_ssl_certs', verify_ssl_certs),
             profanity_check=overrides.get('profanity_check', profanity_check),
-            streaming=overrides.get('streaming', streaming)
+            streaming=overrides.get('streaming', streaming),
+            max_concurrency=overrides.get('max_concurrency', max_concurrency),
+            context_tokens=overrides.get('context_tokens', context_tokens),
+            summary_fan_in=overrides.get('summary_fan_in', summary_fan_in),
+            response_cache=overrides.get('response_cache', response_cache)
+        )
+
+
+@dataclass
+class ParserConfig:
+    """Конфигурация обхода и анализа файлов проекта"""
+    # Инкрементальный анализ (манифест в manifest_path) включается явно: PARSER_INCREMENTAL=true
+    incremental: bool = False
+    manifest_path: str = "file_manifest.json"
+    # Постоянный кэш извлечения (SQLite в cache_path) включается явно: PARSER_CACHE_ENABLED=true
+    cache_enabled: bool = False
+    cache_path: str = "~/.cache/ai_agent_parser/extraction_cache.sqlite"
+    cache_max_size_mb: int = 512
+    executor_backend: str = "thread"
+    max_workers: int = 0
+    io_workers: int = 4
+    task_chunk_size: int = 16
+    pdf_workers: int = 0
+    pdf_parallel_min_pages: int = 64
+    python_ast_max_size_mb: float = 4.0
+    java_call_detail: bool = False
+
+    @classmethod
+    def from_env(cls, **overrides) -> 'ParserConfig':
+        """Создание конфигурации парсера из переменных окружения"""
+        incremental = os.getenv("PARSER_INCREMENTAL", "false").lower() == "true"
+        manifest_path = os.getenv("PARSER_MANIFEST_PATH", "file_manifest.json")
+        cache_enabled = os.getenv("PARSER_CACHE_ENABLED", "false").lower() == "true"
+        cache_path = os.getenv("PARSER_CACHE_PATH", "~/.cache/ai_agent_parser/extraction_cache.sqlite")
+        cache_max_size_mb = int(os.getenv("PARSER_CACHE_MAX_SIZE_MB", "512"))
+        executor_backend = os.getenv("PARSER_EXECUTOR", "thread").lower()
+        max_workers = int(os.getenv("PARSER_MAX_WORKERS", "0"))
+        io_workers = int(os.getenv("PARSER_IO_WORKERS", "4"))
+        task_chunk_size = int(os.getenv("PARSER_TASK_CHUNK_SIZE", "16"))
+        pdf_workers = int(os.getenv("PARSER_PDF_WORKERS", "0"))
+        pdf_parallel_min_pages = int(os.getenv("PARSER_PDF_PARALLEL_MIN_PAGES", "64"))
+        python_ast_max_size_mb = float(os.getenv("PARSER_PYTHON_AST_MAX_SIZE_MB", "4"))
+        java_call_detail = os.getenv("PARSER_JAVA_CALL_DETAIL", "false").lower() == "true"
+
+        return cls(
+            incremental=overrides.get('incremental', incremental),
+            manifest_path=overrides.get('manifest_path', manifest_path),
+            cache_enabled=overrides.get('cache_enabled', cache_enabled),
+            cache_path=overrides.get('cache_path', cache_path),
+            cache_max_size_mb=overrides.get('cache_max_size_mb', cache_max_size_mb),
+            executor_backend=overrides.get('executor_backend', executor_backend),
+            max_workers=overrides.get('max_workers', max_workers),
+            io_workers=overrides.get('io_workers', io_workers),
+            task_chunk_size=overrides.get('task_chunk_size', task_chunk_size),
+            pdf_workers=overrides.get('pdf_workers', pdf_workers),
+            pdf_parallel_min_pages=overrides.get('pdf_parallel_min_pages', pdf_parallel_min_pages),
+            python_ast_max_size_mb=overrides.get('python_ast_max_size_mb', python_ast_max_size_mb),
+            java_call_detail=overrides.get('java_call_detail', java_call_detail)
         )
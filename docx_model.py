@@ -0,0 +1,261 @@
+"""
+Модель DOCX-документа, общая для всех экстракторов
+
+Документ разбирается один раз в последовательность блоков в порядке тела
+документа: параграфы (текст и имя стиля) и таблицы (строки с текстами ячеек).
+word/document.xml читается потоково через iterparse: обработанные элементы тела
+сразу удаляются из дерева, и полное дерево объектов python-docx в памяти не строится.
+Результат совпадает с python-docx (текст параграфов, имена стилей, объединенные
+ячейки повторяются, как в row.cells); python-docx используется как запасной путь
+для пакетов, которые потоковый разбор не понимает.
+"""
+
+import io
+import logging
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from docx import Document
+from docx.styles import BabelFish
+from docx.table import Table
+from docx.text.paragraph import Paragraph
+
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+RELS_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+logger = logging.getLogger(__name__)
+
+
+def _w(tag: str) -> str:
+    """Полное имя элемента WordprocessingML"""
+    return f'{{{W_NS}}}{tag}'
+
+
+W_BODY, W_P, W_TBL, W_TR, W_TC = _w('body'), _w('p'), _w('tbl'), _w('tr'), _w('tc')
+W_R, W_HYPERLINK, W_PPR, W_PSTYLE = _w('r'), _w('hyperlink'), _w('pPr'), _w('pStyle')
+W_TCPR, W_GRIDSPAN, W_VMERGE, W_TRPR, W_GRIDBEFORE = _w('tcPr'), _w('gridSpan'), _w('vMerge'), _w('trPr'), _w('gridBefore')
+W_STYLE, W_NAME = _w('style'), _w('name')
+W_VAL, W_TYPE, W_DEFAULT, W_STYLE_ID = _w('val'), _w('type'), _w('default'), _w('styleId')
+
+# Текстовые эквиваленты элементов содержимого run (как Run.text в python-docx)
+_RUN_CONTENT = {_w('t'): None, _w('tab'): '\t', _w('ptab'): '\t', _w('cr'): '\n', _w('noBreakHyphen'): '-'}
+_W_BR = _w('br')
+
+
+class DocxParagraph(NamedTuple):
+    """Параграф: текст и имя стиля ('' если стиль не определен)"""
+    text: str
+    style: str
+
+
+class DocxTable(NamedTuple):
+    """Таблица: строки с текстами ячеек"""
+    rows: Tuple[Tuple[str, ...], ...]
+
+    def row_texts(self) -> List[str]:
+        """Текст строк: ячейки через ' | ', повторы объединенной ячейки подряд схлопываются"""
+        texts = []
+        for row in self.rows:
+            cells = [cell.replace('\n', ' ') for index, cell in enumerate(row) if index == 0 or cell != row[index - 1]]
+            texts.append(" | ".join(cells))
+        return texts
+
+
+DocxBlock = Union[DocxParagraph, DocxTable]
+
+
+@dataclass(frozen=True)
+class DocxDocument:
+    """Блоки тела документа в порядке следования"""
+    blocks: Tuple[DocxBlock, ...]
+
+    @property
+    def paragraphs(self) -> List[DocxParagraph]:
+        """Параграфы тела документа (без параграфов внутри таблиц)"""
+        return [block for block in self.blocks if isinstance(block, DocxParagraph)]
+
+    @property
+    def tables(self) -> List[DocxTable]:
+        """Таблицы тела документа"""
+        return [block for block in self.blocks if isinstance(block, DocxTable)]
+
+    def lines(self) -> Iterator[Tuple[str, str]]:
+        """Строки документа по порядку: (текст, стиль) для параграфов и (строка таблицы, '') для таблиц"""
+        for block in self.blocks:
+            if isinstance(block, DocxParagraph):
+                yield block
+            else:
+                for row_text in block.row_texts():
+                    yield row_text, ''
+
+    @property
+    def text(self) -> str:
+        """Текст документа: параграфы и строки таблиц через перевод строки"""
+        return "\n".join(text for text, _ in self.lines())
+
+
+def _read_with_python_docx(data: bytes) -> DocxDocument:
+    """Разбор документа целиком через python-docx"""
+    blocks: List[DocxBlock] = []
+    for item in Document(io.BytesIO(data)).iter_inner_content():
+        if isinstance(item, Paragraph):
+            style = item.style
+            blocks.append(DocxParagraph(item.text, (style.name or '') if style is not None else ''))
+        elif isinstance(item, Table):
+            blocks.append(DocxTable(tuple(tuple(cell.text for cell in row.cells) for row in item.rows)))
+    return DocxDocument(tuple(blocks))
+
+
+def _relationship_target(archive: zipfile.ZipFile, source_part: str, type_suffix: str) -> Optional[str]:
+    """Путь части пакета, на которую ссылается source_part связью заданного типа"""
+    directory, name = posixpath.split(source_part)
+    rels_path = posixpath.join(directory, '_rels', f'{name}.rels')
+    if rels_path not in archive.NameToInfo:
+        return None
+    root = ET.fromstring(archive.read(rels_path))
+    for relationship in root.iter(f'{{{RELS_NS}}}Relationship'):
+        if relationship.get('Type', '').endswith(type_suffix) and relationship.get('TargetMode') != 'External':
+            target = relationship.get('Target', '')
+            if target.startswith('/'):
+                return target.lstrip('/')
+            return posixpath.normpath(posixpath.join(directory, target))
+    return None
+
+
+def _main_document_part(archive: zipfile.ZipFile) -> str:
+    """Путь основной части документа (обычно word/document.xml)"""
+    return _relationship_target(archive, '', '/officeDocument') or 'word/document.xml'
+
+
+def _read_paragraph_styles(archive: zipfile.ZipFile, document_part: str) -> Tuple[Dict[str, str], str]:
+    """Имена стилей параграфов по идентификатору и имя стиля параграфа по умолчанию"""
+    styles_part = _relationship_target(archive, document_part, '/styles')
+    if styles_part is None or styles_part not in archive.NameToInfo:
+        return {}, ''
+
+    names: Dict[str, str] = {}
+    default = ''
+    for style in ET.fromstring(archive.read(styles_part)).iter(W_STYLE):
+        if style.get(W_TYPE, 'paragraph') != 'paragraph':
+            continue
+        name_element = style.find(W_NAME)
+        name_value = name_element.get(W_VAL) if name_element is not None else None
+        name = BabelFish.internal2ui(name_value) if name_value is not None else ''
+        style_id = style.get(W_STYLE_ID)
+        if style_id is not None:
+            names.setdefault(style_id, name)
+        # По спецификации действует последний стиль по умолчанию
+        if style.get(W_DEFAULT) in ('1', 'true', 'on'):
+            default = name
+    return names, default
+
+
+def _run_text(run: ET.Element) -> str:
+    """Текст run с заменой табуляций и переносов"""
+    parts = []
+    for child in run:
+        tag = child.tag
+        if tag in _RUN_CONTENT:
+            replacement = _RUN_CONTENT[tag]
+            parts.append((child.text or '') if replacement is None else replacement)
+        elif tag == _W_BR and child.get(W_TYPE, 'textWrapping') == 'textWrapping':
+            parts.append('\n')
+    return ''.join(parts)
+
+
+def _paragraph_text(paragraph: ET.Element) -> str:
+    """Текст параграфа: run и гиперссылки верхнего уровня, как Paragraph.text в python-docx"""
+    parts = []
+    for child in paragraph:
+        if child.tag == W_R:
+            parts.append(_run_text(child))
+        elif child.tag == W_HYPERLINK:
+            parts.extend(_run_text(run) for run in child if run.tag == W_R)
+    return ''.join(parts)
+
+
+def _paragraph_style_id(paragraph: ET.Element) -> Optional[str]:
+    """Идентификатор стиля параграфа из w:pPr/w:pStyle"""
+    properties = paragraph.find(W_PPR)
+    if properties is None:
+        return None
+    style = properties.find(W_PSTYLE)
+    return style.get(W_VAL) if style is not None else None
+
+
+def _int_property(properties: Optional[ET.Element], tag: str, default: int) -> int:
+    """Целочисленное значение w:val дочернего элемента свойств"""
+    element = properties.find(tag) if properties is not None else None
+    if element is None:
+        return default
+    try:
+        return int(element.get(W_VAL, default))
+    except ValueError:
+        return default
+
+
+def _table_rows(table: ET.Element) -> Tuple[Tuple[str, ...], ...]:
+    """Строки таблицы; объединенные ячейки повторяются для каждой колонки сетки, как row.cells в python-docx"""
+    rows = []
+    previous_grid: Dict[int, Tuple[str, int]] = {}
+    for row in table.iterfind(W_TR):
+        cells: List[str] = []
+        grid: Dict[int, Tuple[str, int]] = {}
+        offset = _int_property(row.find(W_TRPR), W_GRIDBEFORE, 0)
+        for cell in row.iterfind(W_TC):
+            properties = cell.find(W_TCPR)
+            span = _int_property(properties, W_GRIDSPAN, 1)
+            merge = properties.find(W_VMERGE) if properties is not None else None
+            if merge is not None and merge.get(W_VAL, 'continue') == 'continue' and offset in previous_grid:
+                # Продолжение вертикального объединения: содержимое берется из ячейки выше
+                text, span = previous_grid[offset]
+            else:
+                text = '\n'.join(_paragraph_text(paragraph) for paragraph in cell.iterfind(W_P))
+            grid[offset] = (text, span)
+            cells.extend([text] * span)
+            offset += span
+        rows.append(tuple(cells))
+        previous_grid = grid
+    return tuple(rows)
+
+
+def _stream_document(data: bytes) -> DocxDocument:
+    """Потоковый разбор тела документа через iterparse"""
+    blocks: List[DocxBlock] = []
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        document_part = _main_document_part(archive)
+        style_names, default_style = _read_paragraph_styles(archive, document_part)
+
+        with archive.open(document_part) as stream:
+            body = None
+            depth = 0
+            for event, element in ET.iterparse(stream, events=('start', 'end')):
+                if event == 'start':
+                    depth += 1
+                    if depth == 2 and element.tag == W_BODY:
+                        body = element
+                    continue
+                depth -= 1
+                # Обрабатываются только прямые потомки w:body; после обработки элемент удаляется
+                if body is None or depth != 2:
+                    continue
+                if element.tag == W_P:
+                    style_id = _paragraph_style_id(element)
+                    style = style_names.get(style_id, default_style) if style_id else default_style
+                    blocks.append(DocxParagraph(_paragraph_text(element), style))
+                elif element.tag == W_TBL:
+                    blocks.append(DocxTable(_table_rows(element)))
+                body.remove(element)
+    return DocxDocument(tuple(blocks))
+
+
+def load_docx_document(data: bytes) -> DocxDocument:
+    """Модель документа: потоковый разбор, при ошибке - через python-docx"""
+    try:
+        return _stream_document(data)
+    except (KeyError, ET.ParseError) as e:
+        logger.debug(f"Потоковый разбор DOCX не удался ({e}), используется python-docx")
+        return _read_with_python_docx(data)
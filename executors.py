@@ -0,0 +1,190 @@
+"""
+Исполнители задач извлечения
+
+Поддерживаются три режима:
+    thread  - все экстракторы выполняются в пуле потоков (по умолчанию);
+    process - все экстракторы выполняются в пуле процессов;
+    hybrid  - CPU-емкие файлы (код, PDF, DOCX, Excel) уходят в процессы,
+              остальные (текст, разметка, конфиги) - в потоки.
+
+В пул процессов задачи отправляются пачками, чтобы снизить накладные расходы
+на передачу данных. Все задачи одного файла попадают в одну пачку и
+выполняются с общим FileContext внутри рабочего процесса.
+"""
+
+import os
+import logging
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from extraction_cache import ExtractionCache, open_extraction_cache
+from file_context import FileContext
+from java_model import configure_java_analysis_service, get_java_analysis_service
+from python_symbols import configure_python_ast_limit, python_ast_max_bytes
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_BACKENDS = ('thread', 'process', 'hybrid')
+
+# Форматы, разбор которых упирается в CPU (AST, javalang, PyPDF2, OOXML)
+CPU_BOUND_EXTENSIONS = frozenset({
+    '.py', '.js', '.ts', '.java', '.cpp', '.c', '.h', '.hpp',
+    '.pdf', '.docx', '.xlsx', '.xls',
+})
+
+class ChunkTask(NamedTuple):
+    """Задача пачки для рабочего процесса: экстрактор и то, что уже известно о файле"""
+    func: Callable
+    file_path: str
+    content_hash: Optional[str]
+    encoding: Optional[str]
+
+
+# Кэш извлечения рабочего процесса (открывается инициализатором пула)
+_worker_cache: Optional[ExtractionCache] = None
+
+
+def _init_worker(cache_path: Optional[str], cache_max_size_mb: int, java_call_detail: bool = False,
+                 python_ast_max_size_mb: Optional[float] = None):
+    """
+    Инициализация рабочего процесса: собственное соединение с кэшем и настройки анализаторов
+    родительского процесса (при запуске через spawn глобальные настройки модулей не наследуются)
+    """
+    global _worker_cache
+    if cache_path:
+        _worker_cache = open_extraction_cache(cache_path, cache_max_size_mb)
+    configure_java_analysis_service(java_call_detail)
+    if python_ast_max_size_mb is not None:
+        configure_python_ast_limit(python_ast_max_size_mb)
+
+
+def _run_chunk(tasks: List[ChunkTask]) -> Tuple[List[Tuple[bool, object]], Dict]:
+    """Выполнение пачки задач в рабочем процессе; возвращает результаты и приращение счетчиков кэша"""
+    counters_before = _worker_cache.counters() if _worker_cache is not None else None
+    contexts: Dict[str, FileContext] = {}
+    results = []
+
+    for func, file_path, content_hash, encoding in tasks:
+        context = contexts.get(file_path)
+        if context is None:
+            context = contexts[file_path] = FileContext(file_path, content_hash=content_hash, encoding=encoding)
+        try:
+            results.append((True, func(context, _worker_cache)))
+        except Exception as e:
+            results.append((False, e))
+
+    counters_delta = {}
+    if _worker_cache is not None:
+        _worker_cache.flush()
+        counters_delta = ExtractionCache.subtract_counters(_worker_cache.counters(), counters_before)
+    return results, counters_delta
+
+
+def resolve_worker_count(backend: str, max_workers: int) -> int:
+    """Количество рабочих: 0 означает автоматический выбор"""
+    if max_workers > 0:
+        return max_workers
+    if backend == 'thread':
+        return 4
+    return os.cpu_count() or 4
+
+
+class ExtractionExecutor:
+    """Исполнитель задач извлечения с маршрутизацией между потоками и процессами"""
+
+    def __init__(self, backend: str = 'thread', max_workers: int = 0, io_workers: int = 4,
+                 chunk_size: int = 16, cache: Optional[ExtractionCache] = None):
+        if backend not in EXECUTOR_BACKENDS:
+            logger.warning(f"Неизвестный режим исполнения '{backend}', используется 'thread'")
+            backend = 'thread'
+
+        self.backend = backend
+        self.chunk_size = max(1, chunk_size)
+        self.cache = cache
+        self._buffer: List[Tuple[ChunkTask, Future]] = []
+        self._lock = threading.Lock()
+
+        workers = resolve_worker_count(backend, max_workers)
+        self._threads = None
+        self._processes = None
+
+        if backend == 'thread':
+            self._threads = ThreadPoolExecutor(max_workers=workers)
+        else:
+            cache_args = (cache.db_path, cache.max_size_bytes // (1024 * 1024)) if cache is not None else (None, 0)
+            # Настройки анализаторов, заданные в родительском процессе перед созданием исполнителя
+            analyzer_args = (get_java_analysis_service().call_detail, python_ast_max_bytes() / (1024 * 1024))
+            self._processes = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                                  initargs=cache_args + analyzer_args)
+            if backend == 'hybrid':
+                self._threads = ThreadPoolExecutor(max_workers=io_workers)
+
+        logger.info(f"Режим исполнения экстракторов: {backend}, рабочих: {workers}")
+
+    def __enter__(self) -> 'ExtractionExecutor':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+    def uses_processes(self, file_path: str) -> bool:
+        """Определяет, выполняется ли файл в пуле процессов"""
+        if self.backend == 'process':
+            return True
+        if self.backend == 'hybrid':
+            return os.path.splitext(file_path)[1].lower() in CPU_BOUND_EXTENSIONS
+        return False
+
+    def submit(self, func: Callable, context: FileContext) -> Future:
+        """Постановка экстрактора func(context, cache) в очередь"""
+        if not self.uses_processes(context.path):
+            return self._threads.submit(func, context, self.cache)
+
+        future = Future()
+        with self._lock:
+            # Пачка отправляется только на границе файлов, чтобы задачи файла выполнялись вместе
+            if len(self._buffer) >= self.chunk_size and self._buffer[-1][0].file_path != context.path:
+                self._flush_locked()
+            task = ChunkTask(func, context.path, context.known_content_hash, context.known_encoding)
+            self._buffer.append((task, future))
+        return future
+
+    def flush(self):
+        """Отправка накопленной пачки задач в пул процессов"""
+        with self._lock:
+            self._flush_locked()
+
+    def shutdown(self):
+        """Отправка оставшихся задач и ожидание завершения пулов"""
+        self.flush()
+        if self._processes is not None:
+            self._processes.shutdown(wait=True)
+        if self._threads is not None:
+            self._threads.shutdown(wait=True)
+
+    def _flush_locked(self):
+        if not self._buffer:
+            return
+
+        chunk, self._buffer = self._buffer, []
+        tasks = [task for task, _ in chunk]
+        futures = [future for _, future in chunk]
+
+        def distribute(chunk_future: Future):
+            try:
+                results, counters_delta = chunk_future.result()
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                return
+
+            if self.cache is not None and counters_delta:
+                self.cache.merge_counters(counters_delta)
+            for future, (ok, value) in zip(futures, results):
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+        self._processes.submit(_run_chunk, tasks).add_done_callback(distribute)
@@ -0,0 +1,246 @@
+"""
+Кэш результатов извлечения с адресацией по содержимому
+
+Результат экстрактора хранится в SQLite по ключу
+(хэш содержимого, имя экстрактора, версия экстрактора, расширение файла),
+поэтому байт-в-байт одинаковые файлы не анализируются повторно ни в рамках
+одного запуска, ни между запусками и репозиториями.
+Размер кэша ограничен, при переполнении вытесняются давно не использованные записи (LRU).
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Количество накопленных изменений, после которого они записываются в базу
+COMMIT_INTERVAL = 100
+
+# После вытеснения кэш занимает не более этой доли от лимита
+EVICTION_TARGET_RATIO = 0.9
+
+
+class ExtractionCache:
+    """Кэш результатов экстракторов в SQLite с LRU-вытеснением"""
+
+    def __init__(self, db_path: str, max_size_bytes: int):
+        self.db_path = db_path
+        self.max_size_bytes = max_size_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.by_extractor: Dict[str, Dict[str, int]] = {}
+        # Изменения копятся в памяти и записываются короткими транзакциями,
+        # чтобы не блокировать базу для других процессов
+        self._pending_puts: Dict[str, Tuple[str, int, str]] = {}
+        self._pending_touches: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+        db_dir = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(db_dir, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                extractor TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL,
+                value TEXT NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries(last_access)")
+        self._conn.commit()
+
+        self._total_size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    @staticmethod
+    def make_key(content_hash: str, extractor: str, version: int, variant: str = "") -> str:
+        """Ключ записи кэша"""
+        return f"{content_hash}:{extractor}:{version}:{variant}"
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Поиск значения в кэше, возвращает (найдено, значение)"""
+        with self._lock:
+            pending = self._pending_puts.get(key)
+            if pending is not None:
+                payload = pending[2]
+            else:
+                row = self._conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return False, None
+                payload = row[0]
+                self._pending_touches[key] = time.time()
+                self._after_write()
+        return True, json.loads(payload)
+
+    def put(self, key: str, extractor: str, value: Any):
+        """Сохранение значения в кэш"""
+        payload = json.dumps(value, ensure_ascii=False)
+        size = len(payload.encode('utf-8'))
+        if size > self.max_size_bytes:
+            return
+
+        with self._lock:
+            if key in self._pending_puts:
+                self._total_size -= self._pending_puts[key][1]
+            else:
+                old = self._conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+                if old is not None:
+                    self._total_size -= old[0]
+            self._pending_puts[key] = (extractor, size, payload)
+            self._total_size += size
+            if self._total_size > self.max_size_bytes:
+                self._write_pending()
+                self._evict()
+            else:
+                self._after_write()
+
+    def get_or_compute(self, content_hash: str, extractor: str, version: int, variant: str,
+                       compute: Callable[[], Any], should_store: Optional[Callable[[Any], bool]] = None) -> Any:
+        """Значение из кэша или результат compute() с сохранением в кэш"""
+        key = self.make_key(content_hash, extractor, version, variant)
+        try:
+            found, value = self.get(key)
+        except sqlite3.Error as e:
+            logger.warning(f"Ошибка чтения кэша извлечения: {e}")
+            found, value = False, None
+
+        self._count(extractor, found)
+        if found:
+            return value
+
+        value = compute()
+        if should_store is None or should_store(value):
+            try:
+                self.put(key, extractor, value)
+            except sqlite3.Error as e:
+                logger.warning(f"Ошибка записи в кэш извлечения: {e}")
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        """Статистика кэша для отчета"""
+        with self._lock:
+            self._write_pending()
+            entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "evictions": self.evictions,
+                "entries": entries,
+                "size_bytes": self._total_size,
+                "max_size_bytes": self.max_size_bytes,
+                "by_extractor": {name: dict(counters) for name, counters in self.by_extractor.items()},
+            }
+
+    def counters(self) -> Dict[str, Any]:
+        """Снимок счетчиков попаданий и промахов"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "by_extractor": {name: dict(counters) for name, counters in self.by_extractor.items()},
+            }
+
+    @staticmethod
+    def subtract_counters(after: Dict[str, Any], before: Dict[str, Any]) -> Dict[str, Any]:
+        """Разница двух снимков счетчиков"""
+        by_extractor = {}
+        for name, counters in after["by_extractor"].items():
+            old = before["by_extractor"].get(name, {"hits": 0, "misses": 0})
+            by_extractor[name] = {"hits": counters["hits"] - old["hits"], "misses": counters["misses"] - old["misses"]}
+        return {
+            "hits": after["hits"] - before["hits"],
+            "misses": after["misses"] - before["misses"],
+            "by_extractor": by_extractor,
+        }
+
+    def merge_counters(self, delta: Dict[str, Any]):
+        """Учет счетчиков, накопленных в другом процессе"""
+        with self._lock:
+            self.hits += delta.get("hits", 0)
+            self.misses += delta.get("misses", 0)
+            for name, counters in delta.get("by_extractor", {}).items():
+                own = self.by_extractor.setdefault(name, {"hits": 0, "misses": 0})
+                own["hits"] += counters["hits"]
+                own["misses"] += counters["misses"]
+
+    def flush(self):
+        """Фиксация накопленных изменений"""
+        with self._lock:
+            self._write_pending()
+
+    def close(self):
+        """Фиксация изменений и закрытие соединения"""
+        with self._lock:
+            try:
+                self._write_pending()
+            finally:
+                self._conn.close()
+
+    def _count(self, extractor: str, hit: bool):
+        with self._lock:
+            counters = self.by_extractor.setdefault(extractor, {"hits": 0, "misses": 0})
+            if hit:
+                self.hits += 1
+                counters["hits"] += 1
+            else:
+                self.misses += 1
+                counters["misses"] += 1
+
+    def _after_write(self):
+        if len(self._pending_puts) + len(self._pending_touches) >= COMMIT_INTERVAL:
+            self._write_pending()
+
+    def _write_pending(self):
+        """Запись накопленных изменений одной транзакцией"""
+        if not self._pending_puts and not self._pending_touches:
+            return
+        now = time.time()
+        with self._conn:
+            self._conn.executemany(
+                "UPDATE entries SET last_access = ? WHERE key = ?",
+                [(accessed, key) for key, accessed in self._pending_touches.items()]
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, extractor, size, last_access, value) VALUES (?, ?, ?, ?, ?)",
+                [(key, extractor, size, now, payload) for key, (extractor, size, payload) in self._pending_puts.items()]
+            )
+        self._pending_puts.clear()
+        self._pending_touches.clear()
+
+    def _evict(self):
+        """Вытеснение давно не использованных записей до целевого размера"""
+        target = int(self.max_size_bytes * EVICTION_TARGET_RATIO)
+        # Кэш может пополняться из нескольких процессов, поэтому размер берется из базы
+        self._total_size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        cursor = self._conn.execute("SELECT key, size FROM entries ORDER BY last_access ASC")
+        evicted = []
+        for key, size in cursor:
+            if self._total_size <= target:
+                break
+            evicted.append((key,))
+            self._total_size -= size
+        cursor.close()
+        with self._conn:
+            self._conn.executemany("DELETE FROM entries WHERE key = ?", evicted)
+        self.evictions += len(evicted)
+        logger.info(f"Кэш извлечения: вытеснено {len(evicted)} записей")
+
+
+def open_extraction_cache(db_path: str, max_size_mb: int) -> Optional[ExtractionCache]:
+    """Открытие кэша извлечения; при ошибке анализ продолжается без кэша"""
+    try:
+        return ExtractionCache(os.path.expanduser(db_path), max_size_mb * 1024 * 1024)
+    except (sqlite3.Error, OSError) as e:
+        logger.warning(f"Не удалось открыть кэш извлечения {db_path}: {e}")
+        return None
@@ -0,0 +1,222 @@
+"""
+Контекст файла, общий для всех экстракторов
+
+Файл читается с диска один раз, декодируется один раз (в кодировке, определенной при обходе проекта), а производные
+представления (строки, индекс секций Markdown, AST и его символы, символы Java и C/C++, тексты страниц PDF, модель DOCX, листы Excel и CSV, текст разметки, ячейки ноутбука)
+вычисляются лениво и запоминаются. Все экстракторы одного файла работают
+с одним и тем же FileContext.
+"""
+
+import io
+import os
+import ast
+import logging
+import threading
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple, Union
+
+from file_manifest import hash_bytes
+from text_encoding import ENCODING_SNIFF_BYTES, decode_text, detect_encoding, sniff_file_encoding
+from pdf_text import PdfText, get_pdf_text_service
+from docx_model import DocxDocument, load_docx_document
+from markup_model import MarkupDocument, read_markup
+from notebook_model import Notebook, NotebookCell, notebook_cell_symbols, read_notebook
+from markdown_index import MarkdownIndex, build_markdown_index
+from workbook_model import SheetWindow, WorkbookWindow, read_csv_window, read_workbook
+from java_model import JavaSymbols, get_java_analysis_service
+from c_model import CSymbols, lex_c_symbols
+from python_symbols import PythonSymbols, collect_python_symbols, lex_python_symbols, python_ast_max_bytes
+
+logger = logging.getLogger(__name__)
+
+class FileContext:
+    """Однократно прочитанное содержимое файла с ленивыми производными представлениями"""
+
+    def __init__(self, file_path: str, content_hash: Optional[str] = None, encoding: Optional[str] = None):
+        self.path = file_path
+        self.ext = os.path.splitext(file_path)[1].lower()
+        # Кодировка из записи обхода проекта; без нее определяется по началу файла при первом обращении
+        self._encoding = encoding
+        self._content_hash = content_hash
+        self._memo: Dict[str, Tuple[bool, Any]] = {}
+        self._lock = threading.RLock()
+
+    def __repr__(self) -> str:
+        return f"FileContext({self.path!r})"
+
+    def _get(self, name: str, factory: Callable[[], Any]) -> Any:
+        """Ленивое вычисление представления; ошибки тоже запоминаются и пробрасываются повторно"""
+        with self._lock:
+            if name not in self._memo:
+                try:
+                    self._memo[name] = (True, factory())
+                except Exception as e:
+                    self._memo[name] = (False, e)
+            ok, value = self._memo[name]
+        if not ok:
+            raise value
+        return value
+
+    @property
+    def data(self) -> bytes:
+        """Байты файла (читаются один раз)"""
+        def read() -> bytes:
+            with open(self.path, 'rb') as f:
+                return f.read()
+        return self._get('data', read)
+
+    def open_stream(self) -> BinaryIO:
+        """Поток байтов файла: из памяти, если содержимое уже прочитано, иначе с диска"""
+        with self._lock:
+            ok, data = self._memo.get('data', (False, None))
+        if ok:
+            return io.BytesIO(data)
+        return open(self.path, 'rb')
+
+    @property
+    def size(self) -> int:
+        """Размер файла в байтах (без чтения, если содержимое еще не прочитано)"""
+        with self._lock:
+            ok, data = self._memo.get('data', (False, None))
+        return len(data) if ok else os.path.getsize(self.path)
+
+    @property
+    def known_content_hash(self) -> Optional[str]:
+        """Хэш содержимого, если он уже известен (без чтения файла)"""
+        return self._content_hash
+
+    @property
+    def known_encoding(self) -> Optional[str]:
+        """Кодировка, если она уже определена (без чтения файла)"""
+        return self._encoding
+
+    @property
+    def content_hash(self) -> str:
+        """Хэш содержимого (из манифеста или вычисленный по прочитанным байтам)"""
+        if self._content_hash is None:
+            self._content_hash = hash_bytes(self.data)
+        return self._content_hash
+
+    @property
+    def encoding(self) -> str:
+        """Кодировка текста (определяется один раз: при обходе проекта или по началу файла)"""
+        if self._encoding is None:
+            with self._lock:
+                ok, data = self._memo.get('data', (False, None))
+            if ok:
+                self._encoding = detect_encoding(data[:ENCODING_SNIFF_BYTES], len(data) <= ENCODING_SNIFF_BYTES)
+            else:
+                self._encoding = sniff_file_encoding(self.path)
+        return self._encoding
+
+    @property
+    def text(self) -> str:
+        """Декодированный текст файла"""
+        return self._get('text', lambda: decode_text(self.data, self.encoding, self.path))
+
+    @property
+    def lines(self) -> List[str]:
+        """Строки текста"""
+        return self._get('lines', lambda: self.text.split('\n'))
+
+    @property
+    def markdown_index(self) -> MarkdownIndex:
+        """Дерево секций и блоки кода Markdown (один проход по тексту)"""
+        return self._get('markdown_index', lambda: build_markdown_index(self.text))
+
+    @property
+    def python_ast(self) -> ast.Module:
+        """AST Python-модуля"""
+        return self._get('python_ast', lambda: ast.parse(self.text, filename=self.path))
+
+    @property
+    def python_symbols(self) -> PythonSymbols:
+        """
+        Импорты, функции, вызовы и строки Python-модуля: один обход AST,
+        а для модулей больше python_ast_max_bytes() и модулей с синтаксическими ошибками - лексер
+        """
+        def collect() -> PythonSymbols:
+            if self.size <= python_ast_max_bytes():
+                try:
+                    return collect_python_symbols(self.python_ast)
+                except (SyntaxError, ValueError) as e:
+                    logger.warning(f"Синтаксическая ошибка в Python файле {self.path}, используется лексер: {e}")
+            with self.open_stream() as stream:
+                return lex_python_symbols(stream, self.encoding)
+        return self._get('python_symbols', collect)
+
+    @property
+    def java_symbols(self) -> JavaSymbols:
+        """Пакет, импорты, методы, вызовы и строки Java-файла (лексический проход, общий по хэшу содержимого)"""
+        return self._get('java_symbols', lambda: get_java_analysis_service().symbols(self.text, self.content_hash))
+
+    @property
+    def java_calls(self) -> Optional[Tuple[str, ...]]:
+        """Вызовы Java-файла с квалификаторами по дереву javalang (строится лениво; None, если разбор не удался)"""
+        return self._get('java_calls', lambda: get_java_analysis_service().calls(self.text, self.content_hash))
+
+    @property
+    def c_symbols(self) -> CSymbols:
+        """Включения, определения функций и строки C/C++ (один лексический проход)"""
+        return self._get('c_symbols', lambda: lex_c_symbols(self.text))
+
+    @property
+    def pdf_text(self) -> PdfText:
+        """Тексты страниц PDF (общие для всех файлов с тем же содержимым)"""
+        return self._get('pdf_text', lambda: get_pdf_text_service().get(self.data, self.content_hash))
+
+    @property
+    def pdf_pages(self) -> Tuple[str, ...]:
+        """Тексты страниц PDF"""
+        return self.pdf_text.pages
+
+    @property
+    def docx_document(self) -> DocxDocument:
+        """Модель DOCX: параграфы со стилями и таблицы в порядке документа"""
+        return self._get('docx_document', lambda: load_docx_document(self.data))
+
+    @property
+    def workbook(self) -> WorkbookWindow:
+        """Листы Excel: заголовки и первые строки каждого листа (книга открывается один раз)"""
+        return self._get('workbook', lambda: read_workbook(self.data))
+
+    @property
+    def csv_table(self) -> SheetWindow:
+        """Заголовки и первые строки CSV (один разбор для всех экстракторов)"""
+        return self._get('csv_table',
+                         lambda: read_csv_window(self.data, os.path.basename(self.path), encoding=self.encoding))
+
+    @property
+    def markup(self) -> MarkupDocument:
+        """Текст и структура BPMN/XML/HTML (потоковый разбор, без чтения файла целиком)"""
+        def read() -> MarkupDocument:
+            with self.open_stream() as stream:
+                return read_markup(stream, self.ext, self.encoding)
+        return self._get('markup', read)
+
+    @property
+    def notebook(self) -> Notebook:
+        """Ячейки Jupyter-ноутбука без выводов (потоковый разбор)"""
+        def read() -> Notebook:
+            with self.open_stream() as stream:
+                return read_notebook(stream)
+        return self._get('notebook', read)
+
+    @property
+    def notebook_symbols(self) -> Tuple[Tuple[NotebookCell, Optional[PythonSymbols]], ...]:
+        """Символы Python ячеек кода ноутбука (один разбор на ячейку для всех экстракторов)"""
+        return self._get('notebook_symbols', lambda: notebook_cell_symbols(self.notebook))
+
+    def release(self):
+        """Освобождение прочитанного содержимого после завершения всех экстракторов"""
+        with self._lock:
+            self._memo.clear()
+
+
+FileSource = Union[str, FileContext]
+
+
+def as_file_context(source: FileSource) -> FileContext:
+    """Приведение пути или контекста к FileContext"""
+    if isinstance(source, FileContext):
+        return source
+    return FileContext(source)
@@ -0,0 +1,198 @@
+"""
+Манифест файлов проекта для инкрементального анализа
+
+Манифест хранит для каждого файла размер, время изменения, хэш содержимого
+и результаты извлечения предыдущего запуска. При следующем запуске
+анализируются только добавленные и измененные файлы.
+"""
+
+import os
+import json
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Iterable
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+# Слоты результатов, которые сохраняются в манифесте
+RESULT_SLOTS = ('dependencies', 'prompts', 'requirements', 'business_requirements', 'project_descriptions')
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def is_failed_result(result) -> bool:
+    """Результат экстрактора, сообщающий об ошибке извлечения (строка "Ошибка ...")"""
+    return isinstance(result, str) and result.startswith("Ошибка")
+
+
+def _new_hasher():
+    return xxhash.xxh3_128() if xxhash is not None else hashlib.blake2b(digest_size=16)
+
+
+def hash_bytes(data: bytes) -> str:
+    """Хэш уже прочитанного содержимого (совпадает с hash_file для того же файла)"""
+    hasher = _new_hasher()
+    hasher.update(data)
+    return hasher.hexdigest()
+
+
+def hash_file(file_path: str) -> str:
+    """Хэш содержимого файла (xxh3-128, если доступен xxhash, иначе blake2b)"""
+    hasher = _new_hasher()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def build_manifest(directory_path: str, file_records: Dict[str, Dict[str, int]],
+                   previous: Optional[Dict[str, Any]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Построение манифеста по записям обхода (size, mtime_ns).
+    Хэш переиспользуется из предыдущего манифеста, если размер и время изменения совпадают.
+    """
+    previous_files = (previous or {}).get('files', {})
+    manifest = {}
+    to_hash = []
+
+    for file_path, record in file_records.items():
+        relative_path = os.path.relpath(file_path, directory_path)
+        entry = {"size": record['size'], "mtime_ns": record['mtime_ns'], "hash": None}
+        old_entry = previous_files.get(relative_path)
+        if old_entry and old_entry.get('size') == entry['size'] and old_entry.get('mtime_ns') == entry['mtime_ns']:
+            entry['hash'] = old_entry.get('hash')
+        if entry['hash'] is None:
+            to_hash.append(file_path)
+        manifest[file_path] = entry
+
+    def safe_hash(file_path: str) -> Optional[str]:
+        try:
+            return hash_file(file_path)
+        except OSError as e:
+            logger.warning(f"Не удалось вычислить хэш файла {file_path}: {e}")
+            return None
+
+    if to_hash:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            for file_path, file_hash in zip(to_hash, executor.map(safe_hash, to_hash)):
+                manifest[file_path]['hash'] = file_hash
+
+    return manifest
+
+
+def load_manifest(manifest_path: str, directory_path: str,
+                  extractor_versions: Optional[Dict[str, int]] = None,
+                  extractor_settings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Загрузка манифеста предыдущего запуска для указанной директории"""
+    if not os.path.exists(manifest_path):
+        return {}
+
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"Не удалось загрузить манифест {manifest_path}: {e}")
+        return {}
+
+    if manifest.get('version') != MANIFEST_VERSION:
+        logger.info(f"Манифест {manifest_path} устаревшей версии, выполняется полный анализ")
+        return {}
+
+    if manifest.get('directory') != os.path.abspath(directory_path):
+        logger.info(f"Манифест {manifest_path} относится к другой директории, выполняется полный анализ")
+        return {}
+
+    # Сохраненные результаты получены другими версиями экстракторов
+    if extractor_versions is not None and manifest.get('extractor_versions') != extractor_versions:
+        logger.info("Версии экстракторов изменились, выполняется полный анализ")
+        return {}
+
+    # Сохраненные результаты получены с другими настройками, влияющими на результат экстракторов
+    if extractor_settings is not None and manifest.get('extractor_settings') != extractor_settings:
+        logger.info("Настройки экстракторов изменились, выполняется полный анализ")
+        return {}
+
+    return manifest
+
+
+def diff_manifest(directory_path: str, previous: Dict[str, Any],
+                  current: Dict[str, Dict[str, Any]]) -> Dict[str, List[str]]:
+    """Сравнение манифестов: добавленные, измененные, неизмененные и удаленные файлы"""
+    previous_files = previous.get('files', {})
+    diff = {"added": [], "modified": [], "unchanged": [], "removed": []}
+    seen = set()
+
+    for file_path, entry in current.items():
+        relative_path = os.path.relpath(file_path, directory_path)
+        seen.add(relative_path)
+        old_entry = previous_files.get(relative_path)
+        if old_entry is None:
+            diff['added'].append(file_path)
+        # Файл, извлечение которого завершилось ошибкой, анализируется повторно
+        elif (entry['hash'] is None or old_entry.get('hash') != entry['hash'] or old_entry.get('failed')
+              or any(is_failed_result(value) for value in old_entry.get('results', {}).values())):
+            diff['modified'].append(file_path)
+        else:
+            diff['unchanged'].append(file_path)
+
+    diff['removed'] = [path for path in previous_files if path not in seen]
+    return diff
+
+
+def get_cached_results(directory_path: str, previous: Dict[str, Any],
+                       file_paths: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Результаты предыдущего запуска для неизмененных файлов, разложенные по слотам"""
+    previous_files = previous.get('files', {})
+    cached = {slot: {} for slot in RESULT_SLOTS}
+
+    for file_path in file_paths:
+        entry = previous_files.get(os.path.relpath(file_path, directory_path), {})
+        for slot, value in entry.get('results', {}).items():
+            if slot in cached:
+                cached[slot][file_path] = value
+
+    return cached
+
+
+def save_manifest(manifest_path: str, directory_path: str, current: Dict[str, Dict[str, Any]],
+                  results: Dict[str, Dict[str, Any]], extractor_versions: Optional[Dict[str, int]] = None,
+                  extractor_settings: Optional[Dict[str, Any]] = None,
+                  failed_files: Optional[Iterable[str]] = None):
+    """
+    Сохранение манифеста вместе с результатами извлечения по каждому файлу.
+    Ошибки извлечения не сохраняются: такие файлы помечаются failed и при следующем
+    запуске анализируются повторно, а не берутся из манифеста.
+    """
+    failed_files = set(failed_files or ())
+    files = {}
+    for file_path, entry in current.items():
+        file_results = {slot: results[slot][file_path] for slot in RESULT_SLOTS
+                        if file_path in results.get(slot, {})}
+        failed = file_path in failed_files or any(is_failed_result(value) for value in file_results.values())
+        if failed:
+            file_results = {slot: value for slot, value in file_results.items() if not is_failed_result(value)}
+        files[os.path.relpath(file_path, directory_path)] = dict(entry, results=file_results, failed=failed)
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "directory": os.path.abspath(directory_path),
+        "extractor_versions": extractor_versions,
+        "extractor_settings": extractor_settings,
+        "files": files,
+    }
+
+    temp_path = f"{manifest_path}.tmp"
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(temp_path, manifest_path)
+    except OSError as e:
+        logger.error(f"Ошибка сохранения манифеста {manifest_path}: {e}")
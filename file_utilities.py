@@ -10,8 +10,58 @@ from typing import Dict, List, Tuple, Optional, Any
 import pandas as pd
 from pathlib import Path
 
+from file_context import FileContext, FileSource, as_file_context
+from scanners import StringLiteral, scan_string_literals, get_literal_syntax
+from keyword_matcher import KeywordMatcher
+
 logger = logging.getLogger(__name__)
 
+# Сколько символов перед литералом просматривается для определения типа промпта
+PROMPT_CONTEXT_WINDOW = 200
+
+# Контекст перед литералом (в пределах строки) -> тип промпта
+PROMPT_CONTEXT_PATTERNS = {
+    'ChatPromptTemplate': re.compile(r'ChatPromptTemplate\.from_template\s*\(\s*$'),
+    'PromptTemplate': re.compile(r'PromptTemplate\s*\([^)]*\btemplate\s*=\s*$', re.IGNORECASE),
+    'SystemPrompt': re.compile(r'system\w*\W*prompt', re.IGNORECASE),
+    'UserPrompt': re.compile(r'user\w*\W*prompt', re.IGNORECASE),
+}
+
+# Индикаторы содержимого файла: набор -> ключевые слова
+CONTENT_INDICATOR_MATCHER = KeywordMatcher({
+    'contains_prompts': ['prompt', 'промпт', 'template', 'шаблон', 'system', 'user', 'assistant'],
+    'contains_business_logic': ['требования', 'business', 'process', 'workflow', 'пользователь'],
+    'contains_api_keys': ['api_key', 'secret', 'token', 'password', 'credential'],
+    'contains_configurations': ['config', 'setting', 'parameter', 'environment'],
+    'contains_documentation': ['readme', 'documentation', 'описание', 'manual', 'guide'],
+})
+
+# Бизнес-релевантность по имени файла
+RELEVANCE_MATCHER = KeywordMatcher({
+    'high': [
+        'requirements', 'требования', 'business', 'бизнес',
+        'process', 'процесс', 'workflow', 'specification',
+        'спецификация', 'use_case', 'пользовательские_истории'
+    ],
+    'medium': [
+        'config', 'settings', 'readme', 'documentation',
+        'описание', 'manual', 'guide', 'api'
+    ],
+    'low': [
+        'test', 'тест', 'debug', 'temp', 'tmp', 'cache',
+        'log', 'backup', '__pycache__'
+    ],
+})
+
+# Бизнес-термины в содержимом файла
+BUSINESS_CONTENT_MATCHER = KeywordMatcher({
+    'business': [
+        'бизнес', 'business', 'требования', 'requirements',
+        'процесс', 'process', 'пользователь', 'user',
+        'клиент', 'client', 'заказчик', 'customer'
+    ],
+})
+
 class FileAnalyzer:
     """Класс для анализа файлов и извлечения метаданных"""
     
@@ -25,20 +75,22 @@ class FileAnalyzer:
             'markup': ['.xml', '.html', '.htm', '.bpmn']
         }
     
-    def analyze_file_content(self, file_path: str) -> Dict[str, Any]:
-        """Анализ содержимого файла и извлечение метаданных"""
+    def analyze_file_content(self, source: FileSource) -> Dict[str, Any]:
+        """Анализ содержимого файла и извлечение метаданных (текст декодируется один раз для всех проверок)"""
+        context = as_file_context(source)
+        file_path = context.path
         try:
             file_info = {
                 'path': file_path,
                 'name': os.path.basename(file_path),
-                'extension': os.path.splitext(file_path)[1].lower(),
-                'size': os.path.getsize(file_path),
+                'extension': context.ext,
+                'size': context.size,
                 'type': self._determine_file_type(file_path),
-                'encoding': self._detect_encoding(file_path),
-                'content_indicators': self._analyze_content_indicators(file_path),
-                'potential_ai_content': self._detect_ai_content(file_path),
-                'business_relevance': self._assess_business_relevance(file_path),
-                'technical_complexity': self._assess_technical_complexity(file_path)
+                'encoding': self._detect_encoding(context),
+                'content_indicators': self._analyze_content_indicators(context),
+                'potential_ai_content': self._detect_ai_content(context),
+                'business_relevance': self._assess_business_relevance(context),
+                'technical_complexity': self._assess_technical_complexity(context)
             }
             return file_info
         except Exception as e:
@@ -53,20 +105,14 @@ class FileAnalyzer:
                 return file_type
         return 'unknown'
     
-    def _detect_encoding(self, file_path: str) -> str:
-        """Определение кодировки файла"""
+    def _detect_encoding(self, context: FileContext) -> str:
+        """Кодировка файла (определенная при обходе проекта или по началу файла)"""
         try:
-            import chardet
-            with open(file_path, 'rb') as f:
-                raw_data = f.read(10000)  # Читаем первые 10KB
-                result = chardet.detect(raw_data)
-                return result.get('encoding', 'unknown')
-        except ImportError:
-            return 'utf-8'  # Предполагаем UTF-8 по умолчанию
+            return context.encoding
         except Exception:
             return 'unknown'
     
-    def _analyze_content_indicators(self, file_path: str) -> Dict[str, bool]:
+    def _analyze_content_indicators(self, context: FileContext) -> Dict[str, bool]:
         """Анализ индикаторов содержимого"""
         indicators = {
             'contains_prompts': False,
@@ -79,36 +125,19 @@ class FileAnalyzer:
         
         try:
             # Для текстовых файлов анализируем содержимое
-            if self._is_text_file(file_path):
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read(5000).lower()  # Читаем первые 5KB
-                    
-                    # Ищем промпты
-                    prompt_keywords = ['prompt', 'промпт', 'template', 'шаблон', 'system', 'user', 'assistant']
-                    indicators['contains_prompts'] = any(keyword in content for keyword in prompt_keywords)
-                    
-                    # Ищем бизнес-логику
-                    business_keywords = ['требования', 'business', 'process', 'workflow', 'пользователь']
-                    indicators['contains_business_logic'] = any(keyword in content for keyword in business_keywords)
-                    
-                    # Ищем API ключи
-                    api_patterns = ['api_key', 'secret', 'token', 'password', 'credential']
-                    indicators['contains_api_keys'] = any(pattern in content for pattern in api_patterns)
-                    
-                    # Ищем конфигурации
-                    config_keywords = ['config', 'setting', 'parameter', 'environment']
-                    indicators['contains_configurations'] = any(keyword in content for keyword in config_keywords)
-                    
-                    # Ищем документацию
-                    doc_keywords = ['readme', 'documentation', 'описание', 'manual', 'guide']
-                    indicators['contains_documentation'] = any(keyword in content for keyword in doc_keywords)
+            if self._is_text_file(context.path):
+                content = context.text[:5000]  # Первые 5000 символов
+                
+                # Промпты, бизнес-логика, API ключи, конфигурации и документация - за один проход
+                for indicator in CONTENT_INDICATOR_MATCHER.classify(content):
+                    indicators[indicator] = True
                     
         except Exception as e:
-            logger.warning(f"Не удалось проанализировать содержимое {file_path}: {e}")
+            logger.warning(f"Не удалось проанализировать содержимое {context.path}: {e}")
         
         return indicators
     
-    def _detect_ai_content(self, file_path: str) -> Dict[str, Any]:
+    def _detect_ai_content(self, context: FileContext) -> Dict[str, Any]:
         """Обнаружение ИИ-специфичного контента"""
         ai_indicators = {
             'has_llm_interactions': False,
@@ -119,116 +148,87 @@ class FileAnalyzer:
         }
         
         try:
-            if self._is_text_file(file_path):
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read(10000).lower()
-                    
-                    # Паттерны для поиска ИИ-контента
-                    llm_patterns = [
-                        r'openai', r'chatgpt', r'gpt-[0-9]', r'claude', r'anthropic',
-                        r'langchain', r'llama', r'gemini', r'palm', r'бард'
-                    ]
-                    
-                    prompt_patterns = [
-                        r'chatprompttemplate', r'prompttemplate', r'system.*prompt',
-                        r'user.*prompt', r'assistant.*prompt', r'промпт.*шаблон'
-                    ]
-                    
-                    workflow_patterns = [
-                        r'chain\.invoke', r'agent\.run', r'crew\.kickoff',
-                        r'workflow', r'pipeline', r'orchestrat'
-                    ]
-                    
-                    # Подсчитываем совпадения
-                    llm_matches = sum(1 for pattern in llm_patterns if re.search(pattern, content))
-                    prompt_matches = sum(1 for pattern in prompt_patterns if re.search(pattern, content))
-                    workflow_matches = sum(1 for pattern in workflow_patterns if re.search(pattern, content))
-                    
-                    ai_indicators['has_llm_interactions'] = llm_matches > 0
-                    ai_indicators['has_prompt_templates'] = prompt_matches > 0
-                    ai_indicators['has_ai_workflows'] = workflow_matches > 0
-                    
-                    # Определяем уровень уверенности
-                    total_matches = llm_matches + prompt_matches + workflow_matches
-                    ai_indicators['confidence_level'] = min(total_matches / 10.0, 1.0)
-                    
-                    # Определяем используемые фреймворки
-                    frameworks = []
-                    if 'langchain' in content:
-                        frameworks.append('LangChain')
-                    if 'crewai' in content or 'crew' in content:
-                        frameworks.append('CrewAI')
-                    if 'openai' in content:
-                        frameworks.append('OpenAI')
-                    if 'anthropic' in content or 'claude' in content:
-                        frameworks.append('Anthropic')
-                    
-                    ai_indicators['detected_ai_frameworks'] = frameworks
-                    
+            if self._is_text_file(context.path):
+                content = context.text[:10000].lower()
+                
+                # Паттерны для поиска ИИ-контента
+                llm_patterns = [
+                    r'openai', r'chatgpt', r'gpt-[0-9]', r'claude', r'anthropic',
+                    r'langchain', r'llama', r'gemini', r'palm', r'бард'
+                ]
+                
+                prompt_patterns = [
+                    r'chatprompttemplate', r'prompttemplate', r'system.*prompt',
+                    r'user.*prompt', r'assistant.*prompt', r'промпт.*шаблон'
+                ]
+                
+                workflow_patterns = [
+                    r'chain\.invoke', r'agent\.run', r'crew\.kickoff',
+                    r'workflow', r'pipeline', r'orchestrat'
+                ]
+                
+                # Подсчитываем совпадения
+                llm_matches = sum(1 for pattern in llm_patterns if re.search(pattern, content))
+                prompt_matches = sum(1 for pattern in prompt_patterns if re.search(pattern, content))
+                workflow_matches = sum(1 for pattern in workflow_patterns if re.search(pattern, content))
+                
+                ai_indicators['has_llm_interactions'] = llm_matches > 0
+                ai_indicators['has_prompt_templates'] = prompt_matches > 0
+                ai_indicators['has_ai_workflows'] = workflow_matches > 0
+                
+                # Определяем уровень уверенности
+                total_matches = llm_matches + prompt_matches + workflow_matches
+                ai_indicators['confidence_level'] = min(total_matches / 10.0, 1.0)
+                
+                # Определяем используемые фреймворки
+                frameworks = []
+                if 'langchain' in content:
+                    frameworks.append('LangChain')
+                if 'crewai' in content or 'crew' in content:
+                    frameworks.append('CrewAI')
+                if 'openai' in content:
+                    frameworks.append('OpenAI')
+                if 'anthropic' in content or 'claude' in content:
+                    frameworks.append('Anthropic')
+                
+                ai_indicators['detected_ai_frameworks'] = frameworks
+                
         except Exception as e:
-            logger.warning(f"Ошибка анализа ИИ-контента в {file_path}: {e}")
+            logger.warning(f"Ошибка анализа ИИ-контента в {context.path}: {e}")
         
         return ai_indicators
     
-    def _assess_business_relevance(self, file_path: str) -> float:
+    def _assess_business_relevance(self, context: FileContext) -> float:
         """Оценка бизнес-релевантности файла"""
-        filename = os.path.basename(file_path).lower()
+        filename = os.path.basename(context.path).lower()
         
-        # Высокая релевантность
-        high_relevance_indicators = [
-            'requirements', 'требования', 'business', 'бизнес',
-            'process', 'процесс', 'workflow', 'specification',
-            'спецификация', 'use_case', 'пользовательские_истории'
-        ]
-        
-        # Средняя релевантность
-        medium_relevance_indicators = [
-            'config', 'settings', 'readme', 'documentation',
-            'описание', 'manual', 'guide', 'api'
-        ]
-        
-        # Низкая релевантность
-        low_relevance_indicators = [
-            'test', 'тест', 'debug', 'temp', 'tmp', 'cache',
-            'log', 'backup', '__pycache__'
-        ]
-        
-        for indicator in high_relevance_indicators:
-            if indicator in filename:
-                return 0.9
-        
-        for indicator in medium_relevance_indicators:
-            if indicator in filename:
-                return 0.6
-        
-        for indicator in low_relevance_indicators:
-            if indicator in filename:
-                return 0.2
+        relevance = RELEVANCE_MATCHER.classify(filename)
+        if 'high' in relevance:
+            return 0.9
+        if 'medium' in relevance:
+            return 0.6
+        if 'low' in relevance:
+            return 0.2
         
         # Анализируем содержимое для более точной оценки
         try:
-            if self._is_text_file(file_path):
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read(2000).lower()
-                    
-                    business_keywords_count = sum(1 for keyword in [
-                        'бизнес', 'business', 'требования', 'requirements',
-                        'процесс', 'process', 'пользователь', 'user',
-                        'клиент', 'client', 'заказчик', 'customer'
-                    ] if keyword in content)
-                    
-                    if business_keywords_count >= 3:
-                        return 0.8
-                    elif business_keywords_count >= 1:
-                        return 0.5
+            if self._is_text_file(context.path):
+                content = context.text[:2000]
+                
+                business_keywords_count = len(BUSINESS_CONTENT_MATCHER.find(content))
+                
+                if business_keywords_count >= 3:
+                    return 0.8
+                elif business_keywords_count >= 1:
+                    return 0.5
         except Exception:
             pass
         
         return 0.3  # Средняя релевантность по умолчанию
     
-    def _assess_technical_complexity(self, file_path: str) -> float:
+    def _assess_technical_complexity(self, context: FileContext) -> float:
         """Оценка технической сложности файла"""
-        ext = os.path.splitext(file_path)[1].lower()
+        ext = context.ext
         
         # Высокая сложность
         if ext in ['.py', '.java', '.cpp', '.c', '.js', '.ts']:
@@ -244,24 +244,23 @@ class FileAnalyzer:
         
         # Дополнительный анализ для кодовых файлов
         try:
-            if ext in ['.py', '.js', '.java'] and self._is_text_file(file_path):
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    lines = f.readlines()[:100]  # Первые 100 строк
-                    
-                    complexity_indicators = 0
-                    for line in lines:
-                        line_lower = line.lower().strip()
-                        # Ищем индикаторы сложности
-                        if any(keyword in line_lower for keyword in [
-                            'class ', 'async ', 'await ', 'lambda',
-                            'decorator', 'inheritance', 'polymorphism',
-                            'threading', 'multiprocessing', 'asyncio'
-                        ]):
-                            complexity_indicators += 1
-                    
-                    # Корректируем сложность на основе найденных индикаторов
-                    complexity = min(complexity + (complexity_indicators * 0.05), 1.0)
-                    
+            if ext in ['.py', '.js', '.java'] and self._is_text_file(context.path):
+                lines = context.lines[:100]  # Первые 100 строк
+                
+                complexity_indicators = 0
+                for line in lines:
+                    line_lower = line.lower().strip()
+                    # Ищем индикаторы сложности
+                    if any(keyword in line_lower for keyword in [
+                        'class ', 'async ', 'await ', 'lambda',
+                        'decorator', 'inheritance', 'polymorphism',
+                        'threading', 'multiprocessing', 'asyncio'
+                    ]):
+                        complexity_indicators += 1
+                
+                # Корректируем сложность на основе найденных индикаторов
+                complexity = min(complexity + (complexity_indicators * 0.05), 1.0)
+                
         except Exception:
             pass
         
@@ -281,67 +280,57 @@ class ContentExtractor:
     """Класс для извлечения специфического контента из файлов"""
     
     @staticmethod
-    def extract_ai_prompts_advanced(file_path: str) -> List[Dict[str, Any]]:
+    def extract_ai_prompts_advanced(source: FileSource) -> List[Dict[str, Any]]:
         """Расширенное извлечение промптов с метаданными"""
         prompts = []
+        context = as_file_context(source)
+        file_path = context.path
         
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
+            content = context.text
             
-            # Различные паттерны для поиска промптов
-            patterns = [
-                # ChatPromptTemplate паттерны
-                {
-                    'pattern': r'ChatPromptTemplate\.from_template\s*\(\s*["\']([^"\']+)["\']',
-                    'type': 'ChatPromptTemplate',
-                    'framework': 'LangChain'
-                },
-                # PromptTemplate паттерны  
-                {
-                    'pattern': r'PromptTemplate\s*\([^)]*?template\s*=\s*["\']([^"\']+)["\']',
-                    'type': 'PromptTemplate', 
-                    'framework': 'LangChain'
-                },
-                # Системные промпты
-                {
-                    'pattern': r'system.*prompt.*["\']([^"\']{50,})["\']',
-                    'type': 'SystemPrompt',
-                    'framework': 'Generic'
-                },
-                # Пользовательские промпты
-                {
-                    'pattern': r'user.*prompt.*["\']([^"\']{30,})["\']',
-                    'type': 'UserPrompt',
-                    'framework': 'Generic'
-                },
-                # Многострочные промпты
-                {
-                    'pattern': r'["\'{3}](.*?(?:analyze|анализ|задача|instruction).*?)["\'{3}]',
-                    'type': 'MultilinePrompt',
-                    'framework': 'Generic'
+            # Промпты ищутся среди строковых литералов (линейный сканер),
+            # тип определяется по тексту перед литералом в той же строке
+            for literal in scan_string_literals(content, get_literal_syntax(file_path)):
+                prompt_type, framework = ContentExtractor._classify_prompt_literal(content, literal)
+                if prompt_type is None:
+                    continue
+                text = literal.text.strip()
+                prompt_data = {
+                    'text': text,
+                    'type': prompt_type,
+                    'framework': framework,
+                    'file_path': file_path,
+                    'length': len(text),
+                    'language': 'ru' if any(ru_word in text.lower() for ru_word in ['ты', 'анализ', 'задача', 'создай']) else 'en',
+                    'complexity': ContentExtractor._assess_prompt_complexity(text)
                 }
-            ]
-            
-            for pattern_info in patterns:
-                matches = re.findall(pattern_info['pattern'], content, re.IGNORECASE | re.DOTALL)
-                for match in matches:
-                    prompt_data = {
-                        'text': match.strip(),
-                        'type': pattern_info['type'],
-                        'framework': pattern_info['framework'],
-                        'file_path': file_path,
-                        'length': len(match.strip()),
-                        'language': 'ru' if any(ru_word in match.lower() for ru_word in ['ты', 'анализ', 'задача', 'создай']) else 'en',
-                        'complexity': ContentExtractor._assess_prompt_complexity(match)
-                    }
-                    prompts.append(prompt_data)
+                prompts.append(prompt_data)
             
         except Exception as e:
             logger.error(f"Ошибка извлечения промптов из {file_path}: {e}")
         
         return prompts
     
+    @staticmethod
+    def _classify_prompt_literal(content: str, literal: StringLiteral) -> Tuple[Optional[str], Optional[str]]:
+        """Тип и фреймворк промпта по литералу и тексту перед ним"""
+        line_start = content.rfind('\n', max(0, literal.start - PROMPT_CONTEXT_WINDOW), literal.start) + 1
+        prefix = content[max(line_start, literal.start - PROMPT_CONTEXT_WINDOW):literal.start]
+        text = literal.text
+        
+        if PROMPT_CONTEXT_PATTERNS['ChatPromptTemplate'].search(prefix):
+            return 'ChatPromptTemplate', 'LangChain'
+        if PROMPT_CONTEXT_PATTERNS['PromptTemplate'].search(prefix):
+            return 'PromptTemplate', 'LangChain'
+        if len(text) >= 50 and PROMPT_CONTEXT_PATTERNS['SystemPrompt'].search(prefix):
+            return 'SystemPrompt', 'Generic'
+        if len(text) >= 30 and PROMPT_CONTEXT_PATTERNS['UserPrompt'].search(prefix):
+            return 'UserPrompt', 'Generic'
+        if any(keyword in text.lower() for keyword in ['analyze', 'анализ', 'задача', 'instruction']):
+            return 'MultilinePrompt', 'Generic'
+        return None, None
+    
     @staticmethod
     def _assess_prompt_complexity(prompt_text: str) -> str:
         """Оценка сложности промпта"""
@@ -374,7 +363,7 @@ class ContentExtractor:
             return 'advanced'
     
     @staticmethod
-    def extract_business_entities(file_path: str) -> Dict[str, List[str]]:
+    def extract_business_entities(source: FileSource) -> Dict[str, List[str]]:
         """Извлечение бизнес-сущностей из документов"""
         entities = {
             'roles': [],
@@ -386,16 +375,18 @@ class ContentExtractor:
             'goals': []
         }
         
+        context = as_file_context(source)
+        file_path = context.path
         try:
             # Определяем тип файла и соответствующий метод извлечения
-            ext = os.path.splitext(file_path)[1].lower()
+            ext = context.ext
             
             if ext == '.csv':
-                entities.update(ContentExtractor._extract_from_csv(file_path))
+                entities.update(ContentExtractor._extract_from_csv(context))
             elif ext in ['.xlsx', '.xls']:
-                entities.update(ContentExtractor._extract_from_excel(file_path))
+                entities.update(ContentExtractor._extract_from_excel(context))
             elif ext in ['.txt', '.md']:
-                entities.update(ContentExtractor._extract_from_text(file_path))
+                entities.update(ContentExtractor._extract_from_text(context))
             
         except Exception as e:
             logger.error(f"Ошибка извлечения бизнес-сущностей из {file_path}: {e}")
@@ -403,58 +394,29 @@ class ContentExtractor:
         return entities
     
     @staticmethod
-    def _extract_from_csv(file_path: str) -> Dict[str, List[str]]:
-        """Извлечение сущностей из CSV"""
-        entities = {'roles': [], 'processes': [], 'requirements': []}
-        
+    def _extract_from_csv(context: FileContext) -> Dict[str, List[str]]:
+        """Извлечение сущностей из CSV (общий с экстракторами разбор первых строк)"""
         try:
-            df = pd.read_csv(file_path, encoding='utf-8')
-            
-            # Ищем колонки с ролями
-            role_columns = [col for col in df.columns if any(keyword in col.lower() 
-                          for keyword in ['роль', 'role', 'должность', 'position'])]
-            
-            for col in role_columns:
-                entities['roles'].extend(df[col].dropna().astype(str).tolist())
-            
-            # Ищем процессы
-            process_columns = [col for col in df.columns if any(keyword in col.lower()
-                             for keyword in ['процесс', 'process', 'workflow', 'задача', 'task'])]
-            
-            for col in process_columns:
-                entities['processes'].extend(df[col].dropna().astype(str).tolist())
-            
-            # Ищем требования
-            req_columns = [col for col in df.columns if any(keyword in col.lower()
-                          for keyword in ['требование', 'requirement', 'spec', 'спецификация'])]
-            
-            for col in req_columns:
-                entities['requirements'].extend(df[col].dropna().astype(str).tolist())
-                
+            return ContentExtractor._extract_from_csv_dataframe(context.csv_table.frame)
         except Exception as e:
-            logger.warning(f"Ошибка обработки CSV {file_path}: {e}")
-        
-        return entities
+            logger.warning(f"Ошибка обработки CSV {context.path}: {e}")
+            return {'roles': [], 'processes': [], 'requirements': []}
     
     @staticmethod
-    def _extract_from_excel(file_path: str) -> Dict[str, List[str]]:
-        """Извлечение сущностей из Excel"""
+    def _extract_from_excel(context: FileContext) -> Dict[str, List[str]]:
+        """Извлечение сущностей из Excel (общие с экстракторами окна листов)"""
         entities = {'roles': [], 'processes': [], 'requirements': []}
         
         try:
-            xl_file = pd.ExcelFile(file_path)
-            
-            for sheet_name in xl_file.sheet_names:
-                df = pd.read_excel(file_path, sheet_name=sheet_name)
-                
+            for sheet in context.workbook.sheets:
                 # Применяем ту же логику, что и для CSV
-                sheet_entities = ContentExtractor._extract_from_csv_dataframe(df)
+                sheet_entities = ContentExtractor._extract_from_csv_dataframe(sheet.frame)
                 
                 for key in entities:
                     entities[key].extend(sheet_entities.get(key, []))
                     
         except Exception as e:
-            logger.warning(f"Ошибка обработки Excel {file_path}: {e}")
+            logger.warning(f"Ошибка обработки Excel {context.path}: {e}")
         
         return entities
     
@@ -487,15 +449,12 @@ class ContentExtractor:
         return entities
     
     @staticmethod
-    def _extract_from_text(file_path: str) -> Dict[str, List[str]]:
-        """Извлечение сущностей из текстовых файлов"""
+    def _extract_from_text(context: FileContext) -> Dict[str, List[str]]:
+        """Извлечение сущностей из текстовых файлов (общий с экстракторами декодированный текст)"""
         entities = {'roles': [], 'processes': [], 'requirements': [], 'goals': [], 'constraints': []}
         
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-            
-            lines = content.split('\n')
+            lines = context.lines
             
             for line in lines:
                 line = line.strip()
@@ -525,7 +484,7 @@ class ContentExtractor:
                     entities['constraints'].append(line)
                     
         except Exception as e:
-            logger.warning(f"Ошибка обработки текста {file_path}: {e}")
+            logger.warning(f"Ошибка обработки текста {context.path}: {e}")
         
         return entities
 
@@ -0,0 +1,218 @@
+"""
+Двухуровневый анализ Java-файлов
+
+Быстрый уровень - лексический проход одним регулярным выражением: пакет,
+импорты, объявления методов, имена вызываемых методов и строковые литералы
+(включая текстовые блоки). Он работает на любом синтаксисе Java, в том числе
+на конструкциях, которые javalang не поддерживает (records, switch-выражения).
+Полный уровень - дерево javalang - строится лениво и только для детализации
+вызовов (квалификатор и метод). Результаты обоих уровней запоминаются по
+хэшу содержимого и общие для экстракторов зависимостей и промптов.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import javalang
+
+# Токен Java: комментарий, текстовый блок, строка, символ, имя, число или знак (-> и :: - один знак)
+_JAVA_TOKEN = re.compile(
+    r'(?P<comment>//[^\n]*|/\*[\s\S]*?\*/)'
+    r'|(?P<textblock>"""(?:[^"\\]|\\[\s\S]|"(?!""))*""")'
+    r'|(?P<string>"(?:[^"\\\n]|\\.)*")'
+    r'|(?P<char>\'(?:[^\'\\\n]|\\.)*\')'
+    r'|(?P<name>[A-Za-z_$][\w$]*)'
+    r'|(?P<number>\d[\w.]*)'
+    r'|(?P<punct>->|::|[^\s\w"\'])')
+
+# Ключевые слова, после которых имя с '(' - вызов, а сами они вызовом не являются
+_JAVA_KEYWORDS = frozenset({
+    'abstract', 'assert', 'break', 'case', 'catch', 'class', 'const', 'continue', 'default', 'do', 'else',
+    'enum', 'extends', 'final', 'finally', 'for', 'goto', 'if', 'implements', 'import', 'instanceof',
+    'interface', 'native', 'new', 'package', 'private', 'protected', 'public', 'return', 'static',
+    'strictfp', 'super', 'switch', 'synchronized', 'this', 'throw', 'throws', 'transient', 'try',
+    'volatile', 'while', 'true', 'false', 'null', 'yield',
+})
+
+# Типы, после которых имя с '(' - объявление метода
+_JAVA_PRIMITIVES = frozenset({'void', 'boolean', 'byte', 'char', 'short', 'int', 'long', 'float', 'double'})
+
+
+@dataclass(frozen=True)
+class JavaSymbols:
+    """Результат лексического прохода: символы в порядке первого появления, без дубликатов"""
+    package: str
+    imports: Tuple[str, ...]
+    methods: Tuple[str, ...]
+    calls: Tuple[str, ...]
+    strings: Tuple[str, ...]
+
+
+def _is_identifier(token: str) -> bool:
+    """Имя (не ключевое слово, не литерал и не знак)"""
+    return (token[:1].isalpha() or token[:1] in ('_', '$')) and token not in _JAVA_KEYWORDS
+
+
+def lex_java_symbols(content: str) -> JavaSymbols:
+    """Лексический проход по исходному тексту Java без построения дерева"""
+    package = ''
+    imports: Dict[str, None] = {}
+    methods: Dict[str, None] = {}
+    calls: Dict[str, None] = {}
+    strings: Dict[str, None] = {}
+
+    # Объявление package/import: части пути до ';'
+    declaration: Optional[List[str]] = None
+    declaration_kind = ''
+    # Открытые фигурные скобки: True - тело класса (интерфейса, перечисления, записи), False - блок кода
+    braces: List[bool] = []
+    type_header = False
+    # После new - имя создаваемого класса, после @ - имя аннотации: их скобки не вызов
+    creator = annotation = False
+    # Три предыдущих значимых токена (литералы заменены на '"')
+    previous = previous2 = previous3 = ''
+
+    for match in _JAVA_TOKEN.finditer(content):
+        kind = match.lastgroup
+        if kind == 'comment':
+            continue
+        token = match.group()
+        if kind == 'string' or kind == 'textblock':
+            quote_size = 1 if kind == 'string' else 3
+            strings[token[quote_size:-quote_size]] = None
+            token = '"'
+        elif declaration is not None:
+            if token == ';':
+                path = ''.join(declaration)
+                if declaration_kind == 'package':
+                    package = path
+                else:
+                    # Путь импорта со звездочкой - пакет (как ImportDeclaration.path в javalang)
+                    imports[path[:-2] if path.endswith('.*') else path] = None
+                declaration = None
+            elif declaration or token != 'static':
+                declaration.append(token)
+            continue
+        elif kind == 'name':
+            if not braces and token in ('package', 'import'):
+                declaration, declaration_kind = [], token
+                continue
+            if token in ('class', 'interface', 'enum') and previous != '.':
+                type_header = True
+            elif token == 'record' and previous != '.' and not _is_identifier(previous):
+                type_header = True
+            elif token == 'new':
+                creator = True
+            elif annotation and previous not in ('@', '.'):
+                annotation = False
+        elif token == '(':
+            name = previous
+            if _is_identifier(name) and not creator and not annotation and not type_header:
+                if previous2 in _JAVA_PRIMITIVES or previous2 in ('>', ']') or _is_identifier(previous2):
+                    # Перед именем тип: объявление метода
+                    methods[name] = None
+                elif braces and braces[-1] and previous2 not in ('.', '=', '(', '?', ':', '->'):
+                    # В теле класса без типа перед именем - конструктор или константа перечисления
+                    pass
+                elif not (previous2 == '.' and previous3 == 'super'):
+                    calls[name] = None
+            creator = annotation = False
+        elif token == '@':
+            annotation = True
+        elif token == '{':
+            braces.append(type_header)
+            creator = annotation = type_header = False
+        elif token == '}':
+            if braces:
+                braces.pop()
+        elif token == '[':
+            creator = False
+
+        previous3, previous2, previous = previous2, previous, token
+
+    return JavaSymbols(package, tuple(imports), tuple(methods), tuple(calls), tuple(strings))
+
+
+def parse_java_calls(content: str) -> Tuple[str, ...]:
+    """Вызовы методов по дереву javalang: квалификатор.метод (или метод без квалификатора)"""
+    tree = javalang.parse.parse(content)
+    calls: Dict[str, None] = {}
+    for _, node in tree.filter(javalang.tree.MethodInvocation):
+        if node.member:
+            calls[f"{node.qualifier}.{node.member}" if node.qualifier else node.member] = None
+    return tuple(calls)
+
+
+class JavaAnalysisService:
+    """Анализ Java-файлов с запоминанием результатов обоих уровней по хэшу содержимого"""
+
+    def __init__(self, call_detail: bool = False, memo_size: int = 256):
+        # Нужна ли детализация вызовов по дереву javalang
+        self.call_detail = call_detail
+        self.memo_size = memo_size
+        self.lexed = 0
+        self.parsed = 0
+        self.memo_hits = 0
+        self._memo: 'OrderedDict[Tuple[str, str], object]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, key: Tuple[str, str], compute):
+        with self._lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                self.memo_hits += 1
+                return self._memo[key]
+
+        value = compute()
+
+        with self._lock:
+            self._memo[key] = value
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+        return value
+
+    def symbols(self, content: str, content_hash: str) -> JavaSymbols:
+        """Лексические символы файла (быстрый уровень)"""
+        def lex() -> JavaSymbols:
+            self.lexed += 1
+            return lex_java_symbols(content)
+        return self._remember(('symbols', content_hash), lex)
+
+    def calls(self, content: str, content_hash: str) -> Optional[Tuple[str, ...]]:
+        """Вызовы с квалификаторами по дереву javalang (None, если javalang не разбирает файл)"""
+        def parse() -> Optional[Tuple[str, ...]]:
+            self.parsed += 1
+            try:
+                return parse_java_calls(content)
+            except (javalang.parser.JavaSyntaxError, javalang.tokenizer.LexerError):
+                return None
+        return self._remember(('calls', content_hash), parse)
+
+    def clear(self):
+        """Очистка запомненных результатов"""
+        with self._lock:
+            self._memo.clear()
+
+
+_service: Optional[JavaAnalysisService] = None
+_service_lock = threading.Lock()
+
+
+def configure_java_analysis_service(call_detail: bool = False, memo_size: int = 256) -> JavaAnalysisService:
+    """Создание общей службы анализа Java с заданными параметрами"""
+    global _service
+    with _service_lock:
+        _service = JavaAnalysisService(call_detail, memo_size)
+        return _service
+
+
+def get_java_analysis_service() -> JavaAnalysisService:
+    """Общая служба анализа Java (с параметрами по умолчанию, если не настроена)"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = JavaAnalysisService()
+        return _service
@@ -0,0 +1,133 @@
+"""
+Потоковый токенизатор JSON
+
+Файл читается кусками по JSON_CHUNK_SIZE байт и разбирается на токены
+регулярным выражением; в памяти хранится только необработанный хвост
+прочитанного куска. Строки отдаются в исходном виде (в кавычках) и
+декодируются только по запросу. Объект или массив, целиком поместившийся
+в прочитанный кусок, можно разобрать декодером json за один вызов.
+"""
+
+import re
+import json
+import codecs
+from typing import Any, BinaryIO, Iterator, Optional, Tuple
+
+# Размер куска при чтении JSON
+JSON_CHUNK_SIZE = 1024 * 1024
+
+# Токен JSON после пробелов: строка, скобка, разделитель или литерал (число, true, false, null)
+_JSON_TOKEN = re.compile(
+    r'[ \t\r\n]*(?:(?P<string>"[^"\\]*(?:\\.[^"\\]*)*")|(?P<bracket>[{}\[\]])|(?P<separator>[,:])'
+    r'|(?P<literal>[^ \t\r\n{}\[\],:"]+))')
+
+# Символы, значимые при пропуске контейнера: начало строки и скобки
+_SKIP_STOP = re.compile(r'["{}\[\]]')
+
+_JSON_DECODER = json.JSONDecoder()
+
+
+def decode_string(token: str) -> str:
+    """Значение строкового токена (в кавычках)"""
+    return json.loads(token)
+
+
+class JsonTokenizer:
+    """Токены JSON из потока байтов; разделители (',' и ':') пропускаются"""
+
+    def __init__(self, stream: BinaryIO, encoding: str = 'utf-8', chunk_size: int = JSON_CHUNK_SIZE):
+        self._stream = stream
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._chunk_size = chunk_size
+        self._buffer = ''
+        self._position = 0
+        self._final = False
+
+    def __iter__(self) -> Iterator[re.Match]:
+        return self
+
+    def _fill(self) -> bool:
+        """Чтение следующего куска в буфер (необработанный хвост сохраняется); False в конце потока"""
+        if self._final:
+            return False
+        chunk = self._stream.read(self._chunk_size)
+        self._final = not chunk
+        self._buffer = self._buffer[self._position:] + self._decoder.decode(chunk, final=self._final)
+        self._position = 0
+        return True
+
+    def __next__(self) -> re.Match:
+        """Следующий токен: группа string, bracket или literal"""
+        while True:
+            match = _JSON_TOKEN.match(self._buffer, self._position)
+            # Токен в конце буфера может быть обрезан границей куска
+            if match is None or (match.end() == len(self._buffer) and not self._final):
+                if self._fill():
+                    continue
+                rest = self._buffer[self._position:]
+                if rest.strip():
+                    raise ValueError(f"Некорректный JSON в позиции {self._position}: {rest[:40]!r}")
+                raise StopIteration
+            self._position = match.end()
+            if match.lastgroup != 'separator':
+                return match
+
+    def decode_container(self, opening: re.Match) -> Optional[Tuple[Any, str]]:
+        """
+        Разбор объекта или массива, открытого токеном opening, если он целиком в прочитанном куске:
+        (значение, исходный текст). None, если контейнер продолжается за пределами куска.
+        """
+        start = opening.start('bracket')
+        try:
+            value, end = _JSON_DECODER.raw_decode(self._buffer, start)
+        except ValueError:
+            return None
+        self._position = end
+        return value, self._buffer[start:end]
+
+    def _string_end(self, start: int) -> int:
+        """Позиция после закрывающей кавычки строки, начатой в start, или -1, если строка не закончилась в буфере"""
+        position = start + 1
+        while True:
+            quote = self._buffer.find('"', position)
+            if quote < 0:
+                return -1
+            # Кавычка экранирована, если перед ней нечетное число обратных слэшей
+            backslash = quote - 1
+            while self._buffer[backslash] == '\\':
+                backslash -= 1
+            if (quote - 1 - backslash) % 2 == 0:
+                return quote + 1
+            position = quote + 1
+
+    def skip_container(self):
+        """Пропуск остатка открытого объекта или массива: строки проходятся поиском кавычки, без токенизации"""
+        depth = 1
+        while True:
+            stop = _SKIP_STOP.search(self._buffer, self._position)
+            if stop is None:
+                # До конца буфера нет ни строк, ни скобок
+                self._position = len(self._buffer)
+                if not self._fill():
+                    raise ValueError("Некорректный JSON: незакрытый объект или массив")
+                continue
+            char = stop.group()
+            if char == '"':
+                end = self._string_end(stop.start())
+                if end < 0:
+                    self._position = stop.start()
+                    if not self._fill():
+                        raise ValueError("Некорректный JSON: незакрытая строка")
+                    continue
+                self._position = end
+            else:
+                self._position = stop.end()
+                depth += 1 if char in '{[' else -1
+                if depth == 0:
+                    return
+
+    def skip_value(self, first: re.Match):
+        """Пропуск значения, начатого токеном first"""
+        bracket = first.group('bracket')
+        if bracket in ('{', '[') and self.decode_container(first) is None:
+            self.skip_container()
@@ -0,0 +1,74 @@
+"""
+Сопоставление текста сразу с несколькими наборами ключевых слов
+
+Наборы ключевых слов подготавливаются один раз при создании KeywordMatcher:
+слова приводятся к нижнему регистру, из каждого набора удаляются слова,
+содержащие другое слово того же набора ('проанализируй' при наличии 'анализ'),
+а текст приводится к нижнему регистру один раз на все наборы.
+
+Поиск выполняется оператором in (быстрый поиск подстроки в C).
+Альтернатива в одном регулярном выражении (в том числе по префиксному дереву)
+в CPython оказалась в 1.4-2.6 раза медленнее: движок re проверяет каждую позицию
+текста, а первые символы ключевых слов покрывают почти весь алфавит.
+"""
+
+from typing import Dict, FrozenSet, Iterable, Mapping, Optional, Sequence, Set, Tuple
+
+
+def _minimize(keywords: Iterable[str]) -> Tuple[str, ...]:
+    """Слова набора без тех, что содержат другое слово набора (для проверки «есть ли хоть одно»)"""
+    unique = sorted(set(keywords), key=len)
+    minimal = []
+    for keyword in unique:
+        if not any(shorter in keyword for shorter in minimal):
+            minimal.append(keyword)
+    return tuple(minimal)
+
+
+class KeywordMatcher:
+    """Классификатор текста по именованным наборам ключевых слов (без учета регистра, поиск подстрок)"""
+
+    def __init__(self, keyword_sets: Mapping[str, Iterable[str]]):
+        self.keyword_sets: Dict[str, FrozenSet[str]] = {
+            name: frozenset(keyword.lower() for keyword in keywords) for name, keywords in keyword_sets.items()
+        }
+        # Минимальные наборы для проверки наличия
+        self._minimal: Dict[str, Tuple[str, ...]] = {
+            name: _minimize(keywords) for name, keywords in self.keyword_sets.items()
+        }
+        # Все различные слова для подсчета найденных
+        self._all_keywords: Tuple[str, ...] = tuple(sorted(set().union(*self.keyword_sets.values())))
+        self._any: Tuple[str, ...] = _minimize(self._all_keywords)
+
+    def classify(self, text: str) -> Set[str]:
+        """Имена наборов, хотя бы одно слово которых встречается в тексте"""
+        text = text.lower()
+        names = set()
+        for name, keywords in self._minimal.items():
+            for keyword in keywords:
+                if keyword in text:
+                    names.add(name)
+                    break
+        return names
+
+    def first_match(self, text: str, names: Sequence[str]) -> Optional[str]:
+        """Первый по порядку names набор, слово которого встречается в тексте"""
+        text = text.lower()
+        for name in names:
+            for keyword in self._minimal[name]:
+                if keyword in text:
+                    return name
+        return None
+
+    def contains_any(self, text: str) -> bool:
+        """Есть ли в тексте хотя бы одно ключевое слово любого набора"""
+        text = text.lower()
+        for keyword in self._any:
+            if keyword in text:
+                return True
+        return False
+
+    def find(self, text: str) -> Set[str]:
+        """Все различные ключевые слова, встречающиеся в тексте"""
+        text = text.lower()
+        return {keyword for keyword in self._all_keywords if keyword in text}
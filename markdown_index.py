@@ -0,0 +1,143 @@
+"""
+Структурный индекс Markdown-документа
+
+За один проход по строкам строится дерево секций: заголовки ATX (# ...) и
+Setext (подчеркивание === или ---), их уровни, родительские секции и границы
+в тексте, а также блоки кода (``` и ~~~). Строки внутри блоков кода
+заголовками не считаются. Индекс вычисляется один раз на файл и используется
+всеми экстракторами Markdown вместо конвертации в HTML и повторного разбиения.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import List, NamedTuple, Optional, Tuple
+
+# Заголовок ATX: 1-6 символов '#', затем пробел или конец строки
+_ATX_HEADING = re.compile(r'#{1,6}(?=[ \t]|$)')
+# Открытие блока кода: три и более ` или ~ (до трех пробелов отступа)
+_CODE_FENCE = re.compile(r' {0,3}(`{3,}|~{3,})')
+# Подчеркивание Setext: === (уровень 1) или --- (уровень 2)
+_SETEXT_UNDERLINE = re.compile(r' {0,3}(=+|-+)[ \t]*$')
+
+
+class MarkdownSection(NamedTuple):
+    """Секция документа: заголовок и тело до следующего заголовка"""
+    # Строка заголовка как в файле (None для вступления до первого заголовка)
+    heading: Optional[str]
+    title: str
+    # 0 для вступления, 1-6 для заголовков
+    level: int
+    # Индекс ближайшей секции верхнего уровня или None
+    parent: Optional[int]
+    # Границы секции и начало тела (после заголовка) в тексте
+    start: int
+    body_start: int
+    end: int
+
+
+class CodeBlock(NamedTuple):
+    """Блок кода: язык из строки открытия и границы в тексте (вместе с ограждением)"""
+    info: str
+    start: int
+    end: int
+
+
+@dataclass(frozen=True)
+class MarkdownIndex:
+    """Секции и блоки кода документа"""
+    text: str
+    sections: Tuple[MarkdownSection, ...]
+    code_blocks: Tuple[CodeBlock, ...]
+
+    def section_text(self, section: MarkdownSection) -> str:
+        """Текст секции вместе с заголовком"""
+        return self.text[section.start:section.end]
+
+    def body_text(self, section: MarkdownSection) -> str:
+        """Текст тела секции без заголовка"""
+        return self.text[section.body_start:section.end]
+
+    @property
+    def headings(self) -> List[str]:
+        """Заголовки документа по порядку"""
+        return [section.title for section in self.sections if section.level > 0]
+
+
+def _heading_title(line: str, marker_length: int) -> str:
+    """Текст заголовка ATX без маркеров и закрывающих '#'"""
+    title = line[marker_length:].strip()
+    stripped = title.rstrip('#')
+    # Закрывающая последовательность отделяется пробелом (## Заголовок ##)
+    if stripped != title and (not stripped or stripped[-1] in ' \t'):
+        title = stripped.rstrip()
+    return title
+
+
+def build_markdown_index(text: str) -> MarkdownIndex:
+    """Однопроходное построение индекса секций и блоков кода"""
+    # Заголовки: (строка, название, уровень, начало строки, конец строки заголовка)
+    headings: List[Tuple[str, str, int, int, int]] = []
+    code_blocks: List[CodeBlock] = []
+
+    fence: Optional[str] = None
+    fence_start = 0
+    fence_info = ''
+    # Предыдущая непустая строка обычного текста (кандидат в заголовок Setext)
+    previous: Optional[Tuple[str, int, int]] = None
+
+    position = 0
+    length = len(text)
+    while position < length:
+        newline = text.find('\n', position)
+        line_end = length if newline < 0 else newline + 1
+        line = text[position:line_end].rstrip('\r\n')
+
+        if fence is not None:
+            # Внутри блока кода: ищем закрывающее ограждение того же вида не короче открывающего
+            stripped = line.strip()
+            if stripped.startswith(fence) and stripped.strip(fence[0]) == '':
+                code_blocks.append(CodeBlock(fence_info, fence_start, line_end))
+                fence = None
+        else:
+            fence_match = _CODE_FENCE.match(line)
+            atx_match = _ATX_HEADING.match(line)
+            setext_match = _SETEXT_UNDERLINE.match(line) if previous is not None else None
+            if fence_match:
+                fence = fence_match.group(1)
+                fence_start = position
+                fence_info = line[fence_match.end():].strip()
+                previous = None
+            elif atx_match:
+                marker = atx_match.group()
+                headings.append((line, _heading_title(line, len(marker)), len(marker), position, line_end))
+                previous = None
+            elif setext_match:
+                title_line, title_start, _ = previous
+                level = 1 if setext_match.group(1)[0] == '=' else 2
+                headings.append((title_line, title_line.strip(), level, title_start, line_end))
+                previous = None
+            elif line.strip():
+                previous = (line, position, line_end)
+            else:
+                previous = None
+        position = line_end
+
+    if fence is not None:
+        # Незакрытый блок кода продолжается до конца документа
+        code_blocks.append(CodeBlock(fence_info, fence_start, length))
+
+    sections: List[MarkdownSection] = []
+    first_heading_start = headings[0][3] if headings else length
+    sections.append(MarkdownSection(None, '', 0, None, 0, 0, first_heading_start))
+
+    # Стек открытых секций для определения родителя: (уровень, индекс)
+    open_sections: List[Tuple[int, int]] = []
+    for number, (line, title, level, start, body_start) in enumerate(headings):
+        end = headings[number + 1][3] if number + 1 < len(headings) else length
+        while open_sections and open_sections[-1][0] >= level:
+            open_sections.pop()
+        parent = open_sections[-1][1] if open_sections else None
+        sections.append(MarkdownSection(line, title, level, parent, start, body_start, end))
+        open_sections.append((level, len(sections) - 1))
+
+    return MarkdownIndex(text, tuple(sections), tuple(code_blocks))
@@ -0,0 +1,235 @@
+"""
+Потоковое чтение файлов разметки (BPMN, XML, HTML)
+
+Документ читается из потока кусками и не строится в памяти целиком:
+XML и BPMN разбираются через iterparse, обработанные элементы сразу удаляются
+из дерева; HTML разбирается HTMLParser по мере чтения. Собирается текст
+элементов (до MARKUP_TEXT_LIMIT символов) и структура документа: процессы,
+задачи, шлюзы и дорожки BPMN, корень и частые элементы XML, заголовок и
+заголовки разделов HTML. Память не зависит от размера файла.
+"""
+
+import codecs
+import xml.etree.ElementTree as ET
+from collections import Counter
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+# Сколько символов текста документа сохраняется
+MARKUP_TEXT_LIMIT = 200_000
+
+# Сколько имен сохраняется в каждой группе структуры
+MARKUP_NAME_LIMIT = 1000
+
+# Размер куска при чтении HTML
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Сколько самых частых элементов XML попадает в структуру
+XML_TOP_ELEMENTS = 20
+
+HTML_EXTENSIONS = frozenset({'.html', '.htm'})
+
+# Группы структуры BPMN в порядке вывода
+BPMN_GROUPS = ('BPMN Processes', 'Tasks', 'Gateways', 'Lanes')
+
+_HTML_SKIPPED_TAGS = frozenset({'script', 'style', 'noscript', 'template'})
+_HTML_HEADING_TAGS = frozenset({'h1', 'h2', 'h3'})
+
+
+@dataclass(frozen=True)
+class MarkupDocument:
+    """Текст и структура документа разметки"""
+    # 'bpmn', 'xml' или 'html'
+    kind: str
+    text: str
+    # Был ли текст обрезан по MARKUP_TEXT_LIMIT
+    truncated: bool
+    # Группы структуры: (название, имена)
+    groups: Tuple[Tuple[str, Tuple[str, ...]], ...]
+
+    def group(self, label: str) -> Tuple[str, ...]:
+        """Имена группы структуры по названию"""
+        for name, values in self.groups:
+            if name == label:
+                return values
+        return ()
+
+    @property
+    def outline(self) -> str:
+        """Структура документа: строка на каждую непустую группу"""
+        return "\n".join(f"{label}: {', '.join(values)}" for label, values in self.groups if values)
+
+
+class _TextCollector:
+    """Накопление фрагментов текста до заданного количества символов"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.parts: List[str] = []
+        self.size = 0
+        self.truncated = False
+
+    def add(self, piece: Optional[str]):
+        if not piece or self.truncated:
+            return
+        piece = piece.strip()
+        if not piece:
+            return
+        if self.size + len(piece) > self.limit:
+            piece = piece[:max(self.limit - self.size, 0)]
+            self.truncated = True
+        self.parts.append(piece)
+        self.size += len(piece) + 1
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.parts)
+
+
+class _NameGroups:
+    """Уникальные имена по группам в порядке появления (не больше MARKUP_NAME_LIMIT на группу)"""
+
+    def __init__(self, labels: Tuple[str, ...], limit: int = MARKUP_NAME_LIMIT):
+        self.limit = limit
+        self.names: Dict[str, Dict[str, None]] = {label: {} for label in labels}
+
+    def add(self, label: str, name: Optional[str]):
+        name = (name or '').strip()
+        names = self.names[label]
+        if name and len(names) < self.limit:
+            names.setdefault(name, None)
+
+    def freeze(self) -> Tuple[Tuple[str, Tuple[str, ...]], ...]:
+        return tuple((label, tuple(names)) for label, names in self.names.items())
+
+
+def _split_tag(tag: str) -> Tuple[str, str]:
+    """Пространство имен и локальное имя элемента"""
+    if tag.startswith('{'):
+        namespace, _, local = tag[1:].partition('}')
+        return namespace, local
+    return '', tag
+
+
+def _bpmn_group(local: str) -> Optional[str]:
+    """Группа структуры BPMN для элемента по локальному имени"""
+    if local == 'process':
+        return 'BPMN Processes'
+    if local == 'task' or local.endswith('Task') or local in ('subProcess', 'callActivity'):
+        return 'Tasks'
+    if local.endswith('Gateway'):
+        return 'Gateways'
+    if local == 'lane':
+        return 'Lanes'
+    return None
+
+
+def read_xml(stream: BinaryIO, bpmn: bool = False, text_limit: int = MARKUP_TEXT_LIMIT) -> MarkupDocument:
+    """Потоковый разбор XML; BPMN определяется по пространству имен корня или флагу bpmn"""
+    text = _TextCollector(text_limit)
+    groups = _NameGroups(BPMN_GROUPS)
+    counts: Counter = Counter()
+    root_name = ''
+    stack: List[ET.Element] = []
+    # Текст элемента и хвост после него заполняются к следующему событию разбора,
+    # поэтому обработка предыдущего события откладывается на один шаг
+    pending: Optional[Tuple[str, ET.Element]] = None
+
+    for event, element in ET.iterparse(stream, events=('start', 'end')):
+        if pending is not None:
+            pending_event, pending_element = pending
+            if pending_event == 'start':
+                text.add(pending_element.text)
+            else:
+                text.add(pending_element.tail)
+                # Обработанный элемент - всегда первый оставшийся потомок родителя
+                if stack:
+                    stack[-1].remove(pending_element)
+            pending = None
+
+        if event == 'start':
+            if not stack:
+                namespace, root_name = _split_tag(element.tag)
+                bpmn = bpmn or 'BPMN' in namespace.upper()
+            stack.append(element)
+        else:
+            stack.pop()
+            _, local = _split_tag(element.tag)
+            counts[local] += 1
+            if bpmn:
+                label = _bpmn_group(local)
+                if label is not None:
+                    groups.add(label, element.get('name'))
+        pending = (event, element)
+
+    if bpmn:
+        return MarkupDocument('bpmn', text.text, text.truncated, groups.freeze())
+    elements = tuple(f"{name} ({count})" for name, count in counts.most_common(XML_TOP_ELEMENTS))
+    return MarkupDocument('xml', text.text, text.truncated, (('XML Root', (root_name,)), ('Elements', elements)))
+
+
+class _HtmlTextParser(HTMLParser):
+    """Текст страницы без скриптов и стилей, заголовок и заголовки разделов"""
+
+    def __init__(self, text_limit: int):
+        super().__init__(convert_charrefs=True)
+        self.text = _TextCollector(text_limit)
+        self.groups = _NameGroups(('Title', 'Headings'))
+        self._skip_depth = 0
+        # Текст между тегами может прийти несколькими вызовами handle_data (граница куска)
+        self._data: List[str] = []
+        # Захватываемый элемент (title или h1-h3): (тег, группа, фрагменты)
+        self._capture: Optional[Tuple[str, str, List[str]]] = None
+
+    def _flush_data(self):
+        if self._data:
+            self.text.add("".join(self._data))
+            self._data.clear()
+
+    def handle_starttag(self, tag, attrs):
+        self._flush_data()
+        if tag in _HTML_SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag == 'title' or tag in _HTML_HEADING_TAGS:
+            self._capture = (tag, 'Title' if tag == 'title' else 'Headings', [])
+
+    def handle_endtag(self, tag):
+        self._flush_data()
+        if tag in _HTML_SKIPPED_TAGS:
+            self._skip_depth = max(self._skip_depth - 1, 0)
+        elif self._capture is not None and self._capture[0] == tag:
+            _, label, parts = self._capture
+            self.groups.add(label, " ".join("".join(parts).split()))
+            self._capture = None
+
+    def close(self):
+        super().close()
+        self._flush_data()
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        self._data.append(data)
+        if self._capture is not None:
+            self._capture[2].append(data)
+
+
+def read_html(stream: BinaryIO, encoding: str = 'utf-8', text_limit: int = MARKUP_TEXT_LIMIT) -> MarkupDocument:
+    """Потоковый разбор HTML кусками по STREAM_CHUNK_SIZE байт"""
+    parser = _HtmlTextParser(text_limit)
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    while True:
+        chunk = stream.read(STREAM_CHUNK_SIZE)
+        parser.feed(decoder.decode(chunk, final=not chunk))
+        if not chunk:
+            break
+    parser.close()
+    return MarkupDocument('html', parser.text.text, parser.text.truncated, parser.groups.freeze())
+
+
+def read_markup(stream: BinaryIO, ext: str, encoding: str = 'utf-8') -> MarkupDocument:
+    """Разбор документа разметки по расширению: HTML или XML (BPMN для .bpmn и пространства имен BPMN)"""
+    if ext in HTML_EXTENSIONS:
+        return read_html(stream, encoding)
+    return read_xml(stream, bpmn=ext == '.bpmn')
@@ -0,0 +1,152 @@
+"""
+Модель Jupyter-ноутбука (.ipynb), общая для всех экстракторов
+
+Ноутбук читается потоково токенизатором JSON: из каждой ячейки берутся только
+тип и исходный текст, а выводы (outputs), вложения с изображениями и метаданные
+ячеек пропускаются и не сохраняются. Поэтому память определяется исходным
+кодом ячеек, а не размером сохраненных результатов.
+Код ячеек очищается от магических команд IPython, чтобы его можно было
+разобрать как Python.
+"""
+
+import re
+import ast
+from dataclasses import dataclass
+from typing import BinaryIO, List, NamedTuple, Optional, Tuple
+
+from json_stream import JsonTokenizer, decode_string
+from python_symbols import PythonSymbols, collect_python_symbols
+
+# Клеточные магии, тело которых остается кодом Python (первая строка отбрасывается)
+PYTHON_CELL_MAGICS = frozenset({'time', 'timeit', 'capture', 'prun'})
+
+# Строчная магия (%pip, !ls, files = !ls) или справка (obj?, ??obj) - строка заменяется пустой
+_LINE_MAGIC = re.compile(r'^\s*(?:[%!]|[\w.,\s]+=\s*[%!]|\?{1,2}[\w.]+\s*$|[\w.]+\?{1,2}\s*$)')
+
+
+class NotebookCell(NamedTuple):
+    """Ячейка ноутбука: номер (с нуля), тип (code, markdown, raw) и исходный текст"""
+    index: int
+    cell_type: str
+    source: str
+
+
+@dataclass(frozen=True)
+class Notebook:
+    """Ячейки ноутбука в порядке следования и язык ядра"""
+    cells: Tuple[NotebookCell, ...]
+    language: str = 'python'
+
+    @property
+    def code_cells(self) -> List[NotebookCell]:
+        """Ячейки кода"""
+        return [cell for cell in self.cells if cell.cell_type == 'code']
+
+    @property
+    def markdown_cells(self) -> List[NotebookCell]:
+        """Ячейки Markdown"""
+        return [cell for cell in self.cells if cell.cell_type == 'markdown']
+
+
+def python_cell_source(source: str) -> str:
+    """Код ячейки без магических команд IPython ('' для ячеек с клеточной магией не на Python)"""
+    lines = source.split('\n')
+    if lines and lines[0].startswith('%%'):
+        magic = lines[0][2:].split(maxsplit=1)
+        if not magic or magic[0] not in PYTHON_CELL_MAGICS:
+            return ''
+        lines[0] = ''
+    # Номера строк сохраняются: магии заменяются пустыми строками
+    return '\n'.join('' if _LINE_MAGIC.match(line) else line for line in lines)
+
+
+def _read_source(tokens: JsonTokenizer, first) -> str:
+    """Исходный текст ячейки: строка или список строк"""
+    if first.lastgroup == 'string':
+        return decode_string(first.group('string'))
+    if first.group('bracket') != '[':
+        tokens.skip_value(first)
+        return ''
+    parts = []
+    for token in tokens:
+        if token.lastgroup == 'string':
+            parts.append(decode_string(token.group('string')))
+        elif token.group('bracket') == ']':
+            break
+        else:
+            tokens.skip_value(token)
+    return ''.join(parts)
+
+
+def _read_cell(tokens: JsonTokenizer, index: int) -> NotebookCell:
+    """Ячейка после открывающей скобки: тип и исходный текст, остальные поля пропускаются"""
+    cell_type, source = '', ''
+    for token in tokens:
+        if token.group('bracket') == '}':
+            break
+        key = decode_string(token.group('string'))
+        value = next(tokens)
+        if key == 'cell_type' and value.lastgroup == 'string':
+            cell_type = decode_string(value.group('string'))
+        elif key == 'source':
+            source = _read_source(tokens, value)
+        else:
+            # outputs, attachments, metadata пропускаются
+            tokens.skip_value(value)
+    return NotebookCell(index, cell_type, source)
+
+
+def _kernel_language(metadata) -> str:
+    """Язык ядра из метаданных ноутбука"""
+    if not isinstance(metadata, dict):
+        return 'python'
+    kernelspec = metadata.get('kernelspec') or {}
+    language_info = metadata.get('language_info') or {}
+    return str(kernelspec.get('language') or language_info.get('name') or 'python').lower()
+
+
+def read_notebook(stream: BinaryIO) -> Notebook:
+    """Потоковое чтение ячеек ноутбука"""
+    tokens = JsonTokenizer(stream)
+    opening = next(tokens)
+    if opening.group('bracket') != '{':
+        raise ValueError("Ноутбук должен быть JSON-объектом")
+
+    cells: List[NotebookCell] = []
+    language = 'python'
+    for token in tokens:
+        if token.group('bracket') == '}':
+            break
+        key = decode_string(token.group('string'))
+        value = next(tokens)
+        if key == 'cells' and value.group('bracket') == '[':
+            for cell_token in tokens:
+                if cell_token.group('bracket') == ']':
+                    break
+                if cell_token.group('bracket') == '{':
+                    cells.append(_read_cell(tokens, len(cells)))
+                else:
+                    tokens.skip_value(cell_token)
+        elif key == 'metadata' and value.group('bracket') == '{':
+            decoded = tokens.decode_container(value)
+            if decoded is None:
+                tokens.skip_container()
+            else:
+                language = _kernel_language(decoded[0])
+        else:
+            tokens.skip_value(value)
+    return Notebook(tuple(cells), language)
+
+
+def notebook_cell_symbols(notebook: Notebook) -> Tuple[Tuple[NotebookCell, Optional[PythonSymbols]], ...]:
+    """Символы ячеек кода по одному разбору AST на ячейку (None, если ячейка не разбирается как Python)"""
+    result = []
+    for cell in notebook.code_cells:
+        symbols = None
+        if notebook.language == 'python':
+            try:
+                symbols = collect_python_symbols(ast.parse(python_cell_source(cell.source)))
+            except SyntaxError:
+                pass
+        result.append((cell, symbols))
+    return tuple(result)
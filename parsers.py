@@ -1,78 +1,177 @@
 import os
-import ast
 import re
-import astunparse
-from typing import List, Dict
-import PyPDF2
+from types import MappingProxyType
+from typing import List, Dict, Any, Mapping, Optional
 import logging
-from docx import Document
-import xml.etree.ElementTree as ET  # Для XML
+from concurrent.futures import ThreadPoolExecutor
 import markdown  # Для MD (pip install markdown)
-# Для Java: используйте javalang (pip install javalang)
-from langchain_community.document_loaders import TextLoader
-import javalang
-import csv
 import pandas as pd
-from openpyxl import load_workbook
+
+from file_context import FileSource, as_file_context
+from scanners import scan_string_literals, get_literal_syntax
+from keyword_matcher import KeywordMatcher
+from markup_model import MARKUP_TEXT_LIMIT
+from structured_prompts import iter_structured_prompts
+from markdown_index import MarkdownIndex, build_markdown_index
+from java_model import get_java_analysis_service
+from c_model import C_EXTENSIONS
+from text_encoding import sniff_file_encoding
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Директории, которые не обходятся при сканировании проекта
+EXCLUDED_DIRS = frozenset({'.git', '__pycache__', 'node_modules'})
+
+# Файлы больше этого размера пропускаются
+MAX_FILE_SIZE = 10 * 1024 * 1024
+
+# Бинарные форматы, которые не читаются как текст
+BINARY_EXTENSIONS = frozenset({'.docx', '.pdf', '.xlsx', '.xls'})
+
+# Потоки для определения кодировок текстовых файлов при обходе проекта
+ENCODING_SNIFF_WORKERS = 4
+
+# Форматы данных, промпты которых извлекаются потоковым обходом ключей (см. structured_prompts)
+STRUCTURED_EXTENSIONS = frozenset({'.json', '.yaml', '.yml'})
+
+# Форматы разметки, которые разбираются потоково (см. markup_model)
+MARKUP_EXTENSIONS = frozenset({'.xml', '.bpmn', '.html', '.htm'})
 
-def extract_dependencies(file_path: str) -> Dict[str, List[str]]:
-    """Извлечение зависимостей библиотек и функций из файла кода"""
+# Версии экстракторов для кэша результатов: увеличивайте при изменении логики извлечения
+EXTRACTOR_VERSIONS = {
+    "extract_dependencies": 7,
+    "extract_prompts": 11,
+    "load_requirements": 8,
+    "extract_business_requirements": 7,
+    "extract_project_description": 5,
+}
+
+# Наборы ключевых слов подготавливаются один раз при импорте (см. keyword_matcher)
+PROMPT_MATCHER = KeywordMatcher({
+    # Ключевые слова, указывающие на промпт
+    "prompt": [
+        'analyze', 'анализ', 'анализируй', 'проанализируй',
+        'задача', 'task', 'цель', 'goal',
+        'ты', 'you are', 'вы являетесь',
+        'assistant', 'ассистент', 'помощник',
+        'system', 'системный',
+        'user', 'пользователь',
+        'instruction', 'инструкция',
+        'prompt', 'промпт',
+        'template', 'шаблон',
+        'генерируй', 'generate',
+        'создай', 'create',
+        'опиши', 'describe',
+        'объясни', 'explain',
+        'сформируй', 'form'
+    ],
+    # Исключения (не промпты)
+    "exclude": [
+        'import ', 'from ', 'class ', 'def ', 'return',
+        'print(', 'console.log', 'logger.',
+        'http://', 'https://', 'www.',
+        '#!/', '#include', '/*', '*/',
+    ],
+    # Инструкции без явных ключевых слов
+    "instruction": ['следующ', 'based on', 'на основе'],
+})
+
+# Маркеры начала промпта в текстовых документах
+PROMPT_MARKER_MATCHER = KeywordMatcher({
+    "marker": ['prompt:', 'промпт:', 'system:', 'user:', 'assistant:', 'задача:', 'task:'],
+})
+
+# Колонки таблиц с промптами
+PROMPT_COLUMN_MATCHER = KeywordMatcher({
+    "prompt": ['prompt', 'промпт', 'template', 'шаблон', 'message', 'сообщение', 'system', 'user', 'assistant'],
+})
+
+# Колонки таблиц с требованиями (для Excel дополнительно учитываются агенты и роли)
+REQUIREMENT_COLUMN_MATCHER = KeywordMatcher({
+    "requirement": ['требован', 'описан', 'задач', 'функци', 'специф', 'requirement', 'description', 'task',
+                    'feature', 'spec'],
+    "agent": ['агент', 'agent', 'роль', 'role'],
+})
+
+# Колонки таблиц с бизнес-информацией (для Excel дополнительно агенты и сценарии)
+BUSINESS_COLUMN_MATCHER = KeywordMatcher({
+    "business": [
+        'требование', 'requirement', 'описание', 'description',
+        'функция', 'function', 'процесс', 'process', 'роль', 'role',
+        'задача', 'task', 'цель', 'goal', 'бизнес', 'business'
+    ],
+    "scenario": ['агент', 'agent', 'сценарий', 'scenario'],
+})
+
+# Заголовки разделов с бизнес-требованиями по форматам документов
+BUSINESS_SECTION_MATCHER = KeywordMatcher({
+    "docx": [
+        'требования', 'requirements', 'бизнес', 'business',
+        'функциональные', 'functional', 'нефункциональные', 'non-functional',
+        'пользовательские истории', 'user stories', 'use case',
+        'процесс', 'process', 'workflow', 'сценарий', 'scenario',
+        'описание системы', 'system description', 'архитектура', 'architecture'
+    ],
+    "pdf": [
+        'требования', 'requirements', 'бизнес', 'business',
+        'функциональные', 'functional', 'техническое задание', 'tz',
+        'спецификация', 'specification', 'архитектура', 'architecture'
+    ],
+    "markdown": ['требования', 'business', 'архитектура', 'описание', 'функции', 'features'],
+})
+
+
+def extract_dependencies(source: FileSource) -> Dict[str, List[str]]:
+    """Извлечение зависимостей экстрактором языка файла (по таблице DEPENDENCY_EXTRACTORS)"""
+    context = as_file_context(source)
+    entry = DEPENDENCY_EXTRACTORS.get(context.ext)
+    if entry is None:
+        return {"libraries": [], "functions": []}
+    _, extractor = entry
+    return extractor(context)
+
+
+def extract_python_dependencies(source: FileSource) -> Dict[str, List[str]]:
+    """Извлечение зависимостей библиотек и функций из Python-файла"""
+    context = as_file_context(source)
     dependencies = {"libraries": [], "functions": []}
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-            tree = ast.parse(content)
-
-        # Извлечение импортов
-        for node in ast.walk(tree):
-            if isinstance(node, (ast.Import, ast.ImportFrom)):
-                for name in getattr(node, 'names', []):
-                    dependencies["libraries"].append(name.name)
-
-        # Извлечение определений функций и их вызовов
-        for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef):
-                dependencies["functions"].append(node.name)
-            elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
-                dependencies["functions"].append(node.func.id)
-
-        # Удаление дубликатов
-        dependencies["libraries"] = list(set(dependencies["libraries"]))
-        dependencies["functions"] = list(set(dependencies["functions"]))
-
+        symbols = context.python_symbols
+        dependencies["libraries"] = list(symbols.imports)
+        # Определения функций и имена вызовов без дубликатов
+        dependencies["functions"] = list(dict.fromkeys(symbols.functions + symbols.calls))
     except Exception as e:
-        logger.error(f"Ошибка при анализе зависимостей {file_path}: {e}")
+        logger.error(f"Ошибка при анализе зависимостей {context.path}: {e}")
     return dependencies
 
 
-def load_requirements(file_path: str, batch_size: int = 1000) -> str:
-    """Загрузка бизнес-требований из текстовых файлов"""
-    ext = os.path.splitext(file_path)[1].lower()
+def load_requirements(source: FileSource, batch_size: int = 1000) -> str:
+    """Загрузка бизнес-требований из текстовых файлов (batch_size ограничивает выборку записей CSV/Excel)"""
+    context = as_file_context(source)
+    ext = context.ext
     try:
         if ext == '.pdf':
-            return extract_text_from_pdf(file_path, batch_size)
+            return extract_text_from_pdf(context)
         elif ext == '.docx':
-            return extract_text_from_docx(file_path, batch_size)
+            return extract_text_from_docx(context)
         elif ext == '.txt':
-            return extract_text_from_txt(file_path, batch_size)
+            return extract_text_from_txt(context)
         elif ext == '.md':
-            return parse_md(file_path, batch_size)
+            return parse_md(context)
+        elif ext in MARKUP_EXTENSIONS:
+            return extract_text_from_markup(context)
+        elif ext == '.ipynb':
+            return extract_text_from_notebook(context)
         elif ext == '.csv':
-            return extract_csv_requirements(file_path, batch_size)
+            return extract_csv_requirements(context, batch_size)
         elif ext in ['.xlsx', '.xls']:
-            return extract_excel_requirements(file_path, batch_size)
+            return extract_excel_requirements(context, batch_size)
         else:
-            loader = TextLoader(file_path, encoding='utf-8')
-            docs = loader.load()
-            text = "\n".join([doc.page_content for doc in docs])
-            return "\n".join([text[i:i + batch_size] for i in range(0, len(text), batch_size)])
+            return context.text
     except Exception as e:
-        logger.error(f"Ошибка при загрузке требований из {file_path}: {e}")
+        logger.error(f"Ошибка при загрузке требований из {context.path}: {e}")
         return f"Ошибка загрузки: {str(e)}"
 
 
@@ -87,131 +186,109 @@ def get_project_structure(directory_path: str) -> Dict[str, List[str]]:
     return structure
 
 
-def extract_text_from_pdf(file_path: str, batch_size: int = 1000) -> str:
-    """Извлечение текста из PDF файла с батчевой обработкой"""
+def extract_text_from_pdf(source: FileSource) -> str:
+    """Извлечение текста из PDF файла: страницы через перевод строки"""
+    context = as_file_context(source)
     try:
-        with open(file_path, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
-            text = ""
-            for page_num in range(len(reader.pages)):
-                page_text = reader.pages[page_num].extract_text() or ""
-                # Обрабатываем текст батчами
-                for i in range(0, len(page_text), batch_size):
-                    text += page_text[i:i + batch_size] + "\n"
-            return text
+        return context.pdf_text.text
     except Exception as e:
-        logger.error(f"Ошибка при извлечении текста из PDF {file_path}: {e}")
+        logger.error(f"Ошибка при извлечении текста из PDF {context.path}: {e}")
         return f"Ошибка извлечения: {str(e)}"
 
 
-def extract_text_from_docx(file_path: str, batch_size: int = 1000) -> str:
-    """Извлечение текста из DOCX файла с батчевой обработкой"""
+def extract_text_from_docx(source: FileSource) -> str:
+    """Извлечение текста из DOCX файла: параграфы и строки таблиц"""
+    context = as_file_context(source)
     try:
-        doc = Document(file_path)
-        text = ""
-        full_text = "\n".join([para.text for para in doc.paragraphs])
-        # Обрабатываем текст батчами
-        for i in range(0, len(full_text), batch_size):
-            text += full_text[i:i + batch_size] + "\n"
-        return text
+        return context.docx_document.text
     except Exception as e:
-        logger.error(f"Ошибка при извлечении текста из DOCX {file_path}: {e}")
+        logger.error(f"Ошибка при извлечении текста из DOCX {context.path}: {e}")
         return f"Ошибка извлечения: {str(e)}"
 
 
-def extract_text_from_txt(file_path: str, batch_size: int = 1000) -> str:
-    """Извлечение текста из TXT файла с батчевой обработкой"""
+def extract_text_from_txt(source: FileSource) -> str:
+    """Извлечение текста из TXT файла"""
+    context = as_file_context(source)
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            content = file.read()
-            text = ""
-            # Обрабатываем текст батчами
-            for i in range(0, len(content), batch_size):
-                text += content[i:i + batch_size] + "\n"
-            return text
+        return context.text
     except Exception as e:
-        logger.error(f"Ошибка при извлечении текста из TXT {file_path}: {e}")
+        logger.error(f"Ошибка при извлечении текста из TXT {context.path}: {e}")
         return f"Ошибка извлечения: {str(e)}"
 
 
-def extract_csv_requirements(file_path: str, batch_size: int = 1000) -> str:
+def format_records(frame: pd.DataFrame, columns: List[Any], skip_blank: bool = True) -> pd.Series:
+    """Тексты записей 'Запись N:' со значениями выбранных колонок (форматирование по колонкам, без iterrows)"""
+    records = pd.Series([f"Запись {number}:\n" for number in range(1, len(frame) + 1)], index=frame.index, dtype=object)
+    for col in columns:
+        values = frame[col]
+        text = values.astype(str)
+        filled = values.notna()
+        if skip_blank:
+            filled &= text.str.strip().ne('')
+        records += (f"  {col}: " + text + "\n").where(filled, "")
+    return records + "\n"
+
+
+def extract_csv_requirements(source: FileSource, batch_size: int = 1000) -> str:
     """Извлечение требований из CSV файла"""
+    context = as_file_context(source)
     try:
         requirements_text = ""
 
-        # Читаем CSV с помощью pandas для лучшей обработки
-        try:
-            df = pd.read_csv(file_path, encoding='utf-8')
-        except UnicodeDecodeError:
-            df = pd.read_csv(file_path, encoding='cp1251')
+        # Один разбор первых строк CSV на все экстракторы
+        table = context.csv_table
+        df = table.frame
 
         # Ищем колонки с требованиями, описаниями, задачами
         requirement_columns = []
         for col in df.columns:
-            col_lower = col.lower()
-            if any(keyword in col_lower for keyword in
-                   ['требован', 'описан', 'задач', 'функци', 'специф', 'requirement', 'description', 'task', 'feature',
-                    'spec']):
+            if "requirement" in REQUIREMENT_COLUMN_MATCHER.classify(str(col)):
                 requirement_columns.append(col)
 
         if requirement_columns:
-            requirements_text += f"CSV файл содержит {len(df)} записей с требованиями:\n\n"
-
-            for idx, row in df.iterrows():
-                requirements_text += f"Запись {idx + 1}:\n"
-                for col in requirement_columns:
-                    if pd.notna(row[col]) and str(row[col]).strip():
-                        requirements_text += f"  {col}: {str(row[col])}\n"
-                requirements_text += "\n"
-
-                # Батчевая обработка
-                if len(requirements_text) >= batch_size:
-                    break
+            requirements_text += f"CSV файл содержит {table.row_count} записей с требованиями:\n\n"
+
+            # Батчевая обработка: записи до первой, на которой текст достигает batch_size
+            records = format_records(df, requirement_columns)
+            text_lengths = records.str.len().cumsum() + len(requirements_text)
+            stop = int(text_lengths.searchsorted(batch_size)) + 1
+            requirements_text += "".join(records.iloc[:stop])
         else:
             # Если специальных колонок нет, берем все текстовые данные
-            requirements_text += f"CSV файл с {len(df)} записями:\n"
+            requirements_text += f"CSV файл с {table.row_count} записями:\n"
             requirements_text += df.to_string(max_rows=20)
 
         return requirements_text
     except Exception as e:
-        logger.error(f"Ошибка при извлечении требований из CSV {file_path}: {e}")
+        logger.error(f"Ошибка при извлечении требований из CSV {context.path}: {e}")
         return f"Ошибка CSV: {str(e)}"
 
 
-def extract_excel_requirements(file_path: str, batch_size: int = 1000) -> str:
+def extract_excel_requirements(source: FileSource, batch_size: int = 1000) -> str:
     """Извлечение требований из Excel файла"""
+    context = as_file_context(source)
     try:
         requirements_text = ""
 
-        # Читаем Excel файл
-        try:
-            df = pd.read_excel(file_path, engine='openpyxl')
-        except Exception:
-            # Пробуем другие движки
-            df = pd.read_excel(file_path, engine='xlrd')
-
-        # Получаем информацию о листах
-        xl_file = pd.ExcelFile(file_path)
-        sheet_names = xl_file.sheet_names
+        # Книга открывается один раз: заголовки и первые строки каждого листа
+        workbook = context.workbook
 
-        requirements_text += f"Excel файл с листами: {', '.join(sheet_names)}\n\n"
+        requirements_text += f"Excel файл с листами: {', '.join(workbook.sheet_names)}\n\n"
 
         # Обрабатываем каждый лист
-        for sheet_name in sheet_names:
-            sheet_df = pd.read_excel(file_path, sheet_name=sheet_name)
+        for sheet in workbook.sheets:
+            sheet_name = sheet.name
+            sheet_df = sheet.frame
 
             # Ищем колонки с требованиями
             requirement_columns = []
             for col in sheet_df.columns:
                 if pd.notna(col):  # Проверяем, что название колонки не NaN
-                    col_lower = str(col).lower()
-                    if any(keyword in col_lower for keyword in
-                           ['требован', 'описан', 'задач', 'функци', 'специф', 'requirement', 'description', 'task',
-                            'feature', 'spec', 'агент', 'agent', 'роль', 'role']):
+                    if REQUIREMENT_COLUMN_MATCHER.contains_any(str(col)):
                         requirement_columns.append(col)
 
             if requirement_columns:
-                requirements_text += f"\nЛист '{sheet_name}' содержит {len(sheet_df)} записей:\n"
+                requirements_text += f"\nЛист '{sheet_name}' содержит {sheet.row_count} записей:\n"
 
                 for idx, row in sheet_df.iterrows():
                     if idx >= 50:  # Ограничиваем количество строк
@@ -238,111 +315,132 @@ def extract_excel_requirements(file_path: str, batch_size: int = 1000) -> str:
 
         return requirements_text
     except Exception as e:
-        logger.error(f"Ошибка при извлечении требований из Excel {file_path}: {e}")
+        logger.error(f"Ошибка при извлечении требований из Excel {context.path}: {e}")
         return f"Ошибка Excel: {str(e)}"
 
 
-def extract_prompts(file_path: str) -> List[str]:
+def extract_prompts(source: FileSource) -> List[str]:
     """
     Извлечение промптов из файлов кода и документов с обработкой сложных структур.
     Расширенная версия для поддержки различных типов файлов.
     """
+    context = as_file_context(source)
     prompts = set()
-    ext = os.path.splitext(file_path)[1].lower()
+    ext = context.ext
 
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # Обработка по типу файла
-        if ext == '.py':
-            prompts.update(extract_prompts_from_python(content, file_path))
-        elif ext in ['.js', '.ts']:
-            prompts.update(extract_prompts_from_javascript(content))
-        elif ext in ['.java']:
-            prompts.update(extract_prompts_from_java(content))
-        elif ext in ['.md', '.txt']:
-            prompts.update(extract_prompts_from_text(content))
-        elif ext in ['.docx']:
-            prompts.update(extract_prompts_from_docx(file_path))
+        # Бинарные документы разбираются своими парсерами, без чтения как текста
+        if ext in ['.docx']:
+            prompts.update(extract_prompts_from_docx(context))
         elif ext == '.pdf':
-            prompts.update(extract_prompts_from_pdf(file_path))
-        elif ext in ['.csv', '.xlsx', '.xls']:
-            prompts.update(extract_prompts_from_spreadsheet(file_path))
-
-        # Общий поиск по регулярным выражениям для всех типов файлов
-        prompts.update(extract_prompts_with_regex(content))
+            prompts.update(extract_prompts_from_pdf(context))
+        elif ext in ['.xlsx', '.xls']:
+            prompts.update(extract_prompts_from_spreadsheet(context))
+        elif ext in STRUCTURED_EXTENSIONS:
+            # JSON/YAML не читаются как текст: обходятся только значения под ключами промптов
+            prompts.update(extract_prompts_from_structured(context))
+        elif ext == '.ipynb':
+            # Ноутбук не читается как текст: выводы ячеек не просматриваются
+            prompts.update(extract_prompts_from_notebook(context))
+
+        if ext not in BINARY_EXTENSIONS and ext not in STRUCTURED_EXTENSIONS and ext != '.ipynb':
+            content = context.text
+
+            # Обработка по типу файла
+            if ext == '.py':
+                prompts.update(extract_prompts_from_python(context))
+            elif ext in ['.js', '.ts']:
+                prompts.update(extract_prompts_from_javascript(content))
+            elif ext in ['.java']:
+                prompts.update(extract_prompts_from_java(context))
+            elif ext in C_EXTENSIONS:
+                prompts.update(extract_prompts_from_c(context))
+            elif ext in ['.md', '.txt']:
+                prompts.update(extract_prompts_from_text(content))
+            elif ext == '.csv':
+                prompts.update(extract_prompts_from_spreadsheet(context))
+
+            # Поиск по строковым литералам для остальных текстовых файлов
+            if ext not in ('.py', '.js', '.ts', '.java') and ext not in C_EXTENSIONS:
+                prompts.update(extract_prompts_from_literals(content, get_literal_syntax(context.path)))
 
     except Exception as e:
-        logger.error(f"Ошибка при извлечении промптов из {file_path}: {e}")
+        logger.error(f"Ошибка при извлечении промптов из {context.path}: {e}")
 
     return list(prompts)
 
 
-def extract_prompts_from_python(content: str, file_path: str) -> set:
-    """Извлечение промптов из Python файлов"""
+def extract_prompts_from_structured(source: FileSource) -> set:
+    """Извлечение промптов из JSON/YAML: строки под ключами промптов с путями ключей"""
+    context = as_file_context(source)
     prompts = set()
-
     try:
-        tree = ast.parse(content, filename=file_path)
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Str):
-                prompt_text = astunparse.unparse(node).strip().strip('\'"')
-                if is_likely_prompt(prompt_text):
-                    cleaned_prompt = ' '.join(prompt_text.strip().split())
-                    if len(cleaned_prompt) > 20:  # Минимальная длина промпта
-                        prompts.add(cleaned_prompt)
-    except SyntaxError:
-        logger.warning(f"Синтаксическая ошибка в Python файле {file_path}, используется regex")
-
+        with context.open_stream() as stream:
+            for leaf in iter_structured_prompts(stream, context.ext, context.encoding):
+                text = leaf.text.strip()
+                if len(text) > 20 or is_likely_prompt(text):
+                    prompts.add(f"[{leaf.path}] {text}")
+    except ValueError as e:
+        # Файлы с синтаксисом вне стандарта (комментарии в JSON, шаблоны в YAML) разбираются как текст
+        logger.warning(f"Структурный разбор {context.path} не удался ({e}), поиск по строковым литералам")
+        prompts.update(extract_prompts_from_literals(context.text, get_literal_syntax(context.path)))
     return prompts
 
 
-def extract_prompts_from_javascript(content: str) -> set:
-    """Извлечение промптов из JavaScript/TypeScript файлов"""
+def extract_prompts_from_notebook(source: FileSource) -> set:
+    """Извлечение промптов из ячеек ноутбука с номером ячейки"""
+    context = as_file_context(source)
     prompts = set()
+    for cell, symbols in context.notebook_symbols:
+        if symbols is None:
+            cell_prompts = extract_prompts_from_literals(cell.source, 'python')
+        else:
+            cell_prompts = {' '.join(text.strip().split()) for text in symbols.strings if is_likely_prompt(text)}
+        prompts.update(f"[cell {cell.index}] {prompt}" for prompt in cell_prompts if len(prompt) > 20)
+    for cell in context.notebook.markdown_cells:
+        prompts.update(f"[cell {cell.index}] {prompt}" for prompt in extract_prompts_from_text(cell.source))
+    return prompts
 
-    # Паттерны для JavaScript
-    js_patterns = [
-        r'prompt\s*[:=]\s*[`\'\"](.*?)[`\'\"]',
-        r'template\s*[:=]\s*[`\'\"](.*?)[`\'\"]',
-        r'message\s*[:=]\s*[`\'\"](.*?)[`\'\"]',
-        r'system\s*[:=]\s*[`\'\"](.*?)[`\'\"]',
-        r'user\s*[:=]\s*[`\'\"](.*?)[`\'\"]',
-        r'assistant\s*[:=]\s*[`\'\"](.*?)[`\'\"]',
-    ]
 
-    for pattern in js_patterns:
-        matches = re.findall(pattern, content, re.IGNORECASE | re.DOTALL)
-        for match in matches:
-            if is_likely_prompt(match):
-                cleaned_prompt = ' '.join(match.strip().split())
-                if len(cleaned_prompt) > 20:
-                    prompts.add(cleaned_prompt)
+def extract_prompts_from_python(source: FileSource) -> set:
+    """Извлечение промптов из Python файлов"""
+    context = as_file_context(source)
+    prompts = set()
+
+    # Строки модуля из AST или, для больших и синтаксически некорректных модулей, из лексера
+    for prompt_text in context.python_symbols.strings:
+        if is_likely_prompt(prompt_text):
+            cleaned_prompt = ' '.join(prompt_text.strip().split())
+            if len(cleaned_prompt) > 20:  # Минимальная длина промпта
+                prompts.add(cleaned_prompt)
 
     return prompts
 
 
-def extract_prompts_from_java(content: str) -> set:
-    """Извлечение промптов из Java файлов"""
-    prompts = set()
+def extract_prompts_from_javascript(content: str) -> set:
+    """Извлечение промптов из строковых и шаблонных литералов JavaScript/TypeScript"""
+    return extract_prompts_from_literals(content, 'javascript')
 
-    # Паттерны для Java строк
-    java_patterns = [
-        r'String\s+\w*[Pp]rompt\w*\s*=\s*"(.*?)";',
-        r'String\s+\w*[Tt]emplate\w*\s*=\s*"(.*?)";',
-        r'String\s+\w*[Mm]essage\w*\s*=\s*"(.*?)";',
-        r'"(.*?(?:analyze|задача|ты|you are|assistant|system).*?)"',
-    ]
 
-    for pattern in java_patterns:
-        matches = re.findall(pattern, content, re.IGNORECASE | re.DOTALL)
-        for match in matches:
-            if is_likely_prompt(match):
-                cleaned_prompt = ' '.join(match.strip().split())
-                if len(cleaned_prompt) > 20:
-                    prompts.add(cleaned_prompt)
+def extract_prompts_from_c(source: FileSource) -> set:
+    """Извлечение промптов из строковых литералов C/C++ (соседние литералы склеиваются)"""
+    prompts = set()
+    for literal in as_file_context(source).c_symbols.strings:
+        if is_likely_prompt(literal):
+            cleaned_prompt = ' '.join(literal.strip().split())
+            if len(cleaned_prompt) > 20:
+                prompts.add(cleaned_prompt)
+    return prompts
+
 
+def extract_prompts_from_java(source: FileSource) -> set:
+    """Извлечение промптов из строковых литералов и текстовых блоков Java (общий лексический проход)"""
+    prompts = set()
+    for literal in as_file_context(source).java_symbols.strings:
+        if is_likely_prompt(literal):
+            cleaned_prompt = ' '.join(literal.strip().split())
+            if len(cleaned_prompt) > 20:
+                prompts.add(cleaned_prompt)
     return prompts
 
 
@@ -357,8 +455,7 @@ def extract_prompts_from_text(content: str) -> set:
         line = line.strip()
 
         # Ищем начало промпта
-        if any(keyword in line.lower() for keyword in
-               ['prompt:', 'промпт:', 'system:', 'user:', 'assistant:', 'задача:', 'task:']):
+        if PROMPT_MARKER_MATCHER.contains_any(line):
             if current_prompt and is_likely_prompt(current_prompt):
                 cleaned = ' '.join(current_prompt.strip().split())
                 if len(cleaned) > 20:
@@ -383,58 +480,51 @@ def extract_prompts_from_text(content: str) -> set:
     return prompts
 
 
-def extract_prompts_from_docx(file_path: str) -> set:
+def extract_prompts_from_docx(source: FileSource) -> set:
     """Извлечение промптов из DOCX файлов"""
+    context = as_file_context(source)
     prompts = set()
 
     try:
-        doc = Document(file_path)
-        full_text = "\n".join([para.text for para in doc.paragraphs])
+        full_text = context.docx_document.text
         prompts.update(extract_prompts_from_text(full_text))
     except Exception as e:
-        logger.error(f"Ошибка при извлечении промптов из DOCX {file_path}: {e}")
+        logger.error(f"Ошибка при извлечении промптов из DOCX {context.path}: {e}")
 
     return prompts
 
 
-def extract_prompts_from_pdf(file_path: str) -> set:
+def extract_prompts_from_pdf(source: FileSource) -> set:
     """Извлечение промптов из PDF файлов"""
+    context = as_file_context(source)
     prompts = set()
 
     try:
-        with open(file_path, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
-            full_text = ""
-            for page in reader.pages:
-                full_text += page.extract_text() or ""
-
+        full_text = "".join(context.pdf_pages)
         prompts.update(extract_prompts_from_text(full_text))
     except Exception as e:
-        logger.error(f"Ошибка при извлечении промптов из PDF {file_path}: {e}")
+        logger.error(f"Ошибка при извлечении промптов из PDF {context.path}: {e}")
 
     return prompts
 
 
-def extract_prompts_from_spreadsheet(file_path: str) -> set:
+def extract_prompts_from_spreadsheet(source: FileSource) -> set:
     """Извлечение промптов из CSV/Excel файлов"""
+    context = as_file_context(source)
     prompts = set()
-    ext = os.path.splitext(file_path)[1].lower()
 
     try:
-        if ext == '.csv':
-            df = pd.read_csv(file_path)
+        if context.ext == '.csv':
+            df = context.csv_table.frame
         else:
-            df = pd.read_excel(file_path)
+            first_sheet = context.workbook.first_sheet
+            df = first_sheet.frame if first_sheet is not None else pd.DataFrame()
 
         # Ищем колонки с промптами
         prompt_columns = []
         for col in df.columns:
-            if pd.notna(col):
-                col_lower = str(col).lower()
-                if any(keyword in col_lower for keyword in
-                       ['prompt', 'промпт', 'template', 'шаблон', 'message', 'сообщение', 'system', 'user',
-                        'assistant']):
-                    prompt_columns.append(col)
+            if pd.notna(col) and PROMPT_COLUMN_MATCHER.contains_any(str(col)):
+                prompt_columns.append(col)
 
         # Извлекаем промпты из найденных колонок
         for col in prompt_columns:
@@ -455,44 +545,20 @@ def extract_prompts_from_spreadsheet(file_path: str) -> set:
                             prompts.add(cleaned)
 
     except Exception as e:
-        logger.error(f"Ошибка при извлечении промптов из {file_path}: {e}")
+        logger.error(f"Ошибка при извлечении промптов из {context.path}: {e}")
 
     return prompts
 
 
-def extract_prompts_with_regex(content: str) -> set:
-    """Общий поиск промптов с помощью регулярных выражений"""
+def extract_prompts_from_literals(content: str, syntax: str = 'generic') -> set:
+    """Поиск промптов среди строковых литералов (однопроходный сканер, линейное время)"""
     prompts = set()
 
-    # Расширенные паттерны для поиска промптов
-    patterns = [
-        # ChatPromptTemplate и PromptTemplate
-        r'ChatPromptTemplate\.from_template\s*\(\s*["\']([^"\']+)["\']',
-        r'PromptTemplate\s*\([^)]*?template\s*=\s*["\']([^"\']+)["\']',
-
-        # Переменные с prompt в названии
-        r'(?:^|\s)(\w*[Pp]rompt\w*)\s*=\s*["\']([^"\']+)["\']',
-        r'(?:^|\s)(\w*[Tt]emplate\w*)\s*=\s*["\']([^"\']+)["\']',
-
-        # Многострочные строки с ключевыми словами
-        r'["\'{3}](.*?(?:analyze|анализ|задача|ты|you are|assistant|system|user|instruction).*?)["\'{3}]',
-
-        # Словари промптов
-        r'PROMPTS?\s*\[\s*["\']([^"\']+)["\']\s*\]\s*=\s*["\']([^"\']+)["\']',
-
-        # f-строки с промптами
-        r'f["\']([^"\']*(?:analyze|анализ|задача|ты|you are|assistant).*?)["\']',
-    ]
-
-    for pattern in patterns:
-        matches = re.findall(pattern, content, re.IGNORECASE | re.DOTALL | re.MULTILINE)
-        for match in matches:
-            # match может быть строкой или кортежем
-            text = match if isinstance(match, str) else ' '.join(match)
-            if is_likely_prompt(text):
-                cleaned_prompt = ' '.join(text.strip().split())
-                if len(cleaned_prompt) > 20:
-                    prompts.add(cleaned_prompt)
+    for literal in scan_string_literals(content, syntax):
+        if is_likely_prompt(literal.text):
+            cleaned_prompt = ' '.join(literal.text.strip().split())
+            if len(cleaned_prompt) > 20:
+                prompts.add(cleaned_prompt)
 
     return prompts
 
@@ -502,92 +568,72 @@ def is_likely_prompt(text: str) -> bool:
     if len(text) < 10:
         return False
 
-    text_lower = text.lower()
-
-    # Ключевые слова, указывающие на промпт
-    prompt_keywords = [
-        'analyze', 'анализ', 'анализируй', 'проанализируй',
-        'задача', 'task', 'цель', 'goal',
-        'ты', 'you are', 'вы являетесь',
-        'assistant', 'ассистент', 'помощник',
-        'system', 'системный',
-        'user', 'пользователь',
-        'instruction', 'инструкция',
-        'prompt', 'промпт',
-        'template', 'шаблон',
-        'генерируй', 'generate',
-        'создай', 'create',
-        'опиши', 'describe',
-        'объясни', 'explain',
-        'сформируй', 'form'
-    ]
-
-    # Исключения (не промпты)
-    exclude_keywords = [
-        'import ', 'from ', 'class ', 'def ', 'return',
-        'print(', 'console.log', 'logger.',
-        'http://', 'https://', 'www.',
-        '#!/', '#include', '/*', '*/',
-    ]
-
-    # Проверка на исключения
-    for exclude in exclude_keywords:
-        if exclude in text_lower:
-            return False
-
-    # Проверка на ключевые слова промптов
-    for keyword in prompt_keywords:
-        if keyword in text_lower:
-            return True
-
-    # Дополнительная проверка: если текст содержит {переменные} или инструкции
-    if ('{' in text and '}' in text) or any(word in text_lower for word in ['следующ', 'based on', 'на основе']):
+    # Исключения проверяются первыми, затем ключевые слова промптов и инструкции
+    matched = PROMPT_MATCHER.first_match(text, ("exclude", "prompt", "instruction"))
+    if matched == "exclude":
+        return False
+    if matched == "prompt":
         return True
 
-    return False
+    # Дополнительная проверка: если текст содержит {переменные} или инструкции
+    return ('{' in text and '}' in text) or matched == "instruction"
 
 
 # Существующие функции (без изменений)
-def extract_java_dependencies(file_path: str) -> Dict[str, List[str]]:
-    """Парсер для Java файлов с использованием javalang"""
+def extract_notebook_dependencies(source: FileSource) -> Dict[str, Any]:
+    """Зависимости ячеек кода ноутбука: общие списки и разбивка по номерам ячеек"""
+    context = as_file_context(source)
+    dependencies = {"libraries": [], "functions": [], "cells": []}
+    try:
+        libraries, functions = {}, {}
+        for cell, symbols in context.notebook_symbols:
+            if symbols is None:
+                continue
+            cell_functions = list(dict.fromkeys(symbols.functions + symbols.calls))
+            if symbols.imports or cell_functions:
+                dependencies["cells"].append(
+                    {"cell": cell.index, "libraries": list(symbols.imports), "functions": cell_functions})
+            libraries.update(dict.fromkeys(symbols.imports))
+            functions.update(dict.fromkeys(cell_functions))
+        dependencies["libraries"] = list(libraries)
+        dependencies["functions"] = list(functions)
+    except Exception as e:
+        logger.error(f"Ошибка при анализе зависимостей ноутбука {context.path}: {e}")
+    return dependencies
+
+
+def extract_java_dependencies(source: FileSource) -> Dict[str, List[str]]:
+    """
+    Зависимости Java-файла по лексическому проходу (импорты, объявленные и вызываемые методы).
+    При включенной детализации вызовов (PARSER_JAVA_CALL_DETAIL) вызовы берутся из дерева javalang
+    и дополнительно возвращаются с квалификаторами в ключе calls.
+    """
+    context = as_file_context(source)
     dependencies = {"libraries": [], "functions": []}
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # Парсим Java код
-        tree = javalang.parse.parse(content)
-
-        # Извлекаем импорты
-        for import_decl in tree.imports:
-            dependencies["libraries"].append(import_decl.path)
-
-        # Извлекаем методы (функции)
-        for path, node in tree:
-            if isinstance(node, javalang.tree.MethodDeclaration):
-                dependencies["functions"].append(node.name)
-            # Также можно добавить вызовы методов, если нужно
-            elif isinstance(node, javalang.tree.MethodInvocation):
-                if hasattr(node, 'member') and node.member:
-                    dependencies["functions"].append(node.member)
-
-        # Удаляем дубликаты
-        dependencies["libraries"] = list(set(dependencies["libraries"]))
-        dependencies["functions"] = list(set(dependencies["functions"]))
-
-    except javalang.parser.JavaSyntaxError as e:
-        logger.warning(f"Синтаксическая ошибка в Java файле {file_path}: {e}")
+        symbols = context.java_symbols
+        dependencies["libraries"] = list(symbols.imports)
+        calls = symbols.calls
+        if get_java_analysis_service().call_detail:
+            detailed_calls = context.java_calls
+            if detailed_calls is None:
+                logger.warning(f"Синтаксическая ошибка в Java файле {context.path}, "
+                               f"вызовы взяты из лексического прохода")
+            else:
+                dependencies["calls"] = list(detailed_calls)
+                calls = tuple(call.rpartition('.')[2] for call in detailed_calls)
+        # Объявления методов и имена вызовов без дубликатов, в порядке появления
+        dependencies["functions"] = list(dict.fromkeys(symbols.methods + calls))
     except Exception as e:
-        logger.error(f"Ошибка при анализе Java зависимостей {file_path}: {e}")
+        logger.error(f"Ошибка при анализе Java зависимостей {context.path}: {e}")
 
     return dependencies
 
 
-def extract_js_dependencies(file_path: str) -> Dict[str, List[str]]:
+def extract_js_dependencies(source: FileSource) -> Dict[str, List[str]]:
     """Regex-парсер для JS (библиотеки: import/from, функции: function/def)"""
     dependencies = {"libraries": [], "functions": []}
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+    content = as_file_context(source).text
     # Импорты: import ... from 'lib';
     lib_matches = re.findall(r"import\s+.*?\s+from\s+['\"](.*?)['\"]", content)
     dependencies["libraries"] = list(set(lib_matches))
@@ -597,108 +643,151 @@ def extract_js_dependencies(file_path: str) -> Dict[str, List[str]]:
     return dependencies
 
 
-def extract_cpp_dependencies(file_path: str) -> Dict[str, List[str]]:
-    """Regex для C++: #include <lib>, функции"""
+def extract_cpp_dependencies(source: FileSource) -> Dict[str, List[str]]:
+    """Зависимости C/C++: цели #include и определения функций (лексический проход без комментариев и литералов)"""
+    context = as_file_context(source)
     dependencies = {"libraries": [], "functions": []}
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    lib_matches = re.findall(r"#include\s+[<\"](.*?)[\">]", content)
-    dependencies["libraries"] = list(set(lib_matches))
-    func_matches = re.findall(r"(\w+)\s*\([^)]*\)\s*\{", content)  # Простой паттерн для функций
-    dependencies["functions"] = list(set(func_matches))
+    try:
+        symbols = context.c_symbols
+        dependencies["libraries"] = list(dict.fromkeys(include.target for include in symbols.includes))
+        dependencies["functions"] = list(symbols.functions)
+    except Exception as e:
+        logger.error(f"Ошибка при анализе C/C++ зависимостей {context.path}: {e}")
     return dependencies
 
 
-def smart_parse_txt_bpmn(file_path: str, batch_size: int = 1000) -> str:
+# Расширение -> (язык, экстрактор зависимостей)
+DEPENDENCY_EXTRACTORS = MappingProxyType({
+    '.py': ('python', extract_python_dependencies),
+    '.ipynb': ('notebook', extract_notebook_dependencies),
+    '.java': ('java', extract_java_dependencies),
+    '.js': ('javascript', extract_js_dependencies),
+    '.ts': ('typescript', extract_js_dependencies),
+    '.cpp': ('cpp', extract_cpp_dependencies),
+    '.hpp': ('cpp', extract_cpp_dependencies),
+    '.c': ('c', extract_cpp_dependencies),
+    '.h': ('c', extract_cpp_dependencies),
+})
+
+
+def get_dependency_language(file_path: str) -> str:
+    """Язык файла для анализа зависимостей или пустая строка"""
+    entry = DEPENDENCY_EXTRACTORS.get(os.path.splitext(file_path)[1].lower())
+    return entry[0] if entry is not None else ""
+
+
+def extract_text_from_notebook(source: FileSource) -> str:
+    """Текст Markdown-ячеек ноутбука с номерами ячеек"""
+    context = as_file_context(source)
+    try:
+        return "\n\n".join(f"[cell {cell.index}]\n{cell.source}"
+                            for cell in context.notebook.markdown_cells if cell.source.strip())
+    except Exception as e:
+        logger.error(f"Ошибка парсинга ноутбука {context.path}: {e}")
+        return f"Ошибка: {str(e)}"
+
+
+def extract_text_from_markup(source: FileSource) -> str:
+    """Текст и структура BPMN/XML/HTML (потоковый разбор)"""
+    context = as_file_context(source)
+    try:
+        document = context.markup
+        text = document.text
+        if document.truncated:
+            text += f"\n[Текст сокращен до {MARKUP_TEXT_LIMIT} символов]"
+        # Для HTML структура (заголовки) идет перед текстом, для XML - после, как в сводке BPMN
+        parts = [document.outline, text] if document.kind == 'html' else [text, document.outline]
+        return "\n\n".join(part for part in parts if part)
+    except Exception as e:
+        logger.error(f"Ошибка парсинга разметки {context.path}: {e}")
+        return f"Ошибка: {str(e)}"
+
+
+def smart_parse_txt_bpmn(source: FileSource) -> str:
     """Умный парсинг для TXT и BPMN (low-code). Если XML внутри – парсить как XML."""
+    context = as_file_context(source)
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        if context.ext in MARKUP_EXTENSIONS:
+            return extract_text_from_markup(context)
+        content = context.text
         if '<' in content and '>' in content and '<?xml' in content:  # Проверка на XML
-            # Low-code: парсим как XML
-            root = ET.fromstring(content)
-            text = ET.tostring(root, encoding='unicode', method='text')  # Извлекаем текст
-            # Или более умно: извлекаем атрибуты/элементы для BPMN (процессы, задачи)
-            processes = [elem.attrib.get('name', '') for elem in root.findall('.//{*}process')]
-            tasks = [elem.attrib.get('name', '') for elem in root.findall('.//{*}task')]
-            text += f"\nBPMN Processes: {', '.join(processes)}\nTasks: {', '.join(tasks)}"
-        else:
-            text = content  # Обычный TXT
-        # Батчевая обработка
-        batched = ""
-        for i in range(0, len(text), batch_size):
-            batched += text[i:i + batch_size] + "\n"
-        return batched
+            # Low-code: потоковый разбор XML, BPMN определяется по пространству имен
+            return extract_text_from_markup(context)
+        return content  # Обычный TXT
+    except Exception as e:
+        logging.error(f"Ошибка парсинга TXT/BPMN {context.path}: {e}")
+        return f"Ошибка: {str(e)}"
+
+
+def extract_business_from_markup(source: FileSource) -> str:
+    """Извлечение бизнес-процессов из BPMN; для остальной разметки - текст документа"""
+    context = as_file_context(source)
+    try:
+        document = context.markup
+        if document.kind == 'bpmn':
+            return document.outline
+        return extract_text_from_markup(context)
     except Exception as e:
-        logging.error(f"Ошибка парсинга TXT/BPMN {file_path}: {e}")
+        logger.error(f"Ошибка извлечения бизнес-требований из {context.path}: {e}")
         return f"Ошибка: {str(e)}"
 
 
-def parse_md(file_path: str, batch_size: int = 1000) -> str:
-    """Отдельный парсер для MD: конверт в HTML или извлекай структуру."""
+def parse_md(source: FileSource, render_html: bool = False) -> str:
+    """Отдельный парсер для MD: заголовки и исходный текст, HTML - только по запросу."""
+    context = as_file_context(source)
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            md_content = f.read()
-        # Используем markdown lib для конвертации в HTML (или извлечения)
-        html = markdown.markdown(md_content)
-        # Или структура: извлекаем заголовки
-        headers = re.findall(r'^#{1,6}\s+(.*)', md_content, re.MULTILINE)
-        text = f"MD Headers: {', '.join(headers)}\n\n{html}"
-        # Батчевая
-        batched = ""
-        for i in range(0, len(text), batch_size):
-            batched += text[i:i + batch_size] + "\n"
-        return batched
+        md_content = context.text
+        headers = context.markdown_index.headings
+        # Исходная разметка короче HTML и так же понятна LLM; конвертация в HTML - опционально
+        body = markdown.markdown(md_content) if render_html else md_content
+        return f"MD Headers: {', '.join(headers)}\n\n{body}"
     except Exception as e:
-        logging.error(f"Ошибка парсинга MD {file_path}: {e}")
+        logging.error(f"Ошибка парсинга MD {context.path}: {e}")
         return f"Ошибка: {str(e)}"
 
 
-def extract_business_requirements(file_path: str) -> str:
+def extract_business_requirements(source: FileSource) -> str:
     """Извлечение бизнес-требований из различных типов файлов"""
-    ext = os.path.splitext(file_path)[1].lower()
+    context = as_file_context(source)
+    ext = context.ext
 
     try:
         if ext in ['.docx']:
-            return extract_business_from_docx(file_path)
+            return extract_business_from_docx(context)
         elif ext == '.pdf':
-            return extract_business_from_pdf(file_path)
+            return extract_business_from_pdf(context)
         elif ext in ['.txt', '.md']:
-            return extract_business_from_text(file_path)
+            return extract_business_from_text(context)
         elif ext == '.csv':
-            return extract_business_from_csv(file_path)
+            return extract_business_from_csv(context)
         elif ext in ['.xlsx', '.xls']:
-            return extract_business_from_excel(file_path)
+            return extract_business_from_excel(context)
+        elif ext in MARKUP_EXTENSIONS:
+            return extract_business_from_markup(context)
+        elif ext == '.ipynb':
+            return extract_business_from_notebook(context)
         else:
-            return load_requirements(file_path)
+            return load_requirements(context)
     except Exception as e:
-        logger.error(f"Ошибка извлечения бизнес-требований из {file_path}: {e}")
+        logger.error(f"Ошибка извлечения бизнес-требований из {context.path}: {e}")
         return f"Ошибка: {str(e)}"
 
 
-def extract_business_from_docx(file_path: str) -> str:
+def extract_business_from_docx(source: FileSource) -> str:
     """Извлечение бизнес-требований из DOCX"""
+    context = as_file_context(source)
     try:
-        doc = Document(file_path)
         business_content = ""
 
-        # Ищем разделы с бизнес-требованиями
-        business_keywords = [
-            'требования', 'requirements', 'бизнес', 'business',
-            'функциональные', 'functional', 'нефункциональные', 'non-functional',
-            'пользовательские истории', 'user stories', 'use case',
-            'процесс', 'process', 'workflow', 'сценарий', 'scenario',
-            'описание системы', 'system description', 'архитектура', 'architecture'
-        ]
-
         current_section = ""
-        for para in doc.paragraphs:
-            text = para.text.strip()
+        # Параграфы и строки таблиц в порядке документа
+        for para_text, _ in context.docx_document.lines():
+            text = para_text.strip()
             if not text:
                 continue
 
             # Проверяем, является ли это заголовком секции
-            if any(keyword in text.lower() for keyword in business_keywords):
+            if "docx" in BUSINESS_SECTION_MATCHER.classify(text):
                 if current_section:
                     business_content += f"\n\n--- {current_section} ---\n"
                 current_section = text
@@ -707,16 +796,17 @@ def extract_business_from_docx(file_path: str) -> str:
             if current_section:
                 business_content += text + "\n"
 
-        return business_content if business_content else extract_text_from_docx(file_path)
+        return business_content if business_content else extract_text_from_docx(context)
     except Exception as e:
-        logger.error(f"Ошибка извлечения бизнес-требований из DOCX {file_path}: {e}")
+        logger.error(f"Ошибка извлечения бизнес-требований из DOCX {context.path}: {e}")
         return f"Ошибка: {str(e)}"
 
 
-def extract_business_from_pdf(file_path: str) -> str:
+def extract_business_from_pdf(source: FileSource) -> str:
     """Извлечение бизнес-требований из PDF"""
+    context = as_file_context(source)
     try:
-        full_text = extract_text_from_pdf(file_path)
+        full_text = extract_text_from_pdf(context)
 
         # Ищем разделы с бизнес-требованиями
         business_sections = []
@@ -725,19 +815,13 @@ def extract_business_from_pdf(file_path: str) -> str:
         current_section = ""
         is_business_section = False
 
-        business_keywords = [
-            'требования', 'requirements', 'бизнес', 'business',
-            'функциональные', 'functional', 'техническое задание', 'tz',
-            'спецификация', 'specification', 'архитектура', 'architecture'
-        ]
-
         for line in lines:
             line = line.strip()
             if not line:
                 continue
 
             # Проверяем начало бизнес-секции
-            if any(keyword in line.lower() for keyword in business_keywords):
+            if "pdf" in BUSINESS_SECTION_MATCHER.classify(line):
                 if current_section and is_business_section:
                     business_sections.append(current_section)
                 current_section = line + "\n"
@@ -753,77 +837,67 @@ def extract_business_from_pdf(file_path: str) -> str:
 
         return "\n\n".join(business_sections) if business_sections else full_text
     except Exception as e:
-        logger.error(f"Ошибка извлечения бизнес-требований из PDF {file_path}: {e}")
+        logger.error(f"Ошибка извлечения бизнес-требований из PDF {context.path}: {e}")
         return f"Ошибка: {str(e)}"
 
 
-def extract_business_from_text(file_path: str) -> str:
-    """Извлечение бизнес-требований из текстовых файлов"""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+def business_markdown_sections(index: MarkdownIndex) -> List[str]:
+    """Секции Markdown (с заголовками) с бизнес-содержимым"""
+    sections = [index.section_text(section) for section in index.sections]
+    return [section for section in sections if section and "markdown" in BUSINESS_SECTION_MATCHER.classify(section)]
 
-        # Для MD файлов используем специальную обработку
-        if file_path.endswith('.md'):
-            # Ищем заголовки с бизнес-содержимым
-            sections = []
-            current_section = ""
-
-            for line in content.split('\n'):
-                if line.startswith('#'):
-                    if current_section:
-                        sections.append(current_section)
-                    current_section = line + "\n"
-                else:
-                    current_section += line + "\n"
 
-            if current_section:
-                sections.append(current_section)
+def extract_business_from_notebook(source: FileSource) -> str:
+    """Извлечение бизнес-требований из Markdown-ячеек ноутбука по индексу секций каждой ячейки"""
+    context = as_file_context(source)
+    try:
+        business_sections = [
+            f"[cell {cell.index}]\n{section}"
+            for cell in context.notebook.markdown_cells
+            for section in business_markdown_sections(build_markdown_index(cell.source))
+        ]
+        return "\n\n".join(business_sections) if business_sections else extract_text_from_notebook(context)
+    except Exception as e:
+        logger.error(f"Ошибка извлечения бизнес-требований из {context.path}: {e}")
+        return f"Ошибка: {str(e)}"
 
-            # Фильтруем секции с бизнес-содержимым
-            business_sections = []
-            business_keywords = ['требования', 'business', 'архитектура', 'описание', 'функции', 'features']
 
-            for section in sections:
-                if any(keyword in section.lower() for keyword in business_keywords):
-                    business_sections.append(section)
+def extract_business_from_text(source: FileSource) -> str:
+    """Извлечение бизнес-требований из текстовых файлов"""
+    context = as_file_context(source)
+    try:
+        content = context.text
 
+        # Для MD файлов используем специальную обработку
+        if context.path.endswith('.md'):
+            # Ищем заголовки с бизнес-содержимым
+            business_sections = business_markdown_sections(context.markdown_index)
             return "\n\n".join(business_sections) if business_sections else content
 
         return content
     except Exception as e:
-        logger.error(f"Ошибка извлечения бизнес-требований из {file_path}: {e}")
+        logger.error(f"Ошибка извлечения бизнес-требований из {context.path}: {e}")
         return f"Ошибка: {str(e)}"
 
 
-def extract_business_from_csv(file_path: str) -> str:
+def extract_business_from_csv(source: FileSource) -> str:
     """Извлечение бизнес-требований из CSV"""
+    context = as_file_context(source)
     try:
-        df = pd.read_csv(file_path, encoding='utf-8')
+        table = context.csv_table
+        df = table.frame
 
-        business_content = f"CSV файл с бизнес-данными ({len(df)} записей):\n\n"
+        business_content = f"CSV файл с бизнес-данными ({table.row_count} записей):\n\n"
 
         # Ищем колонки с бизнес-информацией
         business_columns = []
         for col in df.columns:
-            col_lower = col.lower()
-            if any(keyword in col_lower for keyword in [
-                'требование', 'requirement', 'описание', 'description',
-                'функция', 'function', 'процесс', 'process', 'роль', 'role',
-                'задача', 'task', 'цель', 'goal', 'бизнес', 'business'
-            ]):
+            if "business" in BUSINESS_COLUMN_MATCHER.classify(str(col)):
                 business_columns.append(col)
 
         if business_columns:
-            for idx, row in df.iterrows():
-                business_content += f"Запись {idx + 1}:\n"
-                for col in business_columns:
-                    if pd.notna(row[col]):
-                        business_content += f"  {col}: {row[col]}\n"
-                business_content += "\n"
-
-                if idx >= 100:  # Ограничиваем количество записей
-                    break
+            # Ограничиваем количество записей
+            business_content += "".join(format_records(df.head(101), business_columns, skip_blank=False))
         else:
             # Если специальных колонок нет, показываем общую структуру
             business_content += "Структура данных:\n"
@@ -831,33 +905,27 @@ def extract_business_from_csv(file_path: str) -> str:
 
         return business_content
     except Exception as e:
-        logger.error(f"Ошибка извлечения бизнес-требований из CSV {file_path}: {e}")
+        logger.error(f"Ошибка извлечения бизнес-требований из CSV {context.path}: {e}")
         return f"Ошибка: {str(e)}"
 
 
-def extract_business_from_excel(file_path: str) -> str:
+def extract_business_from_excel(source: FileSource) -> str:
     """Извлечение бизнес-требований из Excel"""
+    context = as_file_context(source)
     try:
         business_content = ""
-        xl_file = pd.ExcelFile(file_path)
 
-        for sheet_name in xl_file.sheet_names:
-            df = pd.read_excel(file_path, sheet_name=sheet_name)
+        for sheet in context.workbook.sheets:
+            sheet_name = sheet.name
+            df = sheet.frame
 
             business_content += f"\n=== Лист: {sheet_name} ===\n"
 
             # Ищем колонки с бизнес-информацией
             business_columns = []
             for col in df.columns:
-                if pd.notna(col):
-                    col_lower = str(col).lower()
-                    if any(keyword in col_lower for keyword in [
-                        'требование', 'requirement', 'описание', 'description',
-                        'функция', 'function', 'процесс', 'process', 'роль', 'role',
-                        'задача', 'task', 'цель', 'goal', 'бизнес', 'business',
-                        'агент', 'agent', 'сценарий', 'scenario'
-                    ]):
-                        business_columns.append(col)
+                if pd.notna(col) and BUSINESS_COLUMN_MATCHER.contains_any(str(col)):
+                    business_columns.append(col)
 
             if business_columns:
                 business_content += f"Найдены бизнес-колонки: {', '.join(business_columns)}\n\n"
@@ -882,63 +950,60 @@ def extract_business_from_excel(file_path: str) -> str:
 
         return business_content
     except Exception as e:
-        logger.error(f"Ошибка извлечения бизнес-требований из Excel {file_path}: {e}")
+        logger.error(f"Ошибка извлечения бизнес-требований из Excel {context.path}: {e}")
         return f"Ошибка: {str(e)}"
 
 
-def extract_project_description(file_path: str) -> str:
-    """Извлечение описания проекта из различных файлов"""
-    ext = os.path.splitext(file_path)[1].lower()
+def is_project_description_file(file_path: str) -> bool:
+    """Определяет по имени файла, содержит ли он описание проекта"""
     filename = os.path.basename(file_path).lower()
 
-    # Определяем, содержит ли файл описание проекта
     description_indicators = [
         'readme', 'description', 'описание', 'about',
         'project', 'проект', 'overview', 'обзор',
         'spec', 'specification', 'техзадание', 'tz'
     ]
 
-    if not any(indicator in filename for indicator in description_indicators):
+    return any(indicator in filename for indicator in description_indicators)
+
+
+def extract_project_description(source: FileSource) -> str:
+    """Извлечение описания проекта из различных файлов"""
+    context = as_file_context(source)
+    ext = context.ext
+
+    # Определяем, содержит ли файл описание проекта
+    if not is_project_description_file(context.path):
         return ""
 
     try:
         if ext == '.md':
-            return extract_description_from_md(file_path)
+            return extract_description_from_md(context)
         elif ext == '.txt':
-            return extract_description_from_txt(file_path)
+            return extract_description_from_txt(context)
         elif ext == '.docx':
-            return extract_description_from_docx(file_path)
+            return extract_description_from_docx(context)
         elif ext == '.pdf':
-            return extract_description_from_pdf(file_path)
+            return extract_description_from_pdf(context)
         else:
-            return load_requirements(file_path)
+            return load_requirements(context)
     except Exception as e:
-        logger.error(f"Ошибка извлечения описания проекта из {file_path}: {e}")
+        logger.error(f"Ошибка извлечения описания проекта из {context.path}: {e}")
         return f"Ошибка: {str(e)}"
 
 
-def extract_description_from_md(file_path: str) -> str:
+def extract_description_from_md(source: FileSource) -> str:
     """Извлечение описания из Markdown файла"""
+    context = as_file_context(source)
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
         # Для README файлов извлекаем основные секции
+        index = context.markdown_index
         sections = {}
-        current_section = "overview"
-        current_content = ""
-
-        for line in content.split('\n'):
-            if line.startswith('#'):
-                if current_content.strip():
-                    sections[current_section] = current_content.strip()
-                current_section = line.strip('# ').lower()
-                current_content = ""
-            else:
-                current_content += line + "\n"
-
-        if current_content.strip():
-            sections[current_section] = current_content.strip()
+        for section in index.sections:
+            section_content = index.body_text(section).strip()
+            if section_content:
+                key = "overview" if section.level == 0 else section.title.lower()
+                sections[key] = section_content
 
         # Приоритезируем важные секции
         priority_sections = ['overview', 'описание', 'description', 'about', 'введение', 'installation', 'usage']
@@ -954,20 +1019,20 @@ def extract_description_from_md(file_path: str) -> str:
             if not any(priority in key for priority in priority_sections):
                 result += f"\n=== {key.title()} ===\n{content}\n"
 
-        return result if result else content
+        return result if result else context.text
     except Exception as e:
-        logger.error(f"Ошибка извлечения описания из MD {file_path}: {e}")
+        logger.error(f"Ошибка извлечения описания из MD {context.path}: {e}")
         return f"Ошибка: {str(e)}"
 
 
-def extract_description_from_txt(file_path: str) -> str:
+def extract_description_from_txt(source: FileSource) -> str:
     """Извлечение описания из TXT файла"""
+    context = as_file_context(source)
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        content = context.text
 
         # Ищем структурированное описание
-        lines = content.split('\n')
+        lines = context.lines
         description_parts = []
         current_part = ""
 
@@ -993,37 +1058,38 @@ def extract_description_from_txt(file_path: str) -> str:
 
         return "\n\n".join(description_parts) if description_parts else content
     except Exception as e:
-        logger.error(f"Ошибка извлечения описания из TXT {file_path}: {e}")
+        logger.error(f"Ошибка извлечения описания из TXT {context.path}: {e}")
         return f"Ошибка: {str(e)}"
 
 
-def extract_description_from_docx(file_path: str) -> str:
+def extract_description_from_docx(source: FileSource) -> str:
     """Извлечение описания из DOCX файла"""
+    context = as_file_context(source)
     try:
-        doc = Document(file_path)
         description_content = ""
 
-        for para in doc.paragraphs:
-            text = para.text.strip()
+        for para_text, style_name in context.docx_document.lines():
+            text = para_text.strip()
             if text:
                 # Проверяем стиль параграфа для выделения заголовков
-                if para.style.name.startswith('Heading'):
+                if style_name.startswith('Heading'):
                     description_content += f"\n=== {text} ===\n"
                 else:
                     description_content += text + "\n"
 
         return description_content
     except Exception as e:
-        logger.error(f"Ошибка извлечения описания из DOCX {file_path}: {e}")
+        logger.error(f"Ошибка извлечения описания из DOCX {context.path}: {e}")
         return f"Ошибка: {str(e)}"
 
 
-def extract_description_from_pdf(file_path: str) -> str:
+def extract_description_from_pdf(source: FileSource) -> str:
     """Извлечение описания из PDF файла"""
+    context = as_file_context(source)
     try:
-        return extract_text_from_pdf(file_path)
+        return extract_text_from_pdf(context)
     except Exception as e:
-        logger.error(f"Ошибка извлечения описания из PDF {file_path}: {e}")
+        logger.error(f"Ошибка извлечения описания из PDF {context.path}: {e}")
         return f"Ошибка: {str(e)}"
 
 
@@ -1034,17 +1100,117 @@ def get_supported_extensions() -> Dict[str, List[str]]:
         "document_files": ['.docx', '.pdf', '.txt', '.md', '.rtf'],
         "data_files": ['.csv', '.xlsx', '.xls', '.json', '.yaml', '.yml'],
         "config_files": ['.ini', '.conf', '.config', '.env'],
-        "markup_files": ['.xml', '.html', '.htm', '.bpmn']
+        "markup_files": ['.xml', '.html', '.htm', '.bpmn'],
+        "notebook_files": ['.ipynb']
     }
 
 
+def _build_extension_categories() -> Mapping[str, str]:
+    """Построение неизменяемой таблицы расширение -> категория"""
+    categories = {}
+    for category, extensions in get_supported_extensions().items():
+        for ext in extensions:
+            categories.setdefault(ext, category)
+    return MappingProxyType(categories)
+
+
+# Таблица строится один раз при импорте модуля
+EXTENSION_CATEGORIES = _build_extension_categories()
+
+
+def get_file_category(file_path: str) -> str:
+    """Возвращает категорию файла по расширению или пустую строку"""
+    ext = os.path.splitext(file_path)[1].lower()
+    return EXTENSION_CATEGORIES.get(ext, "")
+
+
 def should_process_file(file_path: str) -> bool:
     """Проверяет, должен ли файл быть обработан"""
     ext = os.path.splitext(file_path)[1].lower()
-    supported = get_supported_extensions()
+    return ext in EXTENSION_CATEGORIES
+
+
+def scan_project(directory_path: str, max_file_size: int = MAX_FILE_SIZE) -> Dict[str, Any]:
+    """
+    Однопроходный обход проекта через os.scandir.
+    Одновременно строит структуру проекта, список файлов, список пустых файлов,
+    статистику по расширениям и записи (размер, время изменения), переиспользуя stat() из DirEntry.
+    Для текстовых файлов в запись добавляется кодировка, определенная один раз по началу файла.
+    """
+    project_structure = {}
+    files = []
+    empty_files = []
+    file_stats = {}
+    file_records = {}
+
+    # Стек (абсолютный путь, относительный путь); порядок обхода совпадает с os.walk
+    stack = [(directory_path, '.')]
+    while stack:
+        current_dir, relative_dir = stack.pop()
+        dir_files = []
+        subdirs = []
 
-    all_supported = []
-    for category in supported.values():
-        all_supported.extend(category)
+        try:
+            with os.scandir(current_dir) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir():
+                            if entry.name not in EXCLUDED_DIRS and not entry.is_symlink():
+                                subdirs.append(entry)
+                            continue
+                    except OSError:
+                        pass
+
+                    dir_files.append(entry.name)
+                    ext = os.path.splitext(entry.name)[1].lower()
+                    if ext not in EXTENSION_CATEGORIES:
+                        continue
+
+                    try:
+                        stat_result = entry.stat()
+                    except OSError as e:
+                        logger.warning(f"Ошибка доступа к файлу {entry.path}: {e}")
+                        continue
+
+                    file_size = stat_result.st_size
+                    if file_size == 0:
+                        empty_files.append(entry.path)
+                        continue
+                    elif file_size > max_file_size:
+                        logger.warning(f"Пропускаем слишком большой файл: {entry.path} ({file_size} байт)")
+                        continue
+
+                    files.append(entry.path)
+                    file_stats[ext] = file_stats.get(ext, 0) + 1
+                    file_records[entry.path] = {"size": file_size, "mtime_ns": stat_result.st_mtime_ns}
+        except OSError as e:
+            logger.warning(f"Ошибка доступа к директории {current_dir}: {e}")
+            continue
+
+        project_structure[relative_dir] = dir_files
+
+        for entry in reversed(subdirs):
+            child_relative = entry.name if relative_dir == '.' else os.path.join(relative_dir, entry.name)
+            stack.append((entry.path, child_relative))
+
+    def safe_sniff(file_path: str) -> Optional[str]:
+        try:
+            return sniff_file_encoding(file_path)
+        except OSError as e:
+            logger.warning(f"Не удалось определить кодировку файла {file_path}: {e}")
+            return None
+
+    text_files = [file for file in files if os.path.splitext(file)[1].lower() not in BINARY_EXTENSIONS]
+    if text_files:
+        with ThreadPoolExecutor(max_workers=ENCODING_SNIFF_WORKERS) as executor:
+            for file_path, encoding in zip(text_files, executor.map(safe_sniff, text_files)):
+                if encoding is not None:
+                    file_records[file_path]["encoding"] = encoding
 
-    return ext in all_supported
\ No newline at end of file
+    return {
+        "project_structure": project_structure,
+        "files_list": files,
+        "empty_files": empty_files,
+        "file_stats": file_stats,
+        "file_records": file_records,
+    }
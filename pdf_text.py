@@ -0,0 +1,154 @@
+"""
+Служба извлечения текста PDF
+
+Текст страниц PDF извлекается один раз на содержимое файла: результат
+запоминается по хэшу содержимого и отдается всем экстракторам (требования,
+бизнес-требования, описание, промпты) в виде текстов по номерам страниц.
+Большие документы разбираются параллельно: страницы делятся на диапазоны,
+каждый диапазон обрабатывается в отдельном процессе (PyPDF2 написан на Python
+и в потоках упирается в GIL). Пул процессов один на службу: документы,
+разбираемые одновременно из разных потоков, делят его max_workers процессов.
+"""
+
+import io
+import logging
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import PyPDF2
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PdfText:
+    """Тексты страниц PDF в порядке страниц"""
+    pages: Tuple[str, ...]
+
+    def __len__(self) -> int:
+        return len(self.pages)
+
+    def page(self, index: int) -> str:
+        """Текст страницы по номеру (с нуля)"""
+        return self.pages[index]
+
+    @property
+    def text(self) -> str:
+        """Текст документа: страницы через перевод строки"""
+        return "\n".join(self.pages)
+
+
+def _extract_page_range(data: bytes, start: int, stop: int) -> List[str]:
+    """Тексты страниц [start, stop) документа (выполняется и в рабочем процессе)"""
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    return [reader.pages[index].extract_text() or "" for index in range(start, stop)]
+
+
+def _split_ranges(page_count: int, parts: int) -> List[Tuple[int, int]]:
+    """Разбиение страниц на parts последовательных диапазонов примерно равной длины"""
+    size, rest = divmod(page_count, parts)
+    ranges = []
+    start = 0
+    for part in range(parts):
+        stop = start + size + (1 if part < rest else 0)
+        if stop > start:
+            ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+class PdfTextService:
+    """Извлечение текста PDF с запоминанием по хэшу содержимого и параллельным разбором страниц"""
+
+    def __init__(self, max_workers: int = 0, parallel_min_pages: int = 64, memo_size: int = 32):
+        self.max_workers = max_workers if max_workers > 0 else (multiprocessing.cpu_count() or 1)
+        self.parallel_min_pages = parallel_min_pages
+        self.memo_size = memo_size
+        self.extractions = 0
+        self.memo_hits = 0
+        self._memo: 'OrderedDict[str, PdfText]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def get(self, data: bytes, content_hash: str) -> PdfText:
+        """Тексты страниц документа; повторный запрос того же содержимого берется из памяти"""
+        with self._lock:
+            cached = self._memo.get(content_hash)
+            if cached is not None:
+                self._memo.move_to_end(content_hash)
+                self.memo_hits += 1
+                return cached
+
+        pdf_text = PdfText(tuple(self._extract(data)))
+
+        with self._lock:
+            self.extractions += 1
+            self._memo[content_hash] = pdf_text
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+        return pdf_text
+
+    def _can_parallelize(self, page_count: int) -> bool:
+        """Параллельный разбор только для больших документов и только в основном процессе"""
+        # В рабочих процессах исполнителя экстракторов вложенный пул перегрузил бы CPU
+        return (self.max_workers > 1 and page_count >= self.parallel_min_pages
+                and multiprocessing.parent_process() is None)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Общий пул процессов разбора страниц (создается при первом большом документе)"""
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._pool
+
+    def _extract(self, data: bytes) -> List[str]:
+        """Извлечение текстов всех страниц последовательно или по диапазонам в пуле процессов"""
+        reader = PyPDF2.PdfReader(io.BytesIO(data))
+        page_count = len(reader.pages)
+        if not self._can_parallelize(page_count):
+            return [page.extract_text() or "" for page in reader.pages]
+
+        ranges = _split_ranges(page_count, min(self.max_workers, page_count))
+        logger.debug(f"PDF из {page_count} страниц разбирается по {len(ranges)} диапазонам")
+        pool = self._get_pool()
+        futures = [pool.submit(_extract_page_range, data, start, stop) for start, stop in ranges]
+        pages: List[str] = []
+        for future in futures:
+            pages.extend(future.result())
+        return pages
+
+    def clear(self):
+        """Очистка запомненных текстов и остановка пула процессов"""
+        with self._lock:
+            self._memo.clear()
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+
+
+_service: Optional[PdfTextService] = None
+_service_lock = threading.Lock()
+
+
+def configure_pdf_text_service(max_workers: int = 0, parallel_min_pages: int = 64,
+                               memo_size: int = 32) -> PdfTextService:
+    """Создание общей службы извлечения текста PDF с заданными параметрами"""
+    global _service
+    with _service_lock:
+        if _service is not None:
+            _service.clear()
+        _service = PdfTextService(max_workers, parallel_min_pages, memo_size)
+        return _service
+
+
+def get_pdf_text_service() -> PdfTextService:
+    """Общая служба извлечения текста PDF (с параметрами по умолчанию, если не настроена)"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = PdfTextService()
+        return _service
@@ -1,5 +1,9 @@
 import json
-from typing import TypedDict, List, Dict, Optional
+import time
+import sqlite3
+from dataclasses import dataclass
+from functools import partial
+from typing import TypedDict, List, Dict, Optional, Any, Callable
 
 from langgraph.graph import StateGraph, END
 from langchain_core.prompts import ChatPromptTemplate
@@ -7,9 +11,22 @@ from langchain_core.output_parsers import StrOutputParser
 import os
 import logging
 import math
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from config import load_env_file, LLMProvider, LLMConfig
+import threading
+from concurrent.futures import as_completed
+from config import load_env_file, LLMProvider, LLMConfig, ParserConfig
 from prompts import PROMPTS
+from file_manifest import (
+    build_manifest, load_manifest, diff_manifest, get_cached_results, save_manifest, hash_bytes, RESULT_SLOTS,
+    is_failed_result
+)
+from extraction_cache import ExtractionCache, open_extraction_cache
+from file_context import FileContext, FileSource, as_file_context
+from executors import ExtractionExecutor
+from pdf_text import configure_pdf_text_service
+from python_symbols import configure_python_ast_limit, python_ast_max_bytes
+from java_model import configure_java_analysis_service, get_java_analysis_service
+from c_model import C_EXTENSIONS, build_include_graph
+from text_segments import chunk_segments, head_text, iter_sections
 
 # Импорт из отдельного файла парсеров
 from parsers import (
@@ -30,13 +47,31 @@ from parsers import (
     extract_business_requirements,
     extract_project_description,
     should_process_file,
-    get_supported_extensions
+    get_supported_extensions,
+    get_file_category,
+    get_dependency_language,
+    scan_project,
+    is_project_description_file,
+    EXTRACTOR_VERSIONS
 )
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Промпт суммаризации анализов (одинаковый для всех уровней дерева)
+SUMMARY_PROMPT = "Объедини и суммируй эти анализы в единый coherentный отчет: {analyses}"
+
+# Разделитель анализов в запросе суммаризации
+ANALYSIS_SEPARATOR = "\n\n"
+
+# Оценка среднего числа символов на токен модели для бюджета контекста
+CHARS_PER_TOKEN = 3
+
+# Имя и версия записей кэша с ответами LLM
+LLM_CACHE_NAME = "llm_response"
+LLM_CACHE_VERSION = 1
+
 # Загрузка .env файла
 load_env_file()
 
@@ -91,231 +126,489 @@ class ParserState(TypedDict):
     final_report: str
     project_structure: Dict[str, List[str]]
     file_stats: Dict[str, int]
+    file_encodings: Dict[str, str]
+    file_manifest: Dict[str, Dict[str, Any]]
+    changed_files: List[str]
+    cached_results: Dict[str, Dict[str, Any]]
+    cache_stats: Dict[str, Any]
+    extraction_stats: Dict[str, Dict[str, Any]]
+    include_graph: Dict[str, Dict[str, List[str]]]
+
+
+def get_files_node(state: ParserState, config: Optional[ParserConfig] = None) -> ParserState:
+    """Получение списка файлов за один проход по дереву проекта и сравнение с манифестом"""
+    config = config or ParserConfig.from_env()
+    directory = state['directory_path']
+    scan = scan_project(directory)
+
+    state['files_list'] = scan['files_list']
+    state['empty_files'] = scan['empty_files']
+    state['project_structure'] = scan['project_structure']
+    state['file_stats'] = scan['file_stats']
+    # Кодировки определены при обходе и используются всеми читателями файла
+    state['file_encodings'] = {file: record['encoding'] for file, record in scan['file_records'].items()
+                               if 'encoding' in record}
+
+    logger.info(f"Найдено {len(state['files_list'])} поддерживаемых файлов и {len(state['empty_files'])} пустых файлов")
+    logger.info(f"Статистика файлов: {state['file_stats']}")
+
+    if not (config.incremental or config.cache_enabled):
+        state['file_manifest'] = {}
+        state['changed_files'] = state['files_list']
+        state['cached_results'] = {}
+        return state
+
+    # Хэши содержимого нужны и для инкрементального режима, и для кэша извлечения
+    previous_manifest = {}
+    if config.incremental:
+        previous_manifest = load_manifest(config.manifest_path, directory, EXTRACTOR_VERSIONS,
+                                          extractor_settings(config))
+    file_manifest = build_manifest(directory, scan['file_records'], previous_manifest)
+    state['file_manifest'] = file_manifest
+
+    if not config.incremental:
+        state['changed_files'] = state['files_list']
+        state['cached_results'] = {}
+        return state
+
+    # Инкрементальный режим: анализируем только добавленные и измененные файлы
+    diff = diff_manifest(directory, previous_manifest, file_manifest)
+    unchanged = set(diff['unchanged'])
+
+    state['changed_files'] = [file for file in state['files_list'] if file not in unchanged]
+    state['cached_results'] = get_cached_results(directory, previous_manifest, diff['unchanged'])
+
+    logger.info(f"Инкрементальный анализ: добавлено {len(diff['added'])}, изменено {len(diff['modified'])}, "
+                f"без изменений {len(diff['unchanged'])}, удалено {len(diff['removed'])}")
+    return state
 
 
-def chunk_text(text: str, chunk_size: int = 80000, overlap: float = 0.2) -> List[str]:
-    """Разделение текста на чанки с перекрытием"""
-    chunks = []
-    overlap_size = int(chunk_size * overlap)
-    start = 0
-    while start < len(text):
-        end = min(start + chunk_size, len(text))
-        chunks.append(text[start:end])
-        start += chunk_size - overlap_size
-    return chunks
-
-
-def get_files_node(state: ParserState) -> ParserState:
-    """Получение списка файлов с улучшенной фильтрацией"""
-    files = []
-    empty_files = []
-    supported_extensions = get_supported_extensions()
-
-    # Объединяем все поддерживаемые расширения
-    all_supported = []
-    for category in supported_extensions.values():
-        all_supported.extend(category)
-
-    project_structure = get_project_structure(state['directory_path'])
-    file_stats = {}
-
-    for root, dirs, filenames in os.walk(state['directory_path']):
-        if '.git' in dirs:
-            dirs.remove('.git')
-        if '__pycache__' in dirs:
-            dirs.remove('__pycache__')
-        if 'node_modules' in dirs:
-            dirs.remove('node_modules')
-
-        for filename in filenames:
-            file_path = os.path.join(root, filename)
-            ext = os.path.splitext(filename)[1].lower()
-
-            # Пропускаем неподдерживаемые файлы
-            if not should_process_file(file_path):
-                continue
-
-            try:
-                file_size = os.path.getsize(file_path)
-                if file_size == 0:
-                    empty_files.append(file_path)
-                    continue
-                elif file_size > 10 * 1024 * 1024:  # Пропускаем файлы больше 10MB
-                    logger.warning(f"Пропускаем слишком большой файл: {file_path} ({file_size} байт)")
-                    continue
-
-                files.append(file_path)
-
-                # Статистика по расширениям
-                if ext not in file_stats:
-                    file_stats[ext] = 0
-                file_stats[ext] += 1
-
-            except OSError as e:
-                logger.warning(f"Ошибка доступа к файлу {file_path}: {e}")
-                continue
+def analyze_files_node(state: ParserState, config: Optional[ParserConfig] = None) -> ParserState:
+    """Анализ файлов с расширенной обработкой различных типов"""
+    config = config or ParserConfig.from_env()
+    files_to_analyze = state.get('changed_files', state['files_list'])
 
-    state['files_list'] = files
-    state['empty_files'] = empty_files
-    state['project_structure'] = project_structure
-    state['file_stats'] = file_stats
+    results = {slot: {} for slot in RESULT_SLOTS}
+    extraction_stats = {
+        slot: {"tasks": 0, "results": 0, "errors": 0, "seconds": 0.0} for slot in RESULT_SLOTS
+    }
+    # Файлы, извлечение которых завершилось ошибкой (в манифесте помечаются для повторного анализа)
+    failed_files = set()
 
-    logger.info(f"Найдено {len(files)} поддерживаемых файлов и {len(empty_files)} пустых файлов")
-    logger.info(f"Статистика файлов: {file_stats}")
-    return state
+    # Пропускная способность анализа зависимостей по языкам
+    language_stats = {}
 
+    # Классифицируем файлы по типам для оптимизации обработки
+    categories = {file: get_file_category(file) for file in files_to_analyze}
+    category_counts = {}
+    for category in categories.values():
+        category_counts[category] = category_counts.get(category, 0) + 1
 
-def analyze_files_node(state: ParserState) -> ParserState:
-    """Анализ файлов с расширенной обработкой различных типов"""
-    dependencies = {}
-    prompts = {}
-    requirements = {}
-    business_requirements = {}
-    project_descriptions = {}
+    logger.info(
+        f"Классификация файлов: код={category_counts.get('code_files', 0)}, "
+        f"документы={category_counts.get('document_files', 0)}, данные={category_counts.get('data_files', 0)}, "
+        f"разметка={category_counts.get('markup_files', 0)}, ноутбуки={category_counts.get('notebook_files', 0)}")
+
+    cache = open_extraction_cache(config.cache_path, config.cache_max_size_mb) if config.cache_enabled else None
+    file_manifest = state.get('file_manifest', {})
+
+    # Текст PDF извлекается один раз на содержимое и общий для всех экстракторов
+    pdf_service = configure_pdf_text_service(config.pdf_workers, config.pdf_parallel_min_pages)
+
+    # Большие Python-модули разбираются лексером вместо ast.parse
+    configure_python_ast_limit(config.python_ast_max_size_mb)
+
+    # Java: лексический проход для всех файлов, дерево javalang - только для детализации вызовов
+    java_service = configure_java_analysis_service(config.java_call_detail)
+
+    # Один контекст на файл: содержимое читается и декодируется один раз для всех экстракторов
+    file_encodings = state.get('file_encodings', {})
+    contexts = {
+        file: FileContext(file, content_hash=file_manifest.get(file, {}).get('hash'),
+                          encoding=file_encodings.get(file))
+        for file in files_to_analyze
+    }
+    pending_tasks = {file: 0 for file in files_to_analyze}
+
+    executor = ExtractionExecutor(config.executor_backend, config.max_workers, config.io_workers,
+                                  config.task_chunk_size, cache)
+    with executor:
+        future_to_task = {}
+
+        # Задачи ставятся пофайлово, чтобы экстракторы одного файла попадали в одну пачку
+        for file in files_to_analyze:
+            for task in plan_extraction_tasks(file, categories[file]):
+                future = executor.submit(partial(timed_extraction, task.extractor), contexts[file])
+                future_to_task[future] = task
+                pending_tasks[file] += 1
+                extraction_stats[task.slot]["tasks"] += 1
+        executor.flush()
+
+        # Обработка результатов: каждая задача записывает результат только в свой слот
+        for future in as_completed(future_to_task):
+            task = future_to_task[future]
+            stats = extraction_stats[task.slot]
+            pending_tasks[task.file] -= 1
+            if pending_tasks[task.file] == 0:
+                contexts[task.file].release()
+            try:
+                result, elapsed, failed = future.result()
+                stats["seconds"] += elapsed
+                if failed:
+                    stats["errors"] += 1
+                    failed_files.add(task.file)
+                if task.slot == 'dependencies':
+                    language = language_stats.setdefault(
+                        get_dependency_language(task.file), {"files": 0, "seconds": 0.0})
+                    language["files"] += 1
+                    language["seconds"] += elapsed
+                if is_meaningful_result(task.slot, result):
+                    results[task.slot][task.file] = result
+                    stats["results"] += 1
+            except Exception as e:
+                stats["errors"] += 1
+                failed_files.add(task.file)
+                logger.error(f"Ошибка при обработке {task.file} ({task.slot}): {e}")
+
+    if cache is not None:
+        state['cache_stats'] = cache.stats()
+        cache.close()
+        logger.info(f"Кэш извлечения: попаданий {state['cache_stats']['hits']}, "
+                    f"промахов {state['cache_stats']['misses']}")
+
+    if pdf_service.extractions:
+        logger.info(f"Текст PDF: извлечено документов {pdf_service.extractions}, "
+                    f"повторно использовано {pdf_service.memo_hits}")
+    pdf_service.clear()
+
+    if java_service.lexed:
+        logger.info(f"Java: лексических проходов {java_service.lexed}, разборов javalang {java_service.parsed}, "
+                    f"повторно использовано {java_service.memo_hits}")
+
+    # Результаты для неизмененных файлов берем из предыдущего запуска
+    for slot, cached in state.get('cached_results', {}).items():
+        for file, result in cached.items():
+            results[slot].setdefault(file, result)
+
+    # Порядок результатов не зависит от порядка завершения задач
+    for slot, slot_results in results.items():
+        results[slot] = {file: slot_results[file] for file in state['files_list'] if file in slot_results}
+
+    if config.incremental and state.get('file_manifest'):
+        save_manifest(config.manifest_path, state['directory_path'], state['file_manifest'], results,
+                      EXTRACTOR_VERSIONS, extractor_settings(config), failed_files)
+
+    state['dependencies'] = results['dependencies']
+    state['prompts'] = results['prompts']
+    state['requirements'] = results['requirements']
+    state['business_requirements'] = results['business_requirements']
+    state['project_descriptions'] = results['project_descriptions']
+
+    # Граф включений C/C++ строится по уже извлеченным целям #include (включая результаты из кэша)
+    c_includes = {file: deps.get('libraries', []) for file, deps in results['dependencies'].items()
+                  if os.path.splitext(file)[1].lower() in C_EXTENSIONS}
+    state['include_graph'] = build_include_graph(c_includes, state['files_list']) if c_includes else {}
+    if state['include_graph']:
+        resolved = sum(len(node['includes']) for node in state['include_graph'].values())
+        logger.info(f"Граф включений C/C++: файлов {len(state['include_graph'])}, "
+                    f"включений заголовков проекта {resolved}")
+
+    for stats in extraction_stats.values():
+        stats["seconds"] = round(stats["seconds"], 3)
+    for language in language_stats.values():
+        language["files_per_second"] = round(language["files"] / language["seconds"], 1) if language["seconds"] else None
+        language["seconds"] = round(language["seconds"], 3)
+    extraction_stats['dependencies']['by_language'] = language_stats
+    state['extraction_stats'] = extraction_stats
 
-    # Классифицируем файлы по типам для оптимизации обработки
-    code_files = []
-    document_files = []
-    data_files = []
+    logger.info(f"Результаты анализа:")
+    logger.info(f"  - Зависимости: {len(results['dependencies'])} файлов")
+    logger.info(f"  - Промпты: {len(results['prompts'])} файлов")
+    logger.info(f"  - Требования: {len(results['requirements'])} файлов")
+    logger.info(f"  - Бизнес-требования: {len(results['business_requirements'])} файлов")
+    logger.info(f"  - Описания проекта: {len(results['project_descriptions'])} файлов")
+    for slot, stats in extraction_stats.items():
+        logger.info(f"  - {slot}: задач {stats['tasks']}, результатов {stats['results']}, "
+                    f"ошибок {stats['errors']}, {stats['seconds']:.3f} с")
+    for language, stats in language_stats.items():
+        logger.info(f"    {language}: {stats['files']} файлов, {stats['seconds']:.3f} с, "
+                    f"{stats['files_per_second']} файлов/с")
 
-    supported = get_supported_extensions()
+    return state
 
-    for file in state['files_list']:
-        ext = os.path.splitext(file)[1].lower()
-        if ext in supported['code_files']:
-            code_files.append(file)
-        elif ext in supported['document_files']:
-            document_files.append(file)
-        elif ext in supported['data_files']:
-            data_files.append(file)
 
-    logger.info(
-        f"Классификация файлов: код={len(code_files)}, документы={len(document_files)}, данные={len(data_files)}")
+def is_cacheable_result(result) -> bool:
+    """Результаты с ошибками извлечения не кэшируются"""
+    return not is_failed_result(result)
 
-    with ThreadPoolExecutor(max_workers=4) as executor:
-        # Анализ зависимостей для кодовых файлов
-        future_to_file = {}
 
-        for file in code_files:
-            future_to_file[executor.submit(safe_extract_dependencies, file)] = file
+def extractor_settings(config: ParserConfig) -> Dict[str, Any]:
+    """Настройки, от которых зависят результаты экстракторов (сохраняются в манифесте для инвалидации)"""
+    return {"java_call_detail": config.java_call_detail, "python_ast_max_size_mb": config.python_ast_max_size_mb}
 
-        # Извлечение промптов из всех файлов
-        for file in state['files_list']:
-            future_to_file[executor.submit(safe_extract_prompts, file)] = file
 
-        # Извлечение требований и описаний из документов
-        for file in document_files + data_files:
-            future_to_file[executor.submit(safe_load_requirements, file)] = file
-            future_to_file[executor.submit(safe_extract_business_requirements, file)] = file
-            future_to_file[executor.submit(safe_extract_project_description, file)] = file
+def extractor_cache_variant(name: str, context: FileContext) -> str:
+    """Вариант ключа кэша: расширение файла и настройки, меняющие результат экстрактора для него"""
+    if name == 'extract_dependencies' and context.ext == '.java' and get_java_analysis_service().call_detail:
+        # Детализация вызовов javalang добавляет в результат ключ calls
+        return f"{context.ext}:calls"
+    if (name in ('extract_dependencies', 'extract_prompts') and context.ext == '.py'
+            and context.size > python_ast_max_bytes()):
+        # Большие модули разбираются лексером, результат которого отличается от обхода AST
+        return f"{context.ext}:lexer"
+    return context.ext
 
-        # Обработка результатов
-        for future in as_completed(future_to_file):
-            file = future_to_file[future]
-            try:
-                result = future.result()
-                task_type = determine_task_type(future, file)
-
-                if task_type == 'dependencies':
-                    dependencies[file] = result
-                elif task_type == 'prompts':
-                    if result:  # Только если есть промпты
-                        prompts[file] = result
-                elif task_type == 'requirements':
-                    if result and len(result.strip()) > 10:
-                        requirements[file] = result
-                elif task_type == 'business_requirements':
-                    if result and len(result.strip()) > 10:
-                        business_requirements[file] = result
-                elif task_type == 'project_description':
-                    if result and len(result.strip()) > 10:
-                        project_descriptions[file] = result
 
-            except Exception as e:
-                logger.error(f"Ошибка при обработке {file}: {e}")
+def run_extractor(extractor, context: FileContext, cache: Optional[ExtractionCache] = None):
+    """Вызов экстрактора через кэш результатов по хэшу содержимого"""
+    if cache is None:
+        return extractor(context)
 
-    state['dependencies'] = dependencies
-    state['prompts'] = prompts
-    state['requirements'] = requirements
-    state['business_requirements'] = business_requirements
-    state['project_descriptions'] = project_descriptions
+    name = extractor.__name__
+    return cache.get_or_compute(
+        context.content_hash, name, EXTRACTOR_VERSIONS.get(name, 0), extractor_cache_variant(name, context),
+        lambda: extractor(context),
+        should_store=is_cacheable_result
+    )
 
-    logger.info(f"Результаты анализа:")
-    logger.info(f"  - Зависимости: {len(dependencies)} файлов")
-    logger.info(f"  - Промпты: {len(prompts)} файлов")
-    logger.info(f"  - Требования: {len(requirements)} файлов")
-    logger.info(f"  - Бизнес-требования: {len(business_requirements)} файлов")
-    logger.info(f"  - Описания проекта: {len(project_descriptions)} файлов")
 
-    return state
+# Признак того, что safe_* экстрактор в текущем потоке перехватил ошибку и вернул результат по умолчанию
+_extraction_state = threading.local()
 
 
-def safe_extract_dependencies(file_path: str) -> Dict[str, List[str]]:
+def safe_extract_dependencies(source: FileSource, cache: Optional[ExtractionCache] = None) -> Dict[str, List[str]]:
     """Безопасное извлечение зависимостей с обработкой ошибок"""
+    context = as_file_context(source)
     try:
-        return extract_dependencies(file_path)
+        return run_extractor(extract_dependencies, context, cache)
     except Exception as e:
-        logger.error(f"Ошибка извлечения зависимостей из {file_path}: {e}")
+        logger.error(f"Ошибка извлечения зависимостей из {context.path}: {e}")
+        _extraction_state.failed = True
         return {"libraries": [], "functions": []}
 
 
-def safe_extract_prompts(file_path: str) -> List[str]:
+def safe_extract_prompts(source: FileSource, cache: Optional[ExtractionCache] = None) -> List[str]:
     """Безопасное извлечение промптов с обработкой ошибок"""
+    context = as_file_context(source)
     try:
-        return extract_prompts(file_path)
+        return run_extractor(extract_prompts, context, cache)
     except Exception as e:
-        logger.error(f"Ошибка извлечения промптов из {file_path}: {e}")
+        logger.error(f"Ошибка извлечения промптов из {context.path}: {e}")
+        _extraction_state.failed = True
         return []
 
 
-def safe_load_requirements(file_path: str) -> str:
+def safe_load_requirements(source: FileSource, cache: Optional[ExtractionCache] = None) -> str:
     """Безопасная загрузка требований с обработкой ошибок"""
+    context = as_file_context(source)
     try:
-        return load_requirements(file_path)
+        return run_extractor(load_requirements, context, cache)
     except Exception as e:
-        logger.error(f"Ошибка загрузки требований из {file_path}: {e}")
+        logger.error(f"Ошибка загрузки требований из {context.path}: {e}")
+        _extraction_state.failed = True
         return ""
 
 
-def safe_extract_business_requirements(file_path: str) -> str:
+def safe_extract_business_requirements(source: FileSource, cache: Optional[ExtractionCache] = None) -> str:
     """Безопасное извлечение бизнес-требований с обработкой ошибок"""
+    context = as_file_context(source)
     try:
-        return extract_business_requirements(file_path)
+        return run_extractor(extract_business_requirements, context, cache)
     except Exception as e:
-        logger.error(f"Ошибка извлечения бизнес-требований из {file_path}: {e}")
+        logger.error(f"Ошибка извлечения бизнес-требований из {context.path}: {e}")
+        _extraction_state.failed = True
         return ""
 
 
-def safe_extract_project_description(file_path: str) -> str:
+def safe_extract_project_description(source: FileSource, cache: Optional[ExtractionCache] = None) -> str:
     """Безопасное извлечение описания проекта с обработкой ошибок"""
+    context = as_file_context(source)
+
+    # Описание зависит от имени файла, поэтому проверка выполняется до обращения к кэшу
+    if not is_project_description_file(context.path):
+        return ""
+
     try:
-        return extract_project_description(file_path)
+        return run_extractor(extract_project_description, context, cache)
     except Exception as e:
-        logger.error(f"Ошибка извлечения описания проекта из {file_path}: {e}")
+        logger.error(f"Ошибка извлечения описания проекта из {context.path}: {e}")
+        _extraction_state.failed = True
         return ""
 
 
-def determine_task_type(future, file_path: str) -> str:
-    """Определяет тип задачи на основе функции и файла"""
-    # Это упрощенная версия - в реальности нужно отслеживать какая функция была вызвана
-    # Здесь мы определяем по расширению файла и содержимому
-    ext = os.path.splitext(file_path)[1].lower()
-    filename = os.path.basename(file_path).lower()
-
-    if 'dependencies' in str(future):
-        return 'dependencies'
-    elif 'prompts' in str(future):
-        return 'prompts'
-    elif 'business' in filename or 'requirements' in filename:
-        return 'business_requirements'
-    elif 'readme' in filename or 'description' in filename:
-        return 'project_description'
-    else:
-        return 'requirements'
+@dataclass(frozen=True)
+class ExtractionTask:
+    """Единица работы: один экстрактор для одного файла"""
+    file: str
+    slot: str
+    extractor: Callable
+
+
+# Слот результата -> (экстрактор, категории файлов; None - все файлы)
+EXTRACTION_SLOTS = {
+    'dependencies': (safe_extract_dependencies, ('code_files', 'notebook_files')),
+    'prompts': (safe_extract_prompts, None),
+    'requirements': (safe_load_requirements, ('document_files', 'data_files', 'markup_files', 'notebook_files')),
+    'business_requirements': (safe_extract_business_requirements,
+                              ('document_files', 'data_files', 'markup_files', 'notebook_files')),
+    'project_descriptions': (safe_extract_project_description, ('document_files', 'data_files')),
+}
+
+
+def plan_extraction_tasks(file_path: str, category: str) -> List[ExtractionTask]:
+    """Задачи извлечения для файла в порядке слотов"""
+    return [
+        ExtractionTask(file_path, slot, extractor)
+        for slot, (extractor, categories) in EXTRACTION_SLOTS.items()
+        if categories is None or category in categories
+    ]
+
+
+def timed_extraction(extractor: Callable, context: FileContext, cache: Optional[ExtractionCache] = None):
+    """
+    Вызов экстрактора с замером времени: (результат, секунды, ошибка).
+    Ошибка - safe_* экстрактор вернул результат по умолчанию вместо извлеченного.
+    """
+    _extraction_state.failed = False
+    start = time.perf_counter()
+    result = extractor(context, cache)
+    return result, time.perf_counter() - start, _extraction_state.failed
+
+
+def is_meaningful_result(slot: str, result) -> bool:
+    """Отбрасывает пустые результаты (зависимости сохраняются всегда)"""
+    if slot == 'dependencies':
+        return True
+    if slot == 'prompts':
+        return bool(result)
+    return bool(result) and len(result.strip()) > 10
+
+
+def llm_cache_variant(llm_config: LLMConfig, template: str) -> str:
+    """Вариант ключа кэша ответов LLM: провайдер, модель, параметры генерации и хэш шаблона промпта"""
+    return (f"{llm_config.provider.value}:{llm_config.model}:t={llm_config.temperature}:p={llm_config.top_p}:"
+            f"n={llm_config.max_tokens}:{hash_bytes(template.encode('utf-8'))[:16]}")
+
+
+def batch_with_cache(chain, inputs: List[Dict[str, str]], max_concurrency: int = 1,
+                     cache: Optional[ExtractionCache] = None, variant: str = "") -> List[Any]:
+    """
+    chain.batch с ограничением параллельности: результаты в порядке входов, ошибка входа возвращается
+    исключением на его месте. Успешные ответы сохраняются в кэше по хэшу входа, поэтому повторный запуск
+    не повторяет уже выполненные запросы.
+    """
+    outputs: List[Any] = [None] * len(inputs)
+    keys: List[Optional[str]] = [None] * len(inputs)
+    pending = []
+    for i, values in enumerate(inputs):
+        if cache is not None:
+            payload = json.dumps(values, ensure_ascii=False, sort_keys=True).encode('utf-8')
+            keys[i] = cache.make_key(hash_bytes(payload), LLM_CACHE_NAME, LLM_CACHE_VERSION, variant)
+            try:
+                found, value = cache.get(keys[i])
+            except sqlite3.Error as e:
+                logger.warning(f"Ошибка чтения кэша ответов LLM: {e}")
+                found, value = False, None
+            if found:
+                outputs[i] = value
+                continue
+        pending.append(i)
+
+    if len(pending) < len(inputs):
+        logger.info(f"Ответы LLM из кэша: {len(inputs) - len(pending)} из {len(inputs)}")
+    if pending:
+        results = chain.batch([inputs[i] for i in pending],
+                              config={"max_concurrency": max(1, max_concurrency)}, return_exceptions=True)
+        for i, result in zip(pending, results):
+            outputs[i] = result
+            if cache is not None and not isinstance(result, Exception):
+                try:
+                    cache.put(keys[i], LLM_CACHE_NAME, result)
+                except sqlite3.Error as e:
+                    logger.warning(f"Ошибка записи в кэш ответов LLM: {e}")
+    return outputs
+
+
+def analyze_chunks(chain, chunks: List[str], max_concurrency: int = 1,
+                   cache: Optional[ExtractionCache] = None, variant: str = "") -> List[str]:
+    """
+    Анализ чанков цепочкой: до max_concurrency запросов к LLM одновременно.
+    Результаты в порядке чанков; ошибка чанка не прерывает остальные и попадает в его результат.
+    """
+    if not chunks:
+        return []
+    logger.info(f"Обрабатываем чанков: {len(chunks)}, одновременно до {max(1, max_concurrency)}")
+    outputs = batch_with_cache(chain, [{"content": chunk} for chunk in chunks], max_concurrency, cache, variant)
+
+    analysis_chunks = []
+    for i, output in enumerate(outputs):
+        if isinstance(output, Exception):
+            logger.error(f"Ошибка обработки чанка {i + 1}: {output}")
+            analysis_chunks.append(f"Ошибка обработки чанка {i + 1}: {str(output)}")
+        else:
+            analysis_chunks.append(output)
+    return analysis_chunks
+
+
+def group_analyses(analyses: List[str], fan_in: int, max_chars: int) -> List[List[str]]:
+    """Последовательные группы анализов: не больше fan_in анализов и max_chars символов в объединенном тексте"""
+    groups = []
+    current: List[str] = []
+    size = 0
+    for analysis in analyses:
+        if current and (len(current) >= fan_in or size + len(ANALYSIS_SEPARATOR) + len(analysis) > max_chars):
+            groups.append(current)
+            current, size = [], 0
+        size += (len(ANALYSIS_SEPARATOR) if current else 0) + len(analysis)
+        current.append(analysis)
+    if current:
+        groups.append(current)
+    return groups
+
+
+def reduce_analyses(summary_chain, analyses: List[str], fan_in: int, max_chars: int, max_concurrency: int = 1,
+                    cache: Optional[ExtractionCache] = None, variant: str = "") -> str:
+    """
+    Иерархическая суммаризация: группы анализов, помещающиеся в бюджет контекста, суммируются параллельно,
+    и уровни повторяются, пока не останется один анализ. Одиночная группа переходит на следующий уровень
+    без запроса; при ошибке группы ее анализы передаются дальше объединенными.
+    """
+    fan_in = max(2, fan_in)
+    level = 0
+    while len(analyses) > 1:
+        level += 1
+        groups = group_analyses(analyses, fan_in, max_chars)
+        if len(groups) == len(analyses):
+            # Ни два анализа не помещаются в бюджет вместе: анализы обрезаются, чтобы уровень сокращал их число
+            limit = (max_chars - len(ANALYSIS_SEPARATOR)) // 2
+            logger.warning(f"Суммаризация, уровень {level}: анализы больше бюджета, обрезаются до {limit} символов")
+            analyses = [analysis[:limit] for analysis in analyses]
+            groups = group_analyses(analyses, fan_in, max_chars)
+
+        logger.info(f"Суммаризация, уровень {level}: анализов {len(analyses)}, групп {len(groups)}")
+        merged = [(i, group) for i, group in enumerate(groups) if len(group) > 1]
+        inputs = [{"analyses": ANALYSIS_SEPARATOR.join(group)} for _, group in merged]
+        outputs = batch_with_cache(summary_chain, inputs, max_concurrency, cache, variant)
+
+        next_level = [group[0] for group in groups]
+        for (i, group), output in zip(merged, outputs):
+            if isinstance(output, Exception):
+                logger.error(f"Ошибка суммаризации группы {i + 1} уровня {level}: {output}")
+                next_level[i] = ANALYSIS_SEPARATOR.join(group)
+            else:
+                next_level[i] = output
+        analyses = next_level
+    return analyses[0]
 
 
-def llm_analysis_node(state: ParserState, llm) -> ParserState:
+def llm_analysis_node(state: ParserState, llm, llm_config: Optional[LLMConfig] = None,
+                      parser_config: Optional[ParserConfig] = None) -> ParserState:
     """Расширенный LLM анализ с обработкой новых типов данных"""
+    llm_config = llm_config or LLMConfig.from_env()
+    parser_config = parser_config or ParserConfig.from_env()
+    # Ответы LLM хранятся в том же кэше, что и результаты извлечения (только если это включено явно)
+    cache = open_extraction_cache(parser_config.cache_path, parser_config.cache_max_size_mb) \
+        if llm_config.response_cache and parser_config.cache_enabled else None
     try:
         # Подготовка данных для LLM
         dep_content = prepare_dependencies_content(state['dependencies'])
@@ -326,59 +619,40 @@ def llm_analysis_node(state: ParserState, llm) -> ParserState:
         structure_content = prepare_structure_content(state['project_structure'])
         stats_content = prepare_stats_content(state['file_stats'])
 
-        # Формируем полный контент для анализа
-        all_content = f"""
-=== СТАТИСТИКА ПРОЕКТА ===
-{stats_content}
-
-=== АРХИТЕКТУРА ПРОЕКТА ===
-{structure_content}
-
-=== ОПИСАНИЯ ПРОЕКТА ===
-{description_content}
-
-=== БИЗНЕС-ТРЕБОВАНИЯ ===
-{business_content}
-
-=== ТЕХНИЧЕСКИЕ ТРЕБОВАНИЯ ===
-{req_content}
-
-=== ЗАВИСИМОСТИ И КОД ===
-{dep_content}
-
-=== ПРОМПТЫ И ШАБЛОНЫ ===
-{prompt_content}
-"""
-
-        # Чанкинг для больших проектов
-        max_input_size = 100000
-        chunks = chunk_text(all_content, chunk_size=80000, overlap=0.2)
+        # Разделы контента для анализа; общая строка всего контента не собирается
+        sections = [
+            ("СТАТИСТИКА ПРОЕКТА", stats_content),
+            ("АРХИТЕКТУРА ПРОЕКТА", structure_content),
+            ("ОПИСАНИЯ ПРОЕКТА", description_content),
+            ("БИЗНЕС-ТРЕБОВАНИЯ", business_content),
+            ("ТЕХНИЧЕСКИЕ ТРЕБОВАНИЯ", req_content),
+            ("ЗАВИСИМОСТИ И КОД", dep_content),
+            ("ПРОМПТЫ И ШАБЛОНЫ", prompt_content),
+        ]
+        content_sections = [(title, f"\n=== {title} ===\n{content}\n") for title, content in sections]
+
+        # Чанкинг для больших проектов: чанки собираются из сегментов разделов по границам строк
+        chunks = list(chunk_segments(iter_sections(content_sections), chunk_size=80000, overlap=0.2))
 
         system_prompt_template = ChatPromptTemplate.from_template(PROMPTS['system_prompt'])
         chain = system_prompt_template | llm | StrOutputParser()
 
-        analysis_chunks = []
-        for i, chunk in enumerate(chunks):
-            logger.info(f"Обрабатываем чанк {i + 1}/{len(chunks)}")
-            try:
-                analysis_chunk = chain.invoke({"content": chunk})
-                analysis_chunks.append(analysis_chunk)
-            except Exception as e:
-                logger.error(f"Ошибка обработки чанка {i + 1}: {e}")
-                analysis_chunks.append(f"Ошибка обработки чанка {i + 1}: {str(e)}")
+        # Чанки независимы: запросы к LLM выполняются параллельно с ограничением из конфигурации
+        analysis_chunks = analyze_chunks(chain, chunks, llm_config.max_concurrency, cache,
+                                         llm_cache_variant(llm_config, PROMPTS['system_prompt']))
 
-        # Суммаризация чанков
+        # Суммаризация чанков деревом: каждый запрос помещается в контекст модели
         if len(analysis_chunks) > 1:
-            summary_prompt = ChatPromptTemplate.from_template(
-                "Объедини и суммируй эти анализы в единый coherentный отчет: {analyses}"
-            )
+            summary_prompt = ChatPromptTemplate.from_template(SUMMARY_PROMPT)
             summary_chain = summary_prompt | llm | StrOutputParser()
-            analysis = summary_chain.invoke({"analyses": "\n\n".join(analysis_chunks)})
+            analysis = reduce_analyses(summary_chain, analysis_chunks, llm_config.summary_fan_in,
+                                       llm_config.context_tokens * CHARS_PER_TOKEN // 2, llm_config.max_concurrency,
+                                       cache, llm_cache_variant(llm_config, SUMMARY_PROMPT))
         else:
             analysis = analysis_chunks[0] if analysis_chunks else "Анализ не удался"
 
         # Проверка с помощью judge
-        judge_result = run_judge_validation(llm, analysis, all_content)
+        judge_result = run_judge_validation(llm, analysis, head_text(iter_sections(content_sections), 10000))
 
         # Улучшение анализа на основе результатов judge
         final_analysis = enhance_analysis_with_judge_feedback(
@@ -397,6 +671,9 @@ def llm_analysis_node(state: ParserState, llm) -> ParserState:
         error_analysis = generate_error_analysis(e, state)
         state['analysis'] = error_analysis
         save_analysis_results(error_analysis, state)
+    finally:
+        if cache is not None:
+            cache.close()
 
     return state
 
@@ -626,7 +903,9 @@ def save_analysis_results(analysis: str, state: ParserState):
             "business_requirements_count": len(state['business_requirements']),
             "project_descriptions_count": len(state['project_descriptions']),
             "total_files": len(state['files_list']),
-            "empty_files": len(state['empty_files'])
+            "empty_files": len(state['empty_files']),
+            "extraction_cache": state.get('cache_stats', {}),
+            "extraction_stats": state.get('extraction_stats', {})
         }
 
         with open(details_file, 'w', encoding='utf-8') as f:
@@ -872,6 +1151,27 @@ def generate_dependencies_section(state: ParserState) -> str:
 
         content += "---\n\n"
 
+    include_graph = state.get('include_graph') or {}
+    translation_units = {file: node for file, node in include_graph.items() if 'transitive' in node}
+    if translation_units:
+        content += "**Граф включений C/C++:**\n\n"
+        for file_path, node in sorted(translation_units.items())[:20]:
+            content += (f"- `{os.path.relpath(file_path)}`: заголовков проекта {len(node['transitive'])} "
+                        f"(напрямую {len(node['includes'])}), внешних {len(node['external'])}\n")
+        if len(translation_units) > 20:
+            content += f"- ... и еще {len(translation_units) - 20}\n"
+
+        # Заголовки, входящие в наибольшее число единиц трансляции
+        usage: Dict[str, int] = {}
+        for node in translation_units.values():
+            for header in node['transitive']:
+                usage[header] = usage.get(header, 0) + 1
+        if usage:
+            top = sorted(usage.items(), key=lambda item: (-item[1], item[0]))[:10]
+            content += "\n**Наиболее включаемые заголовки:** "
+            content += ', '.join(f"`{os.path.relpath(header)}` ({count})" for header, count in top) + "\n"
+        content += "\n"
+
     return content
 
 
@@ -980,13 +1280,15 @@ def generate_recommendations_section(state: ParserState) -> str:
     return content
 
 
-def build_graph(llm):
+def build_graph(llm, parser_config: Optional[ParserConfig] = None, llm_config: Optional[LLMConfig] = None):
     """Построение графа обработки с новыми узлами"""
+    parser_config = parser_config or ParserConfig.from_env()
+    llm_config = llm_config or LLMConfig.from_env()
     graph = StateGraph(ParserState)
 
-    graph.add_node("get_files", get_files_node)
-    graph.add_node("analyze_files", analyze_files_node)
-    graph.add_node("llm_analysis", lambda state: llm_analysis_node(state, llm))
+    graph.add_node("get_files", lambda state: get_files_node(state, parser_config))
+    graph.add_node("analyze_files", lambda state: analyze_files_node(state, parser_config))
+    graph.add_node("llm_analysis", lambda state: llm_analysis_node(state, llm, llm_config, parser_config))
     graph.add_node("compile_report", compile_report_node)
 
     graph.set_entry_point("get_files")
@@ -1015,6 +1317,13 @@ def generate_summary_statistics():
             logger.info(f"⚙️ Файлов с техническими требованиями: {details.get('requirements_count', 0)}")
             logger.info(f"📖 Файлов с описанием проекта: {details.get('project_descriptions_count', 0)}")
             logger.info(f"⚠️ Пустых файлов: {details.get('empty_files', 0)}")
+            cache_stats = details.get('extraction_cache') or {}
+            if cache_stats:
+                logger.info(f"💾 Кэш извлечения: попаданий {cache_stats.get('hits', 0)}, "
+                            f"промахов {cache_stats.get('misses', 0)}")
+            for slot, stats in (details.get('extraction_stats') or {}).items():
+                logger.info(f"⏱️ {slot}: задач {stats.get('tasks', 0)}, результатов {stats.get('results', 0)}, "
+                            f"ошибок {stats.get('errors', 0)}, {stats.get('seconds', 0)} с")
             logger.info("=" * 50)
 
             if details.get('file_stats'):
@@ -1030,12 +1339,13 @@ def generate_summary_statistics():
 if __name__ == "__main__":
     try:
         config = LLMConfig.from_env()
-        logger.info(f"🔧 Конфигурация LLM: {config.provider.value}, модель: {config.model}")
+        logger.info(f"🔧 Конфигурация LLM: {config.provider.value}, модель: {config.model}, "
+                    f"параллельных запросов: {config.max_concurrency}")
 
         llm = create_llm_client(config)
         logger.info("✅ LLM клиент успешно создан")
 
-        app = build_graph(llm)
+        app = build_graph(llm, llm_config=config)
 
         # Получаем путь к директории
         directory = input("Введите путь к директории проекта: ").strip()
@@ -0,0 +1,273 @@
+"""
+Символы Python-модуля, собранные за один обход AST
+
+Из одного ast.parse извлекаются импорты, определения функций, имена вызовов
+и строковые константы (f-строки - целиком, как шаблоны). Результат используется
+и экстрактором зависимостей, и экстрактором промптов.
+
+Для больших (сгенерированных) модулей и файлов с синтаксическими ошибками
+те же символы собирает потоковый лексер на tokenize: файл читается построчно,
+дерево не строится, поэтому память не зависит от размера модуля.
+"""
+
+import io
+import ast
+import keyword
+import logging
+import tokenize
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+# Модули больше этого размера разбираются лексером, а не ast.parse
+PYTHON_AST_MAX_SIZE_MB = 4
+
+_python_ast_max_bytes = PYTHON_AST_MAX_SIZE_MB * 1024 * 1024
+
+# Токены, не прерывающие неявную конкатенацию строк
+_CONTINUATION_TOKENS = frozenset({tokenize.NL, tokenize.COMMENT})
+
+# Токены f-строк tokenize в Python 3.12+ (в более ранних версиях f-строка - один токен STRING)
+_FSTRING_START = getattr(tokenize, 'FSTRING_START', None)
+_FSTRING_END = getattr(tokenize, 'FSTRING_END', None)
+
+
+@dataclass(frozen=True)
+class PythonSymbols:
+    """Символы модуля в порядке первого появления, без дубликатов"""
+    imports: List[str]
+    functions: List[str]
+    calls: List[str]
+    strings: List[str]
+
+
+def _render_joined_str(node: ast.JoinedStr) -> str:
+    """Текст f-строки с подстановками в виде {имя}"""
+    parts = []
+    for part in node.values:
+        if type(part) is ast.Constant:
+            parts.append(str(part.value))
+        elif type(part) is ast.FormattedValue and type(part.value) is ast.Name:
+            parts.append(f"{{{part.value.id}}}")
+        else:
+            parts.append("{...}")
+    return "".join(parts)
+
+
+def collect_python_symbols(tree: ast.AST) -> PythonSymbols:
+    """Сбор символов модуля за один обход дерева"""
+    imports = {}
+    functions = {}
+    calls = {}
+    strings = {}
+
+    # Обход с явным стеком быстрее ast.walk; листья без интересующих потомков не раскрываются
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        node_type = type(node)
+        if node_type is ast.Constant:
+            if type(node.value) is str:
+                strings[node.value] = None
+            continue
+        if node_type is ast.Name:
+            continue
+        if node_type is ast.JoinedStr:
+            # f-строка сохраняется целиком как шаблон: подстановки заменяются на {имя} или {...}
+            strings[_render_joined_str(node)] = None
+            stack.extend(part.value for part in reversed(node.values) if type(part) is ast.FormattedValue)
+            continue
+        if node_type is ast.Call:
+            func = node.func
+            if type(func) is ast.Name:
+                calls[func.id] = None
+        elif node_type is ast.FunctionDef or node_type is ast.AsyncFunctionDef:
+            functions[node.name] = None
+        elif node_type is ast.Import or node_type is ast.ImportFrom:
+            for alias in node.names:
+                imports[alias.name] = None
+            continue
+
+        for field in reversed(node._fields):
+            value = getattr(node, field, None)
+            if type(value) is list:
+                stack.extend(item for item in reversed(value) if isinstance(item, ast.AST))
+            elif isinstance(value, ast.AST) and not isinstance(value, ast.expr_context):
+                stack.append(value)
+
+    return PythonSymbols(list(imports), list(functions), list(calls), list(strings))
+
+
+def configure_python_ast_limit(max_size_mb: float):
+    """Размер модуля (МБ), начиная с которого вместо ast.parse используется лексер"""
+    global _python_ast_max_bytes
+    _python_ast_max_bytes = int(max_size_mb * 1024 * 1024)
+
+
+def python_ast_max_bytes() -> int:
+    """Наибольший размер модуля (байт), разбираемого через ast.parse"""
+    return _python_ast_max_bytes
+
+
+def _string_prefix(token: str) -> str:
+    """Префикс строкового токена в нижнем регистре (r, b, f, rb, ...)"""
+    body_start = 0
+    while token[body_start] not in '"\'':
+        body_start += 1
+    return token[:body_start].lower()
+
+
+def _resumable_tokens(readline) -> Iterator[tokenize.TokenInfo]:
+    """
+    Токены модуля; после ошибки отступа или синтаксиса токенизация продолжается
+    со следующей строки (перед продолжением отдается пустой NEWLINE)
+    """
+    lines_read = 0
+
+    def counting_readline() -> str:
+        nonlocal lines_read
+        line = readline()
+        if line:
+            lines_read += 1
+        return line
+
+    while True:
+        resumed_at = lines_read
+        try:
+            yield from tokenize.generate_tokens(counting_readline)
+            return
+        except (tokenize.TokenError, SyntaxError) as e:
+            # Ошибка в конце файла (незакрытая строка или скобка) - продолжать нечего
+            if lines_read == resumed_at:
+                return
+            logger.warning(f"Лексер Python: {e}, разбор продолжается со строки {lines_read + 1}")
+            yield tokenize.TokenInfo(tokenize.NEWLINE, '', (lines_read, 0), (lines_read, 0), '')
+
+
+def lex_python_symbols(stream: BinaryIO, encoding: str = 'utf-8') -> PythonSymbols:
+    """
+    Символы модуля по токенам tokenize без построения AST (поток читается построчно).
+    Строки с ошибками токенизации пропускаются, символы остальных строк сохраняются.
+    """
+    imports: Dict[str, None] = {}
+    functions: Dict[str, None] = {}
+    calls: Dict[str, None] = {}
+    strings: Dict[str, None] = {}
+
+    # Соседние строковые литералы склеиваются, как в AST
+    string_group: List[str] = []
+    # Токены f-строки (Python 3.12+) и глубина вложенности f-строк
+    fstring_tokens: List[tokenize.TokenInfo] = []
+    fstring_depth = 0
+    # Разбор импорта: None, 'import', 'from' (до import) или 'names' (имена после from ... import)
+    import_mode = None
+    dotted: List[str] = []
+    skip_alias = False
+    statement_start = True
+    # Два предыдущих значимых токена (для def/class и вызовов)
+    previous = previous2 = None
+
+    def flush_strings():
+        prefix = _string_prefix(string_group[0])
+        if 'b' in prefix:
+            # Байтовые литералы (сериализованные дескрипторы) строками модуля не считаются
+            pass
+        elif len(string_group) == 1 and prefix in ('', 'r') and '\\' not in string_group[0]:
+            # Простая строка без экранирования: тело берется срезом, без разбора
+            token = string_group[0]
+            quote_size = 3 if token[len(prefix):len(prefix) + 3] in ('"""', "'''") else 1
+            strings[token[len(prefix) + quote_size:len(token) - quote_size]] = None
+        else:
+            # Склейка, f-строка или экранирование: группа разбирается как выражение,
+            # вызовы внутри подстановок f-строки собираются так же, как при обходе AST
+            try:
+                nested = collect_python_symbols(ast.parse(' '.join(string_group), mode='eval'))
+            except (SyntaxError, ValueError):
+                nested = None
+            if nested is not None:
+                calls.update(dict.fromkeys(nested.calls))
+                strings.update(dict.fromkeys(nested.strings))
+        string_group.clear()
+
+    def flush_dotted():
+        if dotted:
+            imports['.'.join(dotted)] = None
+            dotted.clear()
+
+    text = io.TextIOWrapper(stream, encoding=encoding)
+    try:
+        for token in _resumable_tokens(text.readline):
+            token_type = token.type
+            if fstring_depth and token_type == tokenize.NEWLINE:
+                # Токенизация продолжена после ошибки внутри f-строки
+                fstring_tokens.clear()
+                fstring_depth = 0
+            if fstring_depth or token_type == _FSTRING_START:
+                fstring_tokens.append(token)
+                fstring_depth += 1 if token_type == _FSTRING_START else -1 if token_type == _FSTRING_END else 0
+                if not fstring_depth:
+                    # untokenize восстанавливает отступ и переносы до начала f-строки - они отбрасываются
+                    string_group.append(tokenize.untokenize(fstring_tokens).lstrip(' \t\\\n'))
+                    fstring_tokens.clear()
+                continue
+            if token_type == tokenize.STRING:
+                string_group.append(token.string)
+                continue
+            if token_type in _CONTINUATION_TOKENS:
+                continue
+            if string_group:
+                flush_strings()
+
+            string = token.string
+            if token_type == tokenize.NEWLINE or string == ';':
+                flush_dotted()
+                import_mode, skip_alias, statement_start = None, False, True
+                previous = previous2 = None
+                continue
+            if token_type in (tokenize.INDENT, tokenize.DEDENT):
+                statement_start = True
+                continue
+
+            if import_mode is not None:
+                if token_type == tokenize.NAME:
+                    if skip_alias:
+                        skip_alias = False
+                    elif string == 'as':
+                        flush_dotted()
+                        skip_alias = True
+                    elif import_mode == 'import':
+                        dotted.append(string)
+                    elif import_mode == 'names':
+                        imports[string] = None
+                    elif string == 'import':
+                        import_mode = 'names'
+                elif string == ',':
+                    flush_dotted()
+                elif string == '*' and import_mode == 'names':
+                    imports['*'] = None
+                continue
+
+            if token_type == tokenize.NAME:
+                # Импорт начинает инструкцию (в том числе после двоеточия: if x: import y)
+                if string in ('import', 'from') and (statement_start or previous.string == ':'):
+                    import_mode = string
+                elif previous is not None and previous.string == 'def':
+                    functions[string] = None
+            elif string == '(' and previous is not None and previous.type == tokenize.NAME:
+                # Вызов по имени: не атрибут, не определение и не ключевое слово
+                # (case в начале инструкции - образец match, а не вызов)
+                if previous2 is None:
+                    is_call = previous.string != 'case' and not keyword.iskeyword(previous.string)
+                else:
+                    is_call = previous2.string not in ('.', 'def', 'class') and not keyword.iskeyword(previous.string)
+                if is_call:
+                    calls[previous.string] = None
+            statement_start = False
+            previous2, previous = previous, token
+        if string_group:
+            flush_strings()
+    finally:
+        text.detach()
+
+    return PythonSymbols(list(imports), list(functions), list(calls), list(strings))
@@ -0,0 +1,160 @@
+"""
+Однопроходный поиск строковых литералов в исходном тексте
+
+Сканер находит строковые и шаблонные литералы с учетом синтаксиса языка
+(кавычки, тройные кавычки, шаблонные строки JS, комментарии) за линейное время:
+каждая позиция текста просматривается ограниченное число раз, а поиск
+закрывающей кавычки выполняется через str.find. Используется вместо
+регулярных выражений с .*? и re.DOTALL, которые на минифицированном JS
+и больших JSON уходят в катастрофический перебор.
+"""
+
+import os
+import re
+from typing import Dict, Iterator, NamedTuple, Tuple
+
+
+class StringLiteral(NamedTuple):
+    """Найденный литерал: тело без кавычек и его границы в тексте"""
+    text: str
+    start: int
+    end: int
+    quote: str
+
+
+class LiteralSyntax(NamedTuple):
+    """Правила языка: кавычки (открывающая, многострочная ли) и маркеры комментариев"""
+    quotes: Tuple[Tuple[str, bool], ...]
+    line_comments: Tuple[str, ...]
+    block_comments: Tuple[Tuple[str, str], ...]
+    # Апостроф внутри слова (don't, it's) не открывает литерал
+    word_apostrophes: bool = False
+
+
+LITERAL_SYNTAXES: Dict[str, LiteralSyntax] = {
+    'python': LiteralSyntax(
+        quotes=(('"""', True), ("'''", True), ('"', False), ("'", False)),
+        line_comments=('#',),
+        block_comments=(),
+    ),
+    'javascript': LiteralSyntax(
+        quotes=(('`', True), ('"', False), ("'", False)),
+        line_comments=('//',),
+        block_comments=(('/*', '*/'),),
+    ),
+    'java': LiteralSyntax(
+        quotes=(('"""', True), ('"', False), ("'", False)),
+        line_comments=('//',),
+        block_comments=(('/*', '*/'),),
+    ),
+    'c': LiteralSyntax(
+        quotes=(('"', False), ("'", False)),
+        line_comments=('//',),
+        block_comments=(('/*', '*/'),),
+    ),
+    # Текст, разметка и данные: комментариев нет, обычные кавычки не переходят через строку
+    'generic': LiteralSyntax(
+        quotes=(('"""', True), ("'''", True), ('"', False), ("'", False)),
+        line_comments=(),
+        block_comments=(),
+        word_apostrophes=True,
+    ),
+}
+
+# Расширение файла -> синтаксис литералов
+EXTENSION_SYNTAXES = {
+    '.py': 'python',
+    '.js': 'javascript',
+    '.ts': 'javascript',
+    '.java': 'java',
+    '.cpp': 'c',
+    '.hpp': 'c',
+    '.c': 'c',
+    '.h': 'c',
+}
+
+
+def get_literal_syntax(file_path: str) -> str:
+    """Имя синтаксиса литералов для файла"""
+    return EXTENSION_SYNTAXES.get(os.path.splitext(file_path)[1].lower(), 'generic')
+
+
+def _compile_token_pattern(syntax: LiteralSyntax) -> re.Pattern:
+    """Регулярное выражение начала токена: альтернатива фиксированных строк без перебора"""
+    tokens = [quote for quote, _ in syntax.quotes]
+    tokens.extend(syntax.line_comments)
+    tokens.extend(opening for opening, _ in syntax.block_comments)
+    # Более длинные маркеры проверяются первыми (""" раньше ")
+    tokens.sort(key=len, reverse=True)
+    return re.compile('|'.join(re.escape(token) for token in tokens))
+
+
+_TOKEN_PATTERNS = {name: _compile_token_pattern(syntax) for name, syntax in LITERAL_SYNTAXES.items()}
+
+
+def _find_closing_quote(content: str, quote: str, body_start: int, limit: int) -> int:
+    """Позиция закрывающей кавычки до limit с учетом экранирования или -1"""
+    position = body_start
+    while True:
+        end = content.find(quote, position, limit)
+        if end < 0:
+            return -1
+        # Кавычка экранирована, если перед ней нечетное число обратных слэшей
+        backslashes = 0
+        index = end - 1
+        while index >= body_start and content[index] == '\\':
+            backslashes += 1
+            index -= 1
+        if backslashes % 2 == 0:
+            return end
+        position = end + 1
+
+
+def scan_string_literals(content: str, syntax: str = 'generic') -> Iterator[StringLiteral]:
+    """Литералы текста в порядке появления; комментарии пропускаются"""
+    rules = LITERAL_SYNTAXES.get(syntax, LITERAL_SYNTAXES['generic'])
+    quotes = dict(rules.quotes)
+    block_comments = dict(rules.block_comments)
+    token_pattern = _TOKEN_PATTERNS.get(syntax, _TOKEN_PATTERNS['generic'])
+
+    # Конец текущей строки запоминается: на минифицированном файле из одной строки
+    # повторный поиск перевода строки для каждого литерала дал бы квадратичное время
+    line_end = -1
+    position = 0
+    while True:
+        match = token_pattern.search(content, position)
+        if match is None:
+            return
+        token = match.group()
+        start = match.start()
+        body_start = match.end()
+
+        if token in quotes:
+            if rules.word_apostrophes and token == "'" and start > 0 and content[start - 1].isalnum():
+                position = body_start
+                continue
+            if quotes[token]:
+                limit = len(content)
+            else:
+                if line_end < body_start:
+                    line_end = content.find('\n', body_start)
+                    if line_end < 0:
+                        line_end = len(content)
+                limit = line_end
+            end = _find_closing_quote(content, token, body_start, limit)
+            if end < 0:
+                # Незакрытая кавычка (например, апостроф в тексте) - продолжаем со следующего символа
+                position = body_start
+                continue
+            yield StringLiteral(content[body_start:end], start, end + len(token), token)
+            position = end + len(token)
+        elif token in block_comments:
+            end = content.find(block_comments[token], body_start)
+            if end < 0:
+                return
+            position = end + len(block_comments[token])
+        else:
+            end = content.find('\n', body_start)
+            if end < 0:
+                return
+            position = end + 1
@@ -0,0 +1,232 @@
+"""
+Потоковое извлечение промптов из JSON и YAML
+
+Библиотеки промптов и конфигурации агентов не загружаются целиком: JSON
+разбирается токенизатором по кускам файла, YAML - событиями парсера PyYAML.
+Обход отслеживает путь ключей к текущему значению и отдает только строковые
+значения под ключами промптов (prompt, system, template, ...) и content
+сообщений (messages[].content) вместе с путем. Память не зависит от размера
+файла: хранится только текущий путь и необработанный хвост прочитанного куска.
+"""
+
+import re
+from typing import BinaryIO, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+import yaml
+
+from json_stream import JSON_CHUNK_SIZE, JsonTokenizer, decode_string
+
+# Ключи, все строковые значения под которыми считаются промптами
+PROMPT_KEYS = frozenset({
+    'prompt', 'prompts', 'system', 'system_message', 'template', 'templates',
+    'instruction', 'instructions',
+})
+
+# Суффиксы ключей промптов (system_prompt, userPrompt, chat_template)
+PROMPT_KEY_SUFFIXES = ('prompt', 'template')
+
+# Ключи списков сообщений, в элементах которых промптом считается content
+MESSAGE_KEYS = frozenset({'messages'})
+
+# Ключ промпта или списка сообщений в тексте JSON: поддерево без таких ключей пропускается целиком
+_PROMPT_KEY_PATTERN = re.compile(
+    r'"(?:%s|[^"\\]*(?:%s))"\s*:' % ('|'.join(sorted(PROMPT_KEYS | MESSAGE_KEYS)), '|'.join(PROMPT_KEY_SUFFIXES)),
+    re.IGNORECASE)
+
+_YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+class PromptLeaf(NamedTuple):
+    """Строковое значение под ключом промпта и путь к нему (agents[0].system)"""
+    path: str
+    text: str
+
+
+def is_prompt_key(key: str) -> bool:
+    """Является ли ключ ключом промпта"""
+    lowered = key.lower()
+    return lowered in PROMPT_KEYS or lowered.endswith(PROMPT_KEY_SUFFIXES)
+
+
+class _Container:
+    """Открытый объект или массив на пути к текущему значению"""
+    __slots__ = ('mapping', 'key', 'in_prompt', 'expect_key', 'complex_key')
+
+    def __init__(self, mapping: bool, in_prompt: bool):
+        self.mapping = mapping
+        # Текущий ключ объекта или индекс элемента массива
+        self.key: Union[str, int, None] = None if mapping else 0
+        self.in_prompt = in_prompt
+        self.expect_key = mapping
+        # Ключ объекта - сам контейнер (YAML), после него ожидается значение
+        self.complex_key = False
+
+
+class _PromptPathWalker:
+    """Обход дерева по событиям разбора с отслеживанием пути и промпт-поддеревьев"""
+
+    def __init__(self):
+        self._containers: List[_Container] = []
+
+    def _value_is_prompt(self) -> bool:
+        """Находится ли текущее значение под ключом промпта"""
+        if not self._containers:
+            return False
+        top = self._containers[-1]
+        if top.in_prompt:
+            return True
+        if not top.mapping or not isinstance(top.key, str):
+            return False
+        if is_prompt_key(top.key):
+            return True
+        # messages[i].content: объект - элемент массива под ключом сообщений
+        if top.key.lower() == 'content' and len(self._containers) >= 3:
+            array, owner = self._containers[-2], self._containers[-3]
+            return (not array.mapping and owner.mapping and isinstance(owner.key, str)
+                    and owner.key.lower() in MESSAGE_KEYS)
+        return False
+
+    def _value_done(self):
+        """Переход к следующему ключу объекта или элементу массива"""
+        if not self._containers:
+            return
+        top = self._containers[-1]
+        if not top.mapping:
+            top.key += 1
+        elif top.complex_key:
+            top.complex_key = False
+        else:
+            top.expect_key = True
+
+    def _path(self) -> str:
+        parts = []
+        for container in self._containers:
+            if container.mapping:
+                parts.append(f".{container.key}" if parts else str(container.key))
+            else:
+                parts.append(f"[{container.key}]")
+        return "".join(parts)
+
+    def begin_container(self, mapping: bool):
+        top = self._containers[-1] if self._containers else None
+        if top is not None and top.expect_key:
+            # Составной ключ обходится как значение под ключом '?'
+            top.key, top.expect_key, top.complex_key = '?', False, True
+        self._containers.append(_Container(mapping, self._value_is_prompt()))
+
+    def end_container(self):
+        self._containers.pop()
+        self._value_done()
+
+    def _messages_position(self) -> Tuple[bool, bool]:
+        """Является ли текущее значение списком сообщений или элементом списка сообщений"""
+        if not self._containers:
+            return False, False
+        top = self._containers[-1]
+        if top.mapping:
+            return isinstance(top.key, str) and top.key.lower() in MESSAGE_KEYS, False
+        owner = self._containers[-2] if len(self._containers) >= 2 else None
+        return False, owner is not None and isinstance(owner.key, str) and owner.key.lower() in MESSAGE_KEYS
+
+    def needs_subtree(self) -> bool:
+        """Может ли поддерево текущего значения содержать промпты без ключей промптов внутри него"""
+        return self._value_is_prompt() or any(self._messages_position())
+
+    def walk_value(self, value) -> Iterator[PromptLeaf]:
+        """Обход уже разобранного значения в текущей позиции"""
+        messages_list, message_item = self._messages_position()
+        yield from _walk_value(value, self._path(), self._value_is_prompt(), messages_list, message_item)
+        self._value_done()
+
+    def wants_text(self) -> bool:
+        """Нужен ли текст следующего скаляра: это ключ объекта или значение под ключом промпта"""
+        top = self._containers[-1] if self._containers else None
+        return top is not None and (top.expect_key or self._value_is_prompt())
+
+    def scalar(self, text: Optional[str]) -> Optional[PromptLeaf]:
+        """Скаляр: ключ объекта или значение; для строк под ключом промпта - лист с путем"""
+        top = self._containers[-1] if self._containers else None
+        if top is not None and top.expect_key:
+            top.key, top.expect_key = text if text is not None else '', False
+            return None
+        leaf = PromptLeaf(self._path(), text) if text is not None and self._value_is_prompt() else None
+        self._value_done()
+        return leaf
+
+
+def _walk_value(value, path: str, in_prompt: bool, messages_list: bool = False,
+                message_item: bool = False) -> Iterator[PromptLeaf]:
+    """Строки под ключами промптов в разобранном значении JSON"""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if not isinstance(item, (str, dict, list)):
+                continue
+            prompt = in_prompt or is_prompt_key(key) or (message_item and key.lower() == 'content')
+            if isinstance(item, str):
+                if prompt:
+                    yield PromptLeaf(f"{path}.{key}" if path else key, item)
+            else:
+                yield from _walk_value(item, f"{path}.{key}" if path else key, prompt, key.lower() in MESSAGE_KEYS)
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            if isinstance(item, (dict, list)) or (in_prompt and isinstance(item, str)):
+                yield from _walk_value(item, f"{path}[{index}]", in_prompt, False, messages_list)
+    elif isinstance(value, str) and in_prompt:
+        yield PromptLeaf(path, value)
+
+
+def iter_json_prompts(stream: BinaryIO, encoding: str = 'utf-8',
+                      chunk_size: int = JSON_CHUNK_SIZE) -> Iterator[PromptLeaf]:
+    """
+    Промпты JSON: файл читается кусками и разбирается по токенам.
+    Объект или массив, целиком поместившийся в прочитанный кусок, разбирается декодером json,
+    а если в его тексте нет ключей промптов, пропускается без обхода.
+    """
+    walker = _PromptPathWalker()
+    tokens = JsonTokenizer(stream, encoding, chunk_size)
+    for token in tokens:
+        kind = token.lastgroup
+        if kind == 'string':
+            # Строка значения вне промптов не декодируется
+            leaf = walker.scalar(decode_string(token.group(kind)) if walker.wants_text() else '')
+            if leaf is not None:
+                yield leaf
+        elif kind == 'literal':
+            walker.scalar(None)
+        elif token.group(kind) in ('{', '['):
+            decoded = tokens.decode_container(token)
+            if decoded is None:
+                # Контейнер не закончился в прочитанном куске: разбор по токенам
+                walker.begin_container(token.group(kind) == '{')
+            elif walker.needs_subtree() or _PROMPT_KEY_PATTERN.search(decoded[1]):
+                yield from walker.walk_value(decoded[0])
+            else:
+                walker.scalar(None)
+        else:
+            walker.end_container()
+
+
+def iter_yaml_prompts(stream: BinaryIO) -> Iterator[PromptLeaf]:
+    """Промпты YAML (все документы потока) по событиям парсера без построения объектов"""
+    walker = _PromptPathWalker()
+    try:
+        for event in yaml.parse(stream, Loader=_YAML_LOADER):
+            if isinstance(event, yaml.ScalarEvent):
+                leaf = walker.scalar(event.value)
+                if leaf is not None:
+                    yield leaf
+            elif isinstance(event, (yaml.MappingStartEvent, yaml.SequenceStartEvent)):
+                walker.begin_container(isinstance(event, yaml.MappingStartEvent))
+            elif isinstance(event, (yaml.MappingEndEvent, yaml.SequenceEndEvent)):
+                walker.end_container()
+            elif isinstance(event, yaml.AliasEvent):
+                walker.scalar(None)
+    except yaml.YAMLError as e:
+        raise ValueError(f"Некорректный YAML: {e}") from e
+
+
+def iter_structured_prompts(stream: BinaryIO, ext: str, encoding: str = 'utf-8') -> Iterator[PromptLeaf]:
+    """Промпты JSON или YAML по расширению файла"""
+    if ext == '.json':
+        return iter_json_prompts(stream, encoding)
+    return iter_yaml_prompts(stream)
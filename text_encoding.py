@@ -0,0 +1,94 @@
+"""
+Определение кодировки текстовых файлов
+
+Кодировка определяется один раз по началу файла: сначала по BOM, затем
+проверкой UTF-8 (самый частый случай, без статистики), и только если начало
+не декодируется как UTF-8 - статистическим детектором charset_normalizer среди
+кириллических и латинских кодовых страниц (на коротких текстах без ограничения
+детектор принимает cp1251 за shift_jis или big5).
+Результат сохраняется в записи файла при обходе проекта и используется всеми
+читателями, поэтому файл не декодируется повторно в разных кодировках.
+"""
+
+import codecs
+import logging
+from typing import Optional
+
+try:
+    import charset_normalizer
+except ImportError:
+    charset_normalizer = None
+
+logger = logging.getLogger(__name__)
+
+# Сколько байт начала файла проверяется при определении кодировки
+ENCODING_SNIFF_BYTES = 64 * 1024
+
+# Кодировка, если начало не UTF-8, а статистический детектор недоступен или не дал результата
+FALLBACK_ENCODING = 'cp1251'
+
+# Кодовые страницы, среди которых выбирает статистический детектор (первая - наиболее вероятная)
+STATISTICAL_CANDIDATES = ['cp1251', 'koi8_r', 'cp866', 'cp1252']
+
+# BOM -> кодировка (кодеки utf-8-sig, utf-16 и utf-32 сами отбрасывают BOM);
+# BOM UTF-32 LE начинается с BOM UTF-16 LE, поэтому проверяется раньше
+_BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+
+def _statistical_encoding(sample: bytes) -> Optional[str]:
+    """Кодировка по статистике байтов (None, если детектор недоступен или не уверен)"""
+    if charset_normalizer is None:
+        return None
+    best = charset_normalizer.from_bytes(sample, cp_isolation=STATISTICAL_CANDIDATES).best()
+    if best is None:
+        return None
+    try:
+        return codecs.lookup(best.encoding).name
+    except LookupError:
+        return None
+
+
+def detect_encoding(sample: bytes, complete: bool = True) -> str:
+    """
+    Кодировка текста по его началу: BOM, затем UTF-8, затем статистический детектор.
+    complete=False - выборка обрезана, и символ на ее границе может быть неполным.
+    """
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+    if sample.isascii():
+        return 'utf-8'
+    try:
+        # Инкрементальный декодер не считает ошибкой символ, обрезанный границей выборки
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=complete)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    return _statistical_encoding(sample) or FALLBACK_ENCODING
+
+
+def sniff_file_encoding(file_path: str, sample_size: int = ENCODING_SNIFF_BYTES) -> str:
+    """Кодировка файла по первым sample_size байтам"""
+    with open(file_path, 'rb') as f:
+        sample = f.read(sample_size)
+    return detect_encoding(sample, complete=len(sample) < sample_size)
+
+
+def decode_text(data: bytes, encoding: str, path: str = '') -> str:
+    """
+    Декодирование содержимого в определенной заранее кодировке. Если байты дальше
+    проверенного начала в ней не декодируются, кодировка определяется по всему содержимому,
+    а оставшиеся ошибки заменяются символом U+FFFD (байты не отбрасываются молча).
+    """
+    try:
+        return data.decode(encoding)
+    except UnicodeDecodeError as e:
+        fallback = detect_encoding(data)
+        logger.warning(f"Файл {path} не декодируется как {encoding} ({e}), используется {fallback}")
+        return data.decode(fallback, errors='replace')
@@ -0,0 +1,97 @@
+"""
+Сегменты текста с позициями в источнике
+
+Загрузчики документов отдают текст целиком и без искусственных переводов строк
+(в таком виде он хранится в манифесте и кэше извлечения). Разделы контента,
+собранные из этих текстов, чанкер LLM-анализа получает как поток сегментов
+ограниченного размера. Границы сегментов выбираются по переводу строки или
+пробелу, поэтому слова не разрезаются, а каждый сегмент хранит источник и
+смещение в нем. Чанки собираются из сегментов без построения общей строки
+всего контента.
+"""
+
+from collections import deque
+from typing import Deque, Iterable, Iterator, NamedTuple, Tuple
+
+
+class TextSegment(NamedTuple):
+    """Фрагмент текста источника и его смещение в нем"""
+    text: str
+    source: str
+    start: int
+
+    @property
+    def end(self) -> int:
+        return self.start + len(self.text)
+
+
+def _boundary(text: str, start: int, limit: int) -> int:
+    """Конец сегмента не дальше limit: после перевода строки, иначе после пробела, иначе limit"""
+    # Граница ищется во второй половине окна, чтобы сегменты не мельчали
+    floor = start + (limit - start) // 2
+    newline = text.rfind('\n', floor, limit)
+    if newline >= 0:
+        return newline + 1
+    space = text.rfind(' ', floor, limit)
+    if space >= 0:
+        return space + 1
+    return limit
+
+
+def iter_segments(text: str, segment_size: int = 1000, source: str = '') -> Iterator[TextSegment]:
+    """Разбиение текста на сегменты до segment_size символов по границам строк и слов"""
+    segment_size = max(1, segment_size)
+    start = 0
+    length = len(text)
+    while start < length:
+        limit = start + segment_size
+        end = length if limit >= length else _boundary(text, start, limit)
+        yield TextSegment(text[start:end], source, start)
+        start = end
+
+
+def iter_sections(sections: Iterable[Tuple[str, str]], segment_size: int = 1000) -> Iterator[TextSegment]:
+    """Сегменты последовательности (источник, текст) в порядке следования"""
+    for source, text in sections:
+        yield from iter_segments(text, segment_size, source)
+
+
+def head_text(segments: Iterable[TextSegment], limit: int) -> str:
+    """Первые limit символов потока сегментов"""
+    parts = []
+    size = 0
+    for segment in segments:
+        if size >= limit:
+            break
+        parts.append(segment.text[:limit - size])
+        size += len(parts[-1])
+    return "".join(parts)
+
+
+def chunk_segments(segments: Iterable[TextSegment], chunk_size: int = 80000,
+                   overlap: float = 0.2) -> Iterator[str]:
+    """Чанки до chunk_size символов из потока сегментов; соседние чанки перекрываются на долю overlap"""
+    overlap_size = int(chunk_size * overlap)
+    parts: Deque[str] = deque()
+    size = 0
+    # Есть ли в текущем чанке новый текст (не только перекрытие с предыдущим)
+    fresh = False
+
+    for segment in segments:
+        # Сегмент длиннее чанка делится по границам слов
+        piece_size = chunk_size - overlap_size
+        pieces = iter_segments(segment.text, piece_size) if len(segment.text) > piece_size else (segment,)
+        for piece in pieces:
+            text = piece.text
+            if fresh and size + len(text) > chunk_size:
+                yield "".join(parts)
+                # Перекрытие: хвост предыдущего чанка целыми сегментами
+                while parts and size > overlap_size:
+                    size -= len(parts.popleft())
+                fresh = False
+            parts.append(text)
+            size += len(text)
+            fresh = True
+
+    if fresh:
+        yield "".join(parts)
@@ -0,0 +1,108 @@
+"""
+Окна табличных файлов (листы Excel, CSV), общие для всех экстракторов
+
+Книга открывается один раз (pandas с движком openpyxl в режиме read_only
+читает XML листов потоково), и с каждого листа берется только строка заголовков
+и первые строки данных. Разбор листа останавливается, как только окно заполнено,
+поэтому время не зависит от размера книги. Общее количество строк берется из
+размеров листа, записанных в файле, без чтения всех строк.
+CSV читается так же: кодировка определяется один раз (при обходе проекта),
+разбираются только первые строки, а строки файла подсчитываются по байтам.
+"""
+
+import io
+import logging
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import pandas as pd
+
+from text_encoding import ENCODING_SNIFF_BYTES, detect_encoding
+
+logger = logging.getLogger(__name__)
+
+# Сколько строк данных читается с каждого листа
+SHEET_ROW_LIMIT = 1000
+
+
+@dataclass(frozen=True, eq=False)
+class SheetWindow:
+    """Заголовки и первые строки листа"""
+    name: str
+    frame: pd.DataFrame
+    # Количество строк данных по размерам листа (None, если размеры в файле не записаны)
+    total_rows: Optional[int] = None
+
+    @property
+    def row_count(self) -> int:
+        """Количество строк данных листа (не меньше прочитанного окна)"""
+        if self.total_rows is None:
+            return len(self.frame)
+        return max(self.total_rows, len(self.frame))
+
+    @property
+    def truncated(self) -> bool:
+        """Прочитана ли только часть строк листа"""
+        return self.row_count > len(self.frame)
+
+
+@dataclass(frozen=True, eq=False)
+class WorkbookWindow:
+    """Окна всех листов книги в порядке листов"""
+    sheets: Tuple[SheetWindow, ...]
+
+    @property
+    def sheet_names(self) -> List[str]:
+        """Имена листов"""
+        return [sheet.name for sheet in self.sheets]
+
+    @property
+    def first_sheet(self) -> Optional[SheetWindow]:
+        """Первый лист книги"""
+        return self.sheets[0] if self.sheets else None
+
+
+def _declared_row_count(excel_file: pd.ExcelFile, sheet_name: str) -> Optional[int]:
+    """Количество строк данных (без заголовка) по размерам листа, записанным в файле"""
+    try:
+        book = excel_file.book
+        if hasattr(book, 'sheet_by_name'):
+            # xlrd (.xls): количество строк известно после загрузки книги
+            rows = book.sheet_by_name(sheet_name).nrows
+        else:
+            # openpyxl read_only: размеры из элемента <dimension> листа
+            rows = book[sheet_name].max_row
+    except Exception as e:
+        logger.debug(f"Размеры листа '{sheet_name}' недоступны: {e}")
+        return None
+    return max(rows - 1, 0) if rows else None
+
+
+def read_workbook(data: bytes, row_limit: int = SHEET_ROW_LIMIT) -> WorkbookWindow:
+    """Однократное чтение книги: заголовки и до row_limit строк каждого листа"""
+    sheets = []
+    with pd.ExcelFile(io.BytesIO(data)) as excel_file:
+        for sheet_name in excel_file.sheet_names:
+            # Размеры читаются до разбора: pandas сбрасывает их перед чтением строк
+            total_rows = _declared_row_count(excel_file, sheet_name)
+            frame = excel_file.parse(sheet_name, nrows=row_limit)
+            sheets.append(SheetWindow(str(sheet_name), frame, total_rows))
+    return WorkbookWindow(tuple(sheets))
+
+
+def count_csv_rows(data: bytes) -> int:
+    """Количество строк данных CSV (без заголовка) по числу переводов строк"""
+    if not data:
+        return 0
+    lines = data.count(b'\n') + (0 if data.endswith(b'\n') else 1)
+    return max(lines - 1, 0)
+
+
+def read_csv_window(data: bytes, name: str = '', row_limit: int = SHEET_ROW_LIMIT,
+                    encoding: Optional[str] = None) -> SheetWindow:
+    """Однократное чтение CSV: заголовки и до row_limit строк в кодировке, определенной заранее"""
+    if encoding is None:
+        encoding = detect_encoding(data[:ENCODING_SNIFF_BYTES], len(data) <= ENCODING_SNIFF_BYTES)
+    # Байты, не декодируемые за пределами проверенного начала, заменяются, а не приводят к повторному чтению
+    frame = pd.read_csv(io.BytesIO(data), encoding=encoding, encoding_errors='replace', nrows=row_limit)
+    return SheetWindow(name, frame, count_csv_rows(data))